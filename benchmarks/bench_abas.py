@@ -0,0 +1,96 @@
+""" Latência de rerun da Visão Empresa: abas executadas todas (st.tabs) x só a aba ativa.
+
+    Cada rerun é medido com o AppTest do Streamlit, com os agregados já
+    carregados no processo. "Frio" limpa o cache das agregações antes do rerun
+    (equivale a mudar os filtros); "quente" repete o rerun com os mesmos filtros.
+
+    O "antes" é a própria página atual com o seletor de abas trocado por st.tabs
+    (ver pagina_com_tabs), então a única diferença medida é executar todas as
+    abas ou só a ativa.
+
+    Uso:
+        python benchmarks/bench_abas.py [--repeticoes 5]
+"""
+
+import argparse
+import ast
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from streamlit.testing.v1 import AppTest
+
+from namasfood.memo import cache_agregacoes
+
+PAGINA = os.path.join(RAIZ, 'pages', '1_visao_empresa.py')
+
+def pagina_com_tabs(codigo):
+
+    """ A mesma página com st.tabs no lugar de selecionar_aba: todas as abas executam a cada rerun.
+
+        Input: código da página
+        Output: código com `aba = selecionar_aba([...])` -> `abas = st.tabs([...])` e
+                cada `if/elif aba == 'X':` -> `with abas[i]:`
+    """
+
+    nomes = None
+    linhas = []
+    for linha in codigo.splitlines():
+        seletor = re.fullmatch(r'aba = selecionar_aba\((\[.*\])\)', linha)
+        ramo = re.fullmatch(r"(?:el)?if aba == '(.*)':", linha)
+        if seletor:
+            nomes = ast.literal_eval(seletor.group(1))
+            linha = 'abas = st.tabs({})'.format(seletor.group(1))
+        elif ramo:
+            linha = 'with abas[{}]:'.format(nomes.index(ramo.group(1)))
+        linhas.append(linha)
+
+    if nomes is None:
+        raise ValueError('a página não usa selecionar_aba')
+
+    return '\n'.join(linhas)
+
+def medir(app, repeticoes, frio, aba=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if frio:
+            cache_agregacoes.limpar()
+        if aba is not None:
+            app.radio[0].set_value(aba)
+        inicio = time.perf_counter()
+        app.run()
+        tempos.append(time.perf_counter() - inicio)
+    return sorted(tempos)[len(tempos) // 2]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    os.chdir(RAIZ)
+    with open(PAGINA, encoding='utf-8') as arquivo:
+        codigo = arquivo.read()
+
+    antes = AppTest.from_string(pagina_com_tabs(codigo), default_timeout=300).run()
+    antes_frio = medir(antes, args.repeticoes, frio=True)
+    antes_quente = medir(antes, args.repeticoes, frio=False)
+
+    depois = AppTest.from_file(PAGINA, default_timeout=300).run()
+    abas = list(depois.radio[0].options)
+    frias = {aba: medir(depois, args.repeticoes, frio=True, aba=aba) for aba in abas}
+    quentes = {aba: medir(depois, args.repeticoes, frio=False, aba=aba) for aba in abas}
+
+    print('{:<36} {:>12} {:>12}'.format('Rerun', 'frio (ms)', 'quente (ms)'))
+    print('{:<36} {:>12.1f} {:>12.1f}'.format('Antes (st.tabs, todas as abas)', 1000 * antes_frio,
+                                              1000 * antes_quente))
+    for aba in abas:
+        print('{:<36} {:>12.1f} {:>12.1f}'.format('Depois (só ' + aba + ')', 1000 * frias[aba],
+                                                  1000 * quentes[aba]))
+
+if __name__ == '__main__':
+    main()
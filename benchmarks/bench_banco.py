@@ -0,0 +1,184 @@
+""" Paridade e tempo do modo banco (DuckDB) frente aos agregados em memória.
+
+    Sobre um train.csv sintético (gerar_dataset.py) ou um arquivo informado:
+        - monta o banco do zero e mede a carga fria de cada modo (banco e memoria);
+        - mede a reabertura do banco já montado (reinício do processo);
+        - para cada combinação de filtros, compara todas as tabelas agregadas dos
+          dois modos (mesmas colunas, tipos, ordem e valores, com tolerância
+          relativa de 1e-9 nas médias, M2 e somas de ponto flutuante) e mede o
+          tempo de cada consulta;
+        - faz o mesmo com as agregações finais das páginas (AGREGACOES_FINAIS), que
+          no modo banco são calculadas no SQL sem trazer as tabelas filtradas;
+        - acrescenta linhas ao CSV e confere que a atualização incremental do
+          banco chega às mesmas tabelas que uma carga nova em memória.
+
+    Termina com código 1 se alguma tabela diferir.
+
+    Uso:
+        python benchmarks/bench_banco.py [caminho/do/train.csv] [--linhas 200_000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerar_dataset import DIAS, gerar_csv
+from namasfood import banco
+from namasfood.agregados import TABELAS, contar_distintos, filtrar_agregados, medianas_coordenadas, montar_agregados
+from namasfood.dados import clean_code, ler_csv
+from namasfood.entregadores import (media_avaliacao_entregadores, media_avaliacao_por, pedidos_por_entregador_semana,
+                                    ranking_entregadores)
+
+TRANSITOS = ['Low', 'Medium', 'High', 'Jam']
+CLIMAS = ['Sunny', 'Stormy', 'Sandstorm', 'Cloudy', 'Fog', 'Windy']
+
+# (descrição, data limite, trânsito, clima)
+FILTROS = [
+    ('sem filtro', datetime(2022, 4, 6), TRANSITOS, None),
+    ('sem filtro, com clima', datetime(2022, 4, 6), TRANSITOS, CLIMAS),
+    ('até 10/03, Low e Jam', datetime(2022, 3, 10), ['Low', 'Jam'], None),
+    ('até 10/03, Low e Jam, Sunny e Fog', datetime(2022, 3, 10), ['Low', 'Jam'], ['Sunny', 'Fog']),
+    ('nenhum trânsito', datetime(2022, 4, 6), [], None),
+]
+
+# agregações finais das páginas: (descrição, função sobre os agregados filtrados)
+AGREGACOES_FINAIS = [
+    ('restaurantes distintos', lambda agregados: contar_distintos(agregados, 'restaurantes', 'Restaurant_ID')),
+    ('entregadores distintos', lambda agregados: contar_distintos(agregados, 'entregadores', 'Delivery_person_ID')),
+    ('medianas do mapa', lambda agregados: medianas_coordenadas(agregados, ['City', 'Road_traffic_density'])),
+    ('entregadores por semana', pedidos_por_entregador_semana),
+    ('avaliação por entregador', media_avaliacao_entregadores),
+    ('avaliação por clima', lambda agregados: media_avaliacao_por(agregados, 'Weatherconditions')),
+    ('ranking de entregadores', lambda agregados: ranking_entregadores(agregados, 10)),
+]
+
+def _comparar(esperado, obtido):
+    if isinstance(esperado, tuple):
+        for a, b in zip(esperado, obtido):
+            _comparar(a, b)
+    elif isinstance(esperado, pd.DataFrame):
+        pd.testing.assert_frame_equal(esperado.reset_index(drop=True), obtido,
+                                      check_exact=False, rtol=1e-9, atol=1e-9)
+    else:
+        assert esperado == obtido, '{} != {}'.format(esperado, obtido)
+
+def diferencas(memoria, consultado):
+
+    """ Tabelas e agregações finais que diferem entre os dois modos, para cada combinação de filtros.
+
+        Output: lista de (filtros, tabela ou agregação, mensagem do pandas.testing)
+    """
+
+    erros = []
+    for descricao, *filtros in FILTROS:
+        esperado = filtrar_agregados(memoria, *filtros)
+        obtido = filtrar_agregados(consultado, *filtros)
+        comparacoes = [(nome, lambda agregados, nome=nome: agregados[nome]) for nome in TABELAS]
+        for nome, funcao in comparacoes + AGREGACOES_FINAIS:
+            try:
+                _comparar(funcao(esperado), funcao(obtido))
+            except AssertionError as erro:
+                erros.append((descricao, nome, str(erro)))
+    return erros
+
+def tempos(memoria, consultado, consultar, repeticoes):
+
+    """ Menor tempo de consultar(agregados filtrados) em cada modo, para cada combinação de filtros. """
+
+    linhas = []
+    for descricao, *filtros in FILTROS:
+        melhores = []
+        for agregados in (memoria, consultado):
+            melhor = float('inf')
+            for _ in range(repeticoes):
+                #sem o cache de resultados do banco: cada repetição consulta de novo
+                if agregados is consultado:
+                    agregados.resultados.limpar()
+                filtrados = filtrar_agregados(agregados, *filtros)
+                tempo, _ = cronometrar(lambda: consultar(filtrados))
+                melhor = min(melhor, tempo)
+            melhores.append(melhor)
+        linhas.append((descricao, *melhores))
+    return linhas
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+def conectar(caminho):
+    return banco.duckdb.connect(banco.caminho_banco(caminho))
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('caminho', nargs='?', help='train.csv a medir (padrão: gera um sintético)')
+    parser.add_argument('--linhas', type=int, default=200_000, help='linhas do dataset sintético')
+    parser.add_argument('--dias', type=int, default=DIAS, help='datas distintas do dataset sintético')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not banco.disponivel():
+        parser.error('duckdb não está instalado')
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'train.csv')
+        if args.caminho is None:
+            gerar_csv(caminho, args.linhas, dias=args.dias)
+        else:
+            shutil.copyfile(args.caminho, caminho)
+
+        tempo_memoria, memoria = cronometrar(lambda: montar_agregados(clean_code(ler_csv(caminho))))
+        with conectar(caminho) as conexao:
+            tempo_banco, _ = cronometrar(lambda: banco.atualizar(conexao, caminho))
+        tempo_reabrir, consultado = cronometrar(lambda: banco.Banco(conectar(caminho), None))
+
+        print('{}: {:.1f} MB'.format(caminho, os.path.getsize(caminho) / 2**20))
+        print('carga fria em memória (ler, limpar, agregar): {:8.1f} ms'.format(1000 * tempo_memoria))
+        print('carga fria do banco (ler, limpar, gravar):    {:8.1f} ms'.format(1000 * tempo_banco))
+        print('reabertura do banco montado:                  {:8.1f} ms'.format(1000 * tempo_reabrir))
+        print('tamanho do banco: {:.1f} MB'.format(os.path.getsize(banco.caminho_banco(caminho)) / 2**20))
+
+        medicoes = [
+            ('Consulta (todas as tabelas)', lambda filtrados: [filtrados[nome] for nome in TABELAS]),
+            ('Agregações finais (todas)',
+             lambda filtrados: [funcao(filtrados) for _, funcao in AGREGACOES_FINAIS]),
+        ]
+        for titulo, consultar in medicoes:
+            print('\n{:<36} {:>14} {:>14}'.format(titulo, 'memória (ms)', 'banco (ms)'))
+            for descricao, tempo_memoria, tempo_banco in tempos(memoria, consultado, consultar, args.repeticoes):
+                print('{:<36} {:>14.1f} {:>14.1f}'.format(descricao, 1000 * tempo_memoria, 1000 * tempo_banco))
+
+        erros = diferencas(memoria, consultado)
+        consultado.conexao.close()
+
+        #linhas novas no final do CSV: o banco só ingere o que falta
+        linhas = open(caminho, encoding='utf-8').read().splitlines(keepends=True)
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.writelines(linhas[1:1 + max(1, len(linhas) // 10)])
+        with conectar(caminho) as conexao:
+            tempo_incremento, lidos = cronometrar(lambda: banco.atualizar(conexao, caminho))
+        print('\natualização incremental ({:.1f} MB novos): {:.1f} ms'.format(lidos / 2**20,
+                                                                          1000 * tempo_incremento))
+
+        consultado = banco.Banco(conectar(caminho), None)
+        erros += diferencas(montar_agregados(clean_code(ler_csv(caminho))), consultado)
+        consultado.conexao.close()
+
+    for descricao, nome, mensagem in erros:
+        print('\nDIFERENÇA em {} ({}):\n{}'.format(nome, descricao, mensagem))
+    print('\nparidade: {}'.format('ok' if not erros else '{} tabelas diferentes'.format(len(erros))))
+
+    return 1 if erros else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
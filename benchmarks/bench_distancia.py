@@ -0,0 +1,85 @@
+""" Benchmark e precisão da distância haversine vetorizada frente ao geopy.distance.geodesic.
+
+    Gera pares de coordenadas aleatórios na região do dataset (Índia), mede o
+    tempo do haversine vetorizado para N pares (1.000.000 por padrão) e o do
+    apply linha a linha com geodesic em uma amostra, e compara os resultados.
+
+    Uso:
+        python benchmarks/bench_distancia.py [--linhas 1000000] [--amostra 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from namasfood.distancia import distancia_entregas
+
+def gerar_pares(linhas, semente=0):
+
+    """ Restaurantes espalhados pela Índia e entregas a até ~0,3 grau de distância. """
+
+    rng = np.random.default_rng(semente)
+    lat = rng.uniform(9, 31, linhas)
+    lon = rng.uniform(72, 89, linhas)
+
+    return pd.DataFrame({
+        'Restaurant_latitude': lat,
+        'Restaurant_longitude': lon,
+        'Delivery_location_latitude': lat + rng.uniform(-0.3, 0.3, linhas),
+        'Delivery_location_longitude': lon + rng.uniform(-0.3, 0.3, linhas),
+    })
+
+def distancia_geodesic(df1):
+
+    """ Cálculo original (comentado na página de restaurantes), linha a linha com geopy. """
+
+    import geopy.distance
+
+    return df1.apply(lambda x: geopy.distance.geodesic(
+                        (x['Restaurant_latitude'], x['Restaurant_longitude']),
+                        (x['Delivery_location_latitude'], x['Delivery_location_longitude'])).km, axis=1).to_numpy()
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--amostra', type=int, default=5000, help='linhas comparadas com o geodesic')
+    args = parser.parse_args(argv)
+
+    df1 = gerar_pares(args.linhas)
+
+    inicio = time.perf_counter()
+    distancias = distancia_entregas(df1)
+    segundos = time.perf_counter() - inicio
+    print('haversine vetorizado: {:,} linhas em {:.3f} s ({:,.0f} linhas/s)'.format(
+        args.linhas, segundos, args.linhas / segundos))
+
+    try:
+        import geopy  # noqa: F401
+    except ImportError:
+        print('geopy não instalado: comparação com o geodesic ignorada')
+        return
+
+    amostra = df1.head(args.amostra)
+    inicio = time.perf_counter()
+    referencia = distancia_geodesic(amostra)
+    segundos_geodesic = time.perf_counter() - inicio
+    estimativa = segundos_geodesic * args.linhas / len(amostra)
+    print('geodesic (apply):     {:,} linhas em {:.3f} s (estimado {:.1f} s para {:,} linhas, {:.0f}x mais lento)'.format(
+        len(amostra), segundos_geodesic, estimativa, args.linhas, estimativa / segundos))
+
+    erro_abs = np.abs(distancias[:len(amostra)] - referencia)
+    erro_rel = erro_abs / referencia
+    print('erro absoluto: médio {:.4f} km, máximo {:.4f} km'.format(erro_abs.mean(), erro_abs.max()))
+    print('erro relativo: médio {:.3%}, máximo {:.3%}'.format(erro_rel.mean(), erro_rel.max()))
+    print('distância média: haversine {:.4f} km, geodesic {:.4f} km'.format(
+        distancias[:len(amostra)].mean(), referencia.mean()))
+
+if __name__ == '__main__':
+    main()
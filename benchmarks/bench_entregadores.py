@@ -0,0 +1,92 @@
+""" Escalonamento das agregações por entregador com 1 a N processos (NAMASFOOD_TRABALHADORES).
+
+    Gera uma tabela entregadores sintética, no formato dos agregados (uma linha por
+    dia x cidade x trânsito x clima x entregador), e mede avaliação por entregador,
+    avaliação por trânsito e o ranking de entregadores com cada quantidade de
+    trabalhadores. O pool é aquecido antes das medições e encerrado antes de
+    criar o da quantidade seguinte (um pool só é criado sem outras threads no
+    processo; ver namasfood.paralelo).
+
+    Uso:
+        python benchmarks/bench_entregadores.py [--linhas 2_000_000] [--entregadores 200_000]
+                                                [--maximo 4] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from namasfood import paralelo
+from namasfood.entregadores import avaliacao_por, avaliacao_por_entregador, extremos_entregadores
+
+def gerar_entregadores(linhas, entregadores, semente=0):
+
+    """ Tabela entregadores sintética com as colunas e tipos dos agregados. """
+
+    rng = np.random.default_rng(semente)
+    avaliacoes = rng.integers(0, 4, linhas)
+    pedidos = avaliacoes + rng.integers(0, 2, linhas)
+
+    return pd.DataFrame({
+        'Order_Date': pd.Timestamp('2022-02-11') + pd.to_timedelta(rng.integers(0, 55, linhas), unit='D'),
+        'City': pd.Categorical.from_codes(rng.integers(0, 3, linhas), ['Metropolitian', 'Semi-Urban', 'Urban']),
+        'Road_traffic_density': pd.Categorical.from_codes(rng.integers(0, 4, linhas),
+                                                          ['High', 'Jam', 'Low', 'Medium']),
+        'Weatherconditions': pd.Categorical.from_codes(rng.integers(0, 6, linhas),
+                                                       ['Cloudy', 'Fog', 'Sandstorm', 'Stormy', 'Sunny', 'Windy']),
+        'Delivery_person_ID': pd.Series(rng.integers(0, entregadores, linhas)).map('RES{:06d}DEL01'.format),
+        'pedidos': pedidos,
+        'soma_tempo': pedidos * rng.integers(10, 55, linhas),
+        'avaliacoes': avaliacoes,
+        'media_avaliacao': np.where(avaliacoes > 0, rng.uniform(2.5, 5, linhas).round(1), 0.0),
+        'm2_avaliacao': np.where(avaliacoes > 1, rng.uniform(0, 1, linhas), 0.0),
+    })
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=2_000_000)
+    parser.add_argument('--entregadores', type=int, default=200_000)
+    parser.add_argument('--maximo', type=int, default=os.cpu_count(), help='maior quantidade de trabalhadores')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    tabela = gerar_entregadores(args.linhas, args.entregadores)
+    print('{} linhas, {} entregadores, {} núcleos disponíveis'.format(
+        len(tabela), tabela['Delivery_person_ID'].nunique(), os.cpu_count()))
+
+    casos = {
+        'avaliacao_por_entregador': lambda n: avaliacao_por_entregador(tabela, trabalhadores=n),
+        'avaliacao_por(trânsito)': lambda n: avaliacao_por(tabela, 'Road_traffic_density', trabalhadores=n),
+        'extremos_entregadores': lambda n: extremos_entregadores(tabela, 10, trabalhadores=n),
+    }
+
+    tempos = {}
+    for trabalhadores in range(1, args.maximo + 1):
+        for nome, caso in casos.items():
+            caso(trabalhadores)
+            tempos[nome, trabalhadores] = medir(lambda: caso(trabalhadores), args.repeticoes)
+        paralelo.encerrar()
+
+    print('{:<26} {:>6} {:>10} {:>9}'.format('Agregação', 'proc.', 'tempo (s)', 'ganho'))
+    for nome in casos:
+        for trabalhadores in range(1, args.maximo + 1):
+            tempo = tempos[nome, trabalhadores]
+            print('{:<26} {:>6} {:>10.3f} {:>8.2f}x'.format(nome, trabalhadores, tempo, tempos[nome, 1] / tempo))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+""" Tamanho e custo de serialização do gráfico diário de pedidos conforme o histórico cresce.
+
+    Para históricos de semanas a anos (um ponto por dia), monta o gráfico de
+    qtde_pedidos_dia com e sem a redução LTTB (namasfood.graficos) e mede:
+        - o tempo da redução;
+        - o tempo de to_dict + to_json, o que o st.plotly_chart faz a cada rerun;
+        - o tamanho do JSON enviado ao navegador.
+
+    Uso:
+        python benchmarks/bench_graficos.py [--dias 56 365 1095 3650 10950] [--pontos 1500]
+                                            [--repeticoes 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from namasfood.graficos import reduzir_serie
+
+def serie_diaria(dias, semente=0):
+
+    """ Pedidos por dia com sazonalidade semanal e picos ocasionais, no formato de contar_pedidos. """
+
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range('2022-02-11', periods=dias).astype('datetime64[us]')
+    pedidos = 800 + 150 * np.sin(np.arange(dias) * 2 * np.pi / 7) + rng.normal(0, 40, dias)
+    pedidos[rng.random(dias) < 0.01] *= 3
+
+    return pd.DataFrame({'Order_Date': datas, 'ID': pedidos.round().astype('int64')})
+
+def menor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', type=int, nargs='+', default=[56, 365, 3 * 365, 10 * 365, 30 * 365])
+    parser.add_argument('--pontos', type=int, default=1500, help='orçamento de pontos do LTTB')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print('{:>7} {:>10} {:>7} {:>11} {:>15} {:>11}'.format(
+        'dias', 'modo', 'pontos', 'redução ms', 'serialização ms', 'JSON (KB)'))
+
+    for dias in args.dias:
+        df_aux = serie_diaria(dias)
+        for modo, limite in (('completo', dias), ('LTTB', args.pontos)):
+            reducao, reduzido = menor_tempo(lambda: reduzir_serie(df_aux, 'Order_Date', 'ID', limite),
+                                            args.repeticoes)
+            fig = px.bar(reduzido, x='Order_Date', y='ID')
+            serializacao, spec = menor_tempo(lambda: pio.to_json(fig.to_dict(), validate=False),
+                                             args.repeticoes)
+            print('{:>7} {:>10} {:>7} {:>11.2f} {:>15.2f} {:>11.1f}'.format(
+                dias, modo, len(reduzido), 1000 * reducao, 1000 * serializacao, len(spec) / 1024))
+
+if __name__ == '__main__':
+    main()
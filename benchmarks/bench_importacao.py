@@ -0,0 +1,113 @@
+""" Tempo de import de cada página do dashboard (python -X importtime).
+
+    Para cada script (Home.py e pages/*.py), executa num interpretador novo só os
+    imports do nível do módulo, como numa carga fria da página ou no reinício de
+    um trabalhador, e soma o tempo acumulado dos módulos de topo informado pelo
+    -X importtime. Os módulos que o interpretador já importa sozinho (python -c
+    pass) ficam de fora. Imports adiados para dentro das funções (plotly nas
+    funções de gráfico, folium em namasfood.mapa) não entram na conta: só pesam
+    quando a função roda de fato.
+
+    O tempo de cada página é o menor de N execuções. Com --orcamento, o script
+    termina com código 1 se alguma página passar do orçamento, para ser usado
+    como verificação antes de um deploy.
+
+    Uso:
+        python benchmarks/bench_importacao.py [pages/1_visao_empresa.py ...] [--repeticoes 5]
+                                              [--detalhes 8] [--orcamento 1500]
+"""
+
+import argparse
+import ast
+import glob
+import os
+import re
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# linha do -X importtime: "import time: <self us> | <acumulado us> | <indentação><módulo>"
+LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def imports_da_pagina(arquivo):
+
+    """ Código com apenas os imports do nível do módulo de uma página.
+
+        Input: caminho do arquivo da página
+        Output: código-fonte com os imports, na ordem do arquivo
+    """
+
+    with open(arquivo, encoding='utf-8') as fonte:
+        modulo = ast.parse(fonte.read(), arquivo)
+
+    return '\n'.join(ast.unparse(no) for no in modulo.body if isinstance(no, (ast.Import, ast.ImportFrom)))
+
+def tempos_de_import(codigo):
+
+    """ Executa o código num interpretador novo com -X importtime.
+
+        Input: código-fonte
+        Output: dicionário módulo de topo -> tempo acumulado em microssegundos
+    """
+
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=RAIZ,
+                              capture_output=True, text=True, check=True)
+
+    tempos = {}
+    for linha in processo.stderr.splitlines():
+        casamento = LINHA.match(linha)
+        #só os módulos de topo: o acumulado deles já inclui os submódulos
+        if casamento and casamento.group(3) == ' ':
+            tempos[casamento.group(4)] = int(casamento.group(2))
+
+    return tempos
+
+def medir_pagina(arquivo, repeticoes, ja_importados):
+
+    """ Menor tempo total de import da página em N execuções.
+
+        Output: tupla (total em ms, dicionário módulo -> ms da execução mais rápida)
+    """
+
+    codigo = imports_da_pagina(arquivo)
+    melhor = None
+    for _ in range(repeticoes):
+        tempos = {modulo: us / 1000 for modulo, us in tempos_de_import(codigo).items()
+                  if modulo not in ja_importados}
+        total = sum(tempos.values())
+        if melhor is None or total < melhor[0]:
+            melhor = (total, tempos)
+
+    return melhor
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paginas', nargs='*', help='scripts a medir (padrão: Home.py e pages/*.py)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--detalhes', type=int, default=8, help='módulos mais caros listados por página')
+    parser.add_argument('--orcamento', type=float, help='tempo máximo de import por página, em ms')
+    args = parser.parse_args(argv)
+
+    paginas = args.paginas or [os.path.join(RAIZ, 'Home.py')] + sorted(glob.glob(os.path.join(RAIZ, 'pages', '*.py')))
+    ja_importados = set(tempos_de_import('pass'))
+
+    acima = []
+    for pagina in paginas:
+        total, tempos = medir_pagina(os.path.abspath(pagina), args.repeticoes, ja_importados)
+        print('{:<40} {:>9.1f} ms'.format(os.path.relpath(pagina, RAIZ), total))
+        for modulo, ms in sorted(tempos.items(), key=lambda item: -item[1])[:args.detalhes]:
+            print('    {:<36} {:>9.1f} ms'.format(modulo, ms))
+        if args.orcamento is not None and total > args.orcamento:
+            acima.append(pagina)
+
+    if acima:
+        print('acima do orçamento de {:.0f} ms: {}'.format(
+            args.orcamento, ', '.join(os.path.relpath(pagina, RAIZ) for pagina in acima)))
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+""" Benchmark da leitura + limpeza do dataset: versão original x versão vetorizada.
+
+    O train.csv é replicado N vezes (100 por padrão) em um arquivo temporário e
+    os dois pipelines são medidos em tempo de parede e pico de memória
+    (tracemalloc).
+
+    Uso:
+        python benchmarks/bench_limpeza.py [caminho/do/train.csv] [--fator 100]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from namasfood.dados import CAMINHO_DATASET, clean_code, ler_csv
+
+def clean_code_original(df):
+
+    """ Cópia da limpeza original das páginas, mantida apenas como referência de comparação. """
+
+    df1 = df[df['Delivery_person_Age'] != 'NaN '].copy()
+    df1 = df1[df1['City'] != 'NaN '].copy()
+    df1 = df1[df1['Road_traffic_density'] != 'NaN '].copy()
+    df1 = df1[df1['Festival'] != 'NaN '].copy()
+    df1 = df1[df1['multiple_deliveries'] != 'NaN '].copy()
+    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
+    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    df1['Time_Orderd'] = pd.to_datetime(df1['Time_Orderd']).dt.time
+    df1['Time_Order_picked'] = pd.to_datetime(df1['Time_Order_picked'], format='%H:%M:%S')
+    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
+    df1 = df1.reset_index(drop=True)
+    for col in ['ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
+                'Type_of_vehicle', 'Festival', 'City']:
+        df1.loc[:, col] = df1.loc[:, col].str.strip()
+    df1['Weatherconditions'] = df1['Weatherconditions'].str.strip('conditions ')
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip('(min) ').astype(int)
+
+    return df1
+
+def pipeline_original(caminho):
+    df = pd.read_csv(caminho)
+    df1 = df.copy()
+    return clean_code_original(df1)
+
+def pipeline_vetorizado(caminho):
+    return clean_code(ler_csv(caminho))
+
+def replicar_csv(caminho, fator, destino):
+
+    """ Grava em destino o CSV com o corpo repetido fator vezes. """
+
+    with open(caminho, encoding='utf-8') as f:
+        cabecalho = f.readline()
+        corpo = f.read()
+
+    if not corpo.endswith('\n'):
+        corpo += '\n'
+
+    with open(destino, 'w', encoding='utf-8') as f:
+        f.write(cabecalho)
+        for _ in range(fator):
+            f.write(corpo)
+
+def medir(funcao, caminho):
+
+    """ Executa funcao(caminho) e devolve (segundos, pico de memória em MB, linhas).
+
+        O tempo e a memória são medidos em execuções separadas, porque o
+        tracemalloc deixa a execução bem mais lenta.
+    """
+
+    inicio = time.perf_counter()
+    df1 = funcao(caminho)
+    segundos = time.perf_counter() - inicio
+    del df1
+
+    tracemalloc.start()
+    df1 = funcao(caminho)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return segundos, pico / 2**20, len(df1)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('caminho', nargs='?', default=CAMINHO_DATASET)
+    parser.add_argument('--fator', type=int, default=100, help='quantas vezes replicar o dataset')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'train_x{}.csv'.format(args.fator))
+        replicar_csv(args.caminho, args.fator, caminho)
+        print('Dataset replicado {}x: {:.1f} MB'.format(args.fator, os.path.getsize(caminho) / 2**20))
+
+        resultados = {}
+        for nome, funcao in [('original', pipeline_original), ('vetorizado', pipeline_vetorizado)]:
+            resultados[nome] = medir(funcao, caminho)
+            segundos, pico, linhas = resultados[nome]
+            print('{:<12} {:>8.2f} s {:>10.1f} MB pico {:>12,} linhas'.format(nome, segundos, pico, linhas))
+
+    tempo_antes, memoria_antes, _ = resultados['original']
+    tempo_depois, memoria_depois, _ = resultados['vetorizado']
+    print('Ganho: {:.1f}x em tempo, {:.1f}x em pico de memória'.format(
+        tempo_antes / tempo_depois, memoria_antes / memoria_depois))
+
+if __name__ == '__main__':
+    main()
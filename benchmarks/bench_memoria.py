@@ -0,0 +1,53 @@
+""" Relatório de memória do dataframe limpo por sessão: antes x depois dos tipos compactos.
+
+    Antes: cada sessão guardava o CSV bruto (df) mais a cópia limpa em tipos
+    object/int64/float64 (df1). Depois: um único dataframe compacto (category,
+    int8/int16, float32) compartilhado pelo processo.
+
+    Uso:
+        python benchmarks/bench_memoria.py [caminho/do/train.csv] [--fator 1] [--sessoes 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_limpeza import clean_code_original, replicar_csv
+from namasfood.dados import CAMINHO_DATASET, clean_code, ler_csv
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('caminho', nargs='?', default=CAMINHO_DATASET)
+    parser.add_argument('--fator', type=int, default=1, help='quantas vezes replicar o dataset')
+    parser.add_argument('--sessoes', type=int, default=4, help='sessões simultâneas por pod')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = args.caminho
+        if args.fator > 1:
+            caminho = os.path.join(pasta, 'train_x{}.csv'.format(args.fator))
+            replicar_csv(args.caminho, args.fator, caminho)
+
+        df = pd.read_csv(caminho)
+        df1 = clean_code_original(df.copy())
+        bruto, limpo = megabytes(df), megabytes(df1)
+        del df, df1
+
+        compacto = megabytes(clean_code(ler_csv(caminho)))
+
+    print('Antes, por sessão:  {:8.1f} MB (bruto {:.1f} MB + limpo {:.1f} MB)'.format(bruto + limpo, bruto, limpo))
+    print('Depois, por sessão: {:8.1f} MB (compacto, somente leitura)'.format(compacto))
+    print('{} sessões antes:    {:8.1f} MB'.format(args.sessoes, args.sessoes * (bruto + limpo)))
+    print('{} sessões depois:   {:8.1f} MB (um único dataframe compartilhado pelo processo)'.format(args.sessoes, compacto))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+""" Tempo e memória de cada etapa do dashboard: carga, limpeza, agregação, filtros e páginas.
+
+    Mede, sobre um train.csv sintético (gerar_dataset.py) ou um arquivo informado:
+        - leitura do CSV (ler_csv), clean_code e montagem dos agregados;
+        - filtros da barra lateral (todas as tabelas);
+        - cada função de agregação/figura das três páginas, chamada sem o cache
+          (memoizar) e com os filtros padrão das páginas.
+
+    As funções das páginas são lidas dos arquivos em pages/ sem executar o
+    Streamlit: só os imports e as definições de função de cada página são
+    executados. O tempo é o menor de N repetições; a memória é o pico alocado
+    durante a etapa (tracemalloc), medido numa execução à parte.
+
+    Uso:
+        python benchmarks/bench_paginas.py [caminho/do/train.csv] [--linhas 1_000_000]
+                                           [--repeticoes 3] [--sem-memoria]
+"""
+
+import argparse
+import ast
+import inspect
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerar_dataset import DIAS, gerar_csv
+from namasfood.agregados import filtrar_agregados, montar_agregados
+from namasfood.dados import clean_code, ler_csv
+from namasfood.metricas import metricas_restaurantes
+
+# filtros padrão da barra lateral (nada filtrado)
+DATA_LIMITE = datetime(2022, 4, 6)
+TRANSITOS = ['Low', 'Medium', 'High', 'Jam']
+CLIMAS = ['Sunny', 'Stormy', 'Sandstorm', 'Cloudy', 'Fog', 'Windy']
+
+def funcoes_da_pagina(arquivo):
+
+    """ Executa só os imports e as definições de função de uma página e retorna as funções.
+
+        As funções decoradas com memoizar/medir são devolvidas sem os decoradores
+        (inspect.unwrap).
+
+        Input: caminho do arquivo da página
+        Output: dicionário nome -> função
+    """
+
+    with open(arquivo, encoding='utf-8') as fonte:
+        modulo = ast.parse(fonte.read(), arquivo)
+
+    modulo.body = [no for no in modulo.body
+                   if isinstance(no, (ast.Import, ast.ImportFrom, ast.FunctionDef))]
+    espaco = {'__name__': 'bench_' + os.path.basename(arquivo)}
+    exec(compile(modulo, arquivo, 'exec'), espaco)
+
+    funcoes = {nome: inspect.unwrap(funcao) for nome, funcao in espaco.items()
+               if callable(funcao) and hasattr(funcao, '__code__')}
+
+    return {nome: funcao for nome, funcao in funcoes.items() if funcao.__code__.co_filename == arquivo}
+
+def medir_tempo(etapa, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = etapa()
+        tempos.append(time.perf_counter() - inicio)
+        del resultado
+    return min(tempos)
+
+def medir_memoria(etapa):
+    tracemalloc.start()
+    try:
+        resultado = etapa()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del resultado
+    return pico
+
+def etapas(caminho):
+
+    """ Lista (nome, função sem argumentos) de todas as etapas, na ordem do dashboard. """
+
+    pagina1 = funcoes_da_pagina(os.path.join(RAIZ, 'pages', '1_visao_empresa.py'))
+    pagina2 = funcoes_da_pagina(os.path.join(RAIZ, 'pages', '2_visao_entregadores.py'))
+    pagina3 = funcoes_da_pagina(os.path.join(RAIZ, 'pages', '3_visao_restaurantes.py'))
+
+    bruto = ler_csv(caminho)
+    df1 = clean_code(bruto.copy())
+    agregados = montar_agregados(df1)
+
+    def filtrar(weather_selection=None):
+        filtrados = filtrar_agregados(agregados, DATA_LIMITE, TRANSITOS, weather_selection)
+        for nome in agregados:
+            filtrados[nome]
+        return filtrados
+
+    empresa = filtrar()
+    demais = filtrar(CLIMAS)
+
+    lista = [
+        ('carga: ler_csv', lambda: ler_csv(caminho)),
+        ('carga: clean_code', lambda: clean_code(bruto.copy())),
+        ('carga: montar_agregados', lambda: montar_agregados(df1)),
+        ('filtros: trânsito', filtrar),
+        ('filtros: trânsito e clima', lambda: filtrar(CLIMAS)),
+    ]
+
+    lista += [('empresa: ' + nome, lambda f=f: f(empresa['cubo']))
+              for nome, f in pagina1.items() if nome not in ('media_pedidos_entregador_semana',
+                                                             'mapa_central_trafego', 'mapa_calor_entregas')]
+    lista += [
+        ('empresa: media_pedidos_entregador_semana',
+         lambda: pagina1['media_pedidos_entregador_semana'](empresa)),
+        ('empresa: mapa_central_trafego', lambda: pagina1['mapa_central_trafego'](empresa)),
+        ('empresa: mapa_calor_entregas', lambda: pagina1['mapa_calor_entregas'](empresa['pontos'])),
+        ('entregadores: top_entregadores', lambda: pagina2['top_entregadores'](demais, 10)),
+        ('entregadores: avaliacao_media_entregador', lambda: pagina2['avaliacao_media_entregador'](demais)),
+        ('entregadores: avaliacao_media_std(trânsito)',
+         lambda: pagina2['avaliacao_media_std'](demais, 'Road_traffic_density')),
+        ('entregadores: avaliacao_media_std(clima)',
+         lambda: pagina2['avaliacao_media_std'](demais, 'Weatherconditions')),
+        ('restaurantes: metricas_restaurantes', lambda: inspect.unwrap(metricas_restaurantes)(demais)),
+    ]
+    lista += [('restaurantes: ' + nome, lambda f=f: f(demais['cubo'])) for nome, f in pagina3.items()]
+
+    return lista, len(df1)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('caminho', nargs='?', help='train.csv a medir (padrão: gera um sintético)')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='linhas do dataset sintético')
+    parser.add_argument('--dias', type=int, default=DIAS, help='datas distintas do dataset sintético')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--sem-memoria', action='store_true', help='não mede o pico de memória')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = args.caminho
+        if caminho is None:
+            caminho = gerar_csv(os.path.join(pasta, 'train.csv'), args.linhas, dias=args.dias)
+
+        lista, linhas = etapas(caminho)
+        print('{}: {} linhas limpas, {:.1f} MB'.format(caminho, linhas, os.path.getsize(caminho) / 2**20))
+        print('{:<48} {:>11} {:>11}'.format('Etapa', 'tempo (ms)', 'pico (MB)'))
+
+        for nome, etapa in lista:
+            tempo = medir_tempo(etapa, args.repeticoes)
+            pico = '-' if args.sem_memoria else '{:.1f}'.format(medir_memoria(etapa) / 2**20)
+            print('{:<48} {:>11.1f} {:>11}'.format(nome, 1000 * tempo, pico))
+
+if __name__ == '__main__':
+    main()
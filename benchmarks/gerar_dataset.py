@@ -0,0 +1,164 @@
+""" Gerador de um train.csv sintético, com as mesmas colunas e manias do dataset bruto.
+
+    Reproduz o que clean_code() precisa tratar:
+        - valores ausentes escritos como 'NaN ' (idade, avaliação, horário do pedido,
+          trânsito, entregas múltiplas, festival e cidade; idade/avaliação/horário
+          ausentes na mesma linha, como no original);
+        - Weatherconditions com o prefixo 'conditions ' (inclusive 'conditions NaN'
+          e o plural 'conditions Sandstorms', como no original);
+        - Time_taken(min) com o prefixo '(min) ';
+        - textos com espaço no final (ID, Delivery_person_ID e as colunas categóricas).
+
+    Os restaurantes ficam agrupados em cidades, com coordenadas fixas por restaurante,
+    e cada entregador pertence a um restaurante (ex.: 'INDORES13DEL02 '). O arquivo
+    é escrito em blocos, então dezenas de milhões de linhas não precisam caber em
+    memória. As datas vão de 11/02/2022 em diante, por `dias` dias (55 por padrão,
+    até 06/04/2022, como no original); mais dias espalham os pedidos por mais datas.
+
+    Uso:
+        python benchmarks/gerar_dataset.py destino.csv [--linhas 1_000_000] [--bloco 1_000_000]
+                                                       [--semente 0] [--dias 55]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# código da cidade no ID do entregador -> (latitude, longitude) aproximadas
+CIDADES = {
+    'INDO': (22.72, 75.86), 'BANG': (12.97, 77.59), 'COIMB': (11.02, 76.96), 'CHEN': (13.08, 80.27),
+    'HYD': (17.39, 78.49), 'RANCHI': (23.34, 85.31), 'MYS': (12.30, 76.64), 'DEH': (30.32, 78.03),
+    'KOC': (9.93, 76.27), 'PUNE': (18.52, 73.86), 'LUDH': (30.90, 75.86), 'KNP': (26.45, 80.33),
+    'MUM': (19.08, 72.88), 'KOL': (22.57, 88.36), 'JAP': (26.91, 75.79), 'SUR': (21.17, 72.83),
+    'GOA': (15.50, 73.83), 'AURG': (19.88, 75.34), 'AGR': (27.18, 78.01), 'VAD': (22.31, 73.18),
+    'ALH': (25.44, 81.85), 'BHP': (23.26, 77.41),
+}
+
+RESTAURANTES_POR_CIDADE = 20
+ENTREGADORES_POR_RESTAURANTE = 3
+
+# primeira data dos pedidos e quantidade padrão de dias (11/02/2022 a 06/04/2022, como no original)
+INICIO = '2022-02-11'
+DIAS = 55
+
+# datas e horários têm poucos valores distintos: formatados uma vez e indexados por código
+DATAS = pd.date_range(INICIO, periods=DIAS).strftime('%d-%m-%Y').to_numpy(dtype=object)
+HORARIOS = np.array(['{:02d}:{:02d}:00'.format(m // 60, m % 60) for m in range(24 * 60)], dtype=object)
+# valores brutos de Weatherconditions (clean_code tira o prefixo e o 's' final de 'Sandstorms')
+CLIMAS = ['conditions Sunny', 'conditions Stormy', 'conditions Sandstorms', 'conditions Cloudy',
+          'conditions Fog', 'conditions Windy']
+TRANSITOS = ['Low ', 'Medium ', 'High ', 'Jam ']
+TIPOS_PEDIDO = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEICULOS = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+TIPOS_CIDADE = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+
+# proporção de 'NaN ' em cada coluna (a idade define também avaliação e horário)
+AUSENTES = {'Delivery_person_Age': 0.04, 'Road_traffic_density': 0.01, 'multiple_deliveries': 0.02,
+            'Festival': 0.005, 'City': 0.025}
+CLIMA_AUSENTE = 0.01
+
+def _restaurantes(semente):
+
+    """ Coordenadas fixas e prefixo de ID de cada restaurante sintético. """
+
+    rng = np.random.default_rng(semente)
+    codigos = list(CIDADES)
+    cidade = np.repeat(np.arange(len(codigos)), RESTAURANTES_POR_CIDADE)
+    centro = np.array([CIDADES[c] for c in codigos])[cidade]
+    coordenadas = (centro + rng.uniform(-0.15, 0.15, centro.shape)).round(6)
+    numero = np.tile(np.arange(1, RESTAURANTES_POR_CIDADE + 1), len(codigos))
+    prefixos = np.array(['{}RES{:02d}'.format(codigos[c], n) for c, n in zip(cidade, numero)], dtype=object)
+
+    return coordenadas, prefixos
+
+def _com_ausentes(rng, valores, proporcao, mascara=None):
+    valores = np.asarray(valores, dtype=object)
+    mascara = rng.random(len(valores)) < proporcao if mascara is None else mascara
+    valores[mascara] = 'NaN '
+    return valores
+
+def gerar_bloco(rng, inicio, linhas, coordenadas, prefixos, datas=DATAS):
+
+    """ Um bloco de linhas no formato bruto do train.csv.
+
+        Input: gerador aleatório, número da primeira linha (para o ID), quantidade de
+               linhas, a tabela de restaurantes de _restaurantes() e as datas possíveis
+        Output: Dataframe com as colunas do train.csv, todas como texto ou número
+    """
+
+    restaurante = rng.integers(0, len(prefixos), linhas)
+    entregador = rng.integers(1, ENTREGADORES_POR_RESTAURANTE + 1, linhas)
+    restaurante_lat, restaurante_lon = coordenadas[restaurante].T
+    sem_entregador = rng.random(linhas) < AUSENTES['Delivery_person_Age']
+
+    pedido = rng.integers(0, 24 * 4, linhas) * 15
+    coleta = (pedido + rng.choice([5, 10, 15], linhas)) % (24 * 60)
+
+    climas = np.array(CLIMAS, dtype=object)[rng.integers(0, len(CLIMAS), linhas)]
+    climas[rng.random(linhas) < CLIMA_AUSENTE] = 'conditions NaN'
+
+    return pd.DataFrame({
+        'ID': pd.Series(np.arange(inicio, inicio + linhas)).map('0x{:04x} '.format),
+        'Delivery_person_ID': prefixos[restaurante] + pd.Series(entregador).map('DEL{:02d} '.format).to_numpy(),
+        'Delivery_person_Age': _com_ausentes(rng, rng.integers(20, 40, linhas).astype(str), 0, sem_entregador),
+        'Delivery_person_Ratings': _com_ausentes(rng, rng.uniform(2.5, 5, linhas).round(1).astype(str), 0,
+                                                 sem_entregador),
+        'Restaurant_latitude': restaurante_lat,
+        'Restaurant_longitude': restaurante_lon,
+        'Delivery_location_latitude': (restaurante_lat + rng.uniform(-0.1, 0.1, linhas)).round(6),
+        'Delivery_location_longitude': (restaurante_lon + rng.uniform(-0.1, 0.1, linhas)).round(6),
+        'Order_Date': datas[rng.integers(0, len(datas), linhas)],
+        'Time_Orderd': _com_ausentes(rng, HORARIOS[pedido], 0, sem_entregador),
+        'Time_Order_picked': HORARIOS[coleta],
+        'Weatherconditions': climas,
+        'Road_traffic_density': _com_ausentes(rng, rng.choice(TRANSITOS, linhas), AUSENTES['Road_traffic_density']),
+        'Vehicle_condition': rng.integers(0, 4, linhas),
+        'Type_of_order': rng.choice(TIPOS_PEDIDO, linhas),
+        'Type_of_vehicle': rng.choice(VEICULOS, linhas),
+        'multiple_deliveries': _com_ausentes(rng, rng.integers(0, 4, linhas).astype(str),
+                                             AUSENTES['multiple_deliveries']),
+        'Festival': _com_ausentes(rng, rng.choice(['No ', 'Yes '], linhas, p=[0.98, 0.02]), AUSENTES['Festival']),
+        'City': _com_ausentes(rng, rng.choice(TIPOS_CIDADE, linhas, p=[0.75, 0.22, 0.03]), AUSENTES['City']),
+        'Time_taken(min)': '(min) ' + pd.Series(rng.integers(10, 55, linhas)).astype(str).to_numpy(dtype=object),
+    })
+
+def gerar_csv(destino, linhas, bloco=1_000_000, semente=0, dias=DIAS):
+
+    """ Escreve um train.csv sintético com `linhas` linhas, bloco a bloco.
+
+        Input: caminho de destino, quantidade de linhas, linhas por bloco, semente e
+               quantidade de dias a partir de INICIO
+        Output: caminho de destino
+    """
+
+    rng = np.random.default_rng(semente)
+    coordenadas, prefixos = _restaurantes(semente)
+    datas = pd.date_range(INICIO, periods=dias).strftime('%d-%m-%Y').to_numpy(dtype=object)
+
+    with open(destino, 'w', newline='', encoding='utf-8') as arquivo:
+        for inicio in range(0, linhas, bloco):
+            df = gerar_bloco(rng, inicio, min(bloco, linhas - inicio), coordenadas, prefixos, datas)
+            df.to_csv(arquivo, index=False, header=inicio == 0)
+
+    return destino
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('destino')
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--bloco', type=int, default=1_000_000, help='linhas geradas por vez')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--dias', type=int, default=DIAS, help='quantidade de datas distintas dos pedidos')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    gerar_csv(args.destino, args.linhas, args.bloco, args.semente, args.dias)
+    print('{} linhas gravadas em {} ({:.1f} MB, {:.1f} s)'.format(
+        args.linhas, args.destino, os.path.getsize(args.destino) / 2**20, time.perf_counter() - inicio))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+""" Camada compartilhada de dados e agregacoes do dashboard da Namasfood. """
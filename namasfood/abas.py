@@ -0,0 +1,26 @@
+""" Abas com execução preguiçosa para as páginas do Streamlit.
+
+    O st.tabs executa o conteúdo de todas as abas a cada rerun, mesmo as que o
+    usuário não está vendo. Aqui a aba ativa é escolhida por um seletor
+    horizontal e a página executa só o bloco dela; os resultados continuam
+    memoizados por estado dos filtros (ver memo), então voltar a uma aba já
+    vista não recalcula nada.
+
+    Uso:
+        aba = selecionar_aba(['Visão Gerencial', 'Visão Tática'])
+
+        if aba == 'Visão Gerencial':
+            ...
+"""
+
+import streamlit as st
+
+def selecionar_aba(nomes, chave='aba'):
+
+    """ Mostra o seletor de abas e retorna o nome da aba ativa (a primeira por padrão).
+
+        Input: nomes das abas e chave do widget (única na página)
+        Output: nome da aba selecionada
+    """
+
+    return st.radio('Aba', nomes, horizontal=True, key=chave, label_visibility='collapsed')
@@ -0,0 +1,644 @@
+""" Agregados parciais do dataset, usados por todas as visões do dashboard.
+
+    Em vez de reagrupar as linhas do dataset a cada rerun, as páginas consultam
+    um conjunto de tabelas pré-agregadas, todas com as dimensões dos filtros da
+    barra lateral (Order_Date, Road_traffic_density e, quando usada,
+    Weatherconditions):
+
+        cubo          pedidos e média/M2 de Time_taken(min) por
+                      Order_Date x City x Road_traffic_density x Weatherconditions
+                      x Festival x Type_of_order (week_of_year acompanha Order_Date
+                      e não aumenta o número de linhas)
+        entregadores  pedidos, avaliações e tempos por entregador e cidade
+        resumo        idade e condição do veículo (mín./máx.) e soma das distâncias
+        restaurantes  presença de cada Restaurant_ID
+        pontos        histograma 2D das coordenadas de entrega por cidade e
+                      trânsito, para a mediana e o mapa de calor; as coordenadas
+                      são as exatas, exceto no modo blocos (ver RESOLUCAO_COORDENADAS)
+
+    Só cubo e resumo têm tamanho limitado: o número de linhas é o produto das
+    cardinalidades das suas chaves (dias x combinações dos filtros x cidades ou
+    tipos de pedido), pequeno e independente da quantidade de pedidos.
+    entregadores, restaurantes e pontos NÃO são limitados: as chaves incluem o
+    entregador, o restaurante ou a coordenada de entrega, e essas tabelas crescem
+    quase linearmente com os pedidos. Com 300 mil pedidos sintéticos (271 mil
+    depois da limpeza, 38,7 MB de dataframe), entregadores tem 259 mil linhas
+    (19,1 MB), restaurantes 218 mil (4,8 MB) e pontos 271 mil (9,2 MB), e os
+    agregados somam 33,9 MB. Eles evitam reagrupar as linhas a cada rerun, mas não
+    economizam memória em relação ao dataframe; a grade do modo blocos também
+    quase não reduz pontos.
+
+    Todas as medidas são somas, mínimos, máximos ou estatísticas de Welford
+    (n, média, M2; ver estatisticas), então as tabelas de dois pedaços do
+    dataset podem ser combinadas sem voltar às linhas. Isso permite
+    dois modos de carga (variável de ambiente NAMASFOOD_CARGA):
+
+        memoria  (padrão) os agregados são derivados do dataframe limpo em memória
+                 e atualizados com as linhas novas do CSV (ver dados.carregar_derivado)
+        blocos   o CSV é lido em blocos; cada bloco é limpo, agregado e somado ao
+                 acumulado (ver Acumulador) e descartado, então o dataframe completo
+                 nunca fica em memória. O consumo é o dos agregados mais um bloco
+                 (e os agregados crescem com os pedidos, como descrito acima); cada
+                 bloco custa o proporcional ao seu tamanho, não ao do acumulado.
+                 As coordenadas de pontos são agrupadas numa grade, então as medianas
+                 do mapa são aproximadas (ver mediana)
+        compartilhado  os agregados são anexados da memória compartilhada publicada
+                 pelo processo trabalhador (python -m namasfood.compartilhado); sem
+                 trabalhador ativo, cai no modo memoria
+        banco    os pedidos limpos ficam num arquivo DuckDB e cada tabela é uma
+                 consulta com os filtros como predicados (ver banco), assim como as
+                 agregações finais das páginas (agregacao_final); sem duckdb ou
+                 com o arquivo em uso por outro processo, cai no modo memoria
+"""
+
+import functools
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from namasfood import dados
+from namasfood.estatisticas import Estatisticas, combinar_por_grupo
+from namasfood.indice import IndiceFiltros
+from namasfood.instrumentacao import etapa, medir
+from namasfood.restaurantes import contar_restaurantes, estender_restaurantes
+
+MODO_CARGA = os.environ.get('NAMASFOOD_CARGA', 'memoria')
+
+LINHAS_POR_BLOCO = 200_000
+
+# passos por grau na grade das coordenadas de entrega do modo blocos (0,001 grau, ~110 m): lá as
+# coordenadas precisam caber no código das chaves do Acumulador (BITS_CHAVES). A grade é fina o bastante
+# para o mapa de calor, e a mediana fica a no máximo meia célula da exata. Nos demais modos pontos guarda
+# as coordenadas exatas
+RESOLUCAO_COORDENADAS = 1000
+
+DIMENSOES = ['Order_Date', 'week_of_year', 'City', 'Road_traffic_density', 'Weatherconditions', 'Festival',
+             'Type_of_order']
+
+DIMENSOES_FILTRO = ['Order_Date', 'Road_traffic_density', 'Weatherconditions']
+
+DIMENSOES_PONTOS = ['Order_Date', 'City', 'Road_traffic_density', 'latitude', 'longitude']
+
+# tabela -> (colunas de agrupamento, {medida: função de combinação})
+TABELAS = {
+    'cubo': (DIMENSOES, {'pedidos': 'sum'}),
+    'entregadores': (['Order_Date', 'week_of_year', 'City', 'Road_traffic_density', 'Weatherconditions',
+                      'Delivery_person_ID'],
+                     {'pedidos': 'sum', 'soma_tempo': 'sum', 'avaliacoes': 'sum'}),
+    'resumo': (DIMENSOES_FILTRO, {'pedidos': 'sum', 'soma_distancia': 'sum',
+                                  'idade_min': 'min', 'idade_max': 'max',
+                                  'condicao_min': 'min', 'condicao_max': 'max'}),
+    'restaurantes': (DIMENSOES_FILTRO + ['Restaurant_ID'], {'pedidos': 'sum'}),
+    'pontos': (DIMENSOES_PONTOS, {'pedidos': 'sum'}),
+}
+
+# tabela -> estatísticas de Welford (coluna de contagem, coluna da média, coluna do M2);
+# a contagem também aparece em TABELAS, como soma
+ESTATISTICAS = {
+    'cubo': [('pedidos', 'media', 'm2')],
+    'entregadores': [('avaliacoes', 'media_avaliacao', 'm2_avaliacao')],
+}
+
+# bits de cada coluna de agrupamento no código inteiro das chaves usado pelo Acumulador;
+# as colunas categóricas usam BITS_CATEGORICAS e week_of_year acompanha Order_Date
+BITS_CHAVES = {'Order_Date': 16, 'Delivery_person_ID': 24, 'Restaurant_ID': 24, 'latitude': 16, 'longitude': 16}
+BITS_CATEGORICAS = 8
+CHAVES_DEPENDENTES = ['week_of_year']
+
+# como cada função de combinação de TABELAS atualiza o acumulado
+OPERACOES = {'sum': np.add, 'min': np.minimum, 'max': np.maximum}
+
+class Agregados(dict):
+
+    """ Dicionário nome da tabela -> tabela agregada, com índices de filtro construídos sob demanda. """
+
+    #versão do CSV de que os agregados foram montados (dados._chave), usada nas chaves do memo
+    versao = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indices = {}
+
+    def indice(self, nome):
+
+        """ IndiceFiltros da tabela, construído na primeira consulta e reaproveitado depois. """
+
+        if nome not in self._indices:
+            self._indices[nome] = IndiceFiltros(self[nome])
+        return self._indices[nome]
+
+# agregados do modo em blocos: (caminho absoluto, mtime) -> agregados
+_cache_blocos = {}
+_cache_blocos_lock = threading.Lock()
+
+def _reduzir(nome, df_aux):
+    chaves, medidas = TABELAS[nome]
+    agrupado = df_aux.groupby(chaves, observed=True)
+    reduzido = agrupado.agg(medidas)
+
+    #as estatísticas de Welford não são somas: cada grupo combina as suas partes
+    estatisticas = ESTATISTICAS.get(nome, [])
+    if estatisticas:
+        grupos = agrupado.ngroup().to_numpy()
+        for n, media, m2 in estatisticas:
+            combinadas = combinar_por_grupo(grupos, len(reduzido), df_aux[n].to_numpy(),
+                                            df_aux[media].to_numpy(), df_aux[m2].to_numpy())
+            reduzido[media] = combinadas.media
+            reduzido[m2] = combinadas.m2
+
+    return reduzido.reset_index()
+
+def _quantizar(serie, resolucao):
+    valores = serie.to_numpy(dtype='float64')
+    if resolucao is None:
+        return valores
+    return np.rint(valores * resolucao) / resolucao
+
+def montar_cubo(df1):
+
+    """ Agrupa o dataset limpo pelas dimensões do cubo.
+
+        Input: Dataframe limpo
+        Output: Dataframe com as colunas de DIMENSOES e pedidos, media, m2
+    """
+
+    #cada linha é uma parte com n = 1, média = o próprio tempo e M2 = 0
+    tempo = df1['Time_taken(min)'].astype('float64')
+    df_aux = df1[DIMENSOES].assign(pedidos=1, media=tempo, m2=0.0)
+
+    return _reduzir('cubo', df_aux)
+
+@medir
+def montar_agregados(df1, resolucao=None):
+
+    """ Monta todas as tabelas agregadas a partir de um dataframe limpo (inteiro ou um bloco).
+
+        Input: Dataframe limpo e passos por grau da grade das coordenadas de pontos
+               (None: coordenadas exatas)
+        Output: Agregados (dicionário nome da tabela -> Dataframe agregado)
+    """
+
+    tempo = df1['Time_taken(min)'].astype('int64')
+    avaliacao = df1['Delivery_person_Ratings'].astype('float64')
+    com_avaliacao = avaliacao.notna()
+    avaliacao = avaliacao.fillna(0)
+
+    chaves_entregadores = TABELAS['entregadores'][0]
+    entregadores = df1[chaves_entregadores].assign(
+        pedidos=1, soma_tempo=tempo, avaliacoes=com_avaliacao.astype('int64'),
+        media_avaliacao=avaliacao, m2_avaliacao=0.0)
+
+    resumo = df1[DIMENSOES_FILTRO].assign(
+        pedidos=1, soma_distancia=df1['distancia'].astype('float64'),
+        idade_min=df1['Delivery_person_Age'], idade_max=df1['Delivery_person_Age'],
+        condicao_min=df1['Vehicle_condition'], condicao_max=df1['Vehicle_condition'])
+
+    restaurantes = df1[DIMENSOES_FILTRO + ['Restaurant_ID']].assign(pedidos=1)
+
+    pontos = df1[['Order_Date', 'City', 'Road_traffic_density']].assign(
+        latitude=_quantizar(df1['Delivery_location_latitude'], resolucao),
+        longitude=_quantizar(df1['Delivery_location_longitude'], resolucao), pedidos=1)
+
+    return Agregados({
+        'cubo': montar_cubo(df1),
+        'entregadores': _reduzir('entregadores', entregadores),
+        'resumo': _reduzir('resumo', resumo),
+        'restaurantes': _reduzir('restaurantes', restaurantes),
+        'pontos': _reduzir('pontos', pontos),
+    })
+
+@medir
+def combinar_agregados(agregados, novos):
+
+    """ Combina dois conjuntos de agregados (por exemplo, o acumulado e o de um bloco novo).
+
+        Input: dois dicionários retornados por montar_agregados()
+        Output: dicionário com as tabelas combinadas
+    """
+
+    return Agregados({nome: _reduzir(nome, dados.concatenar(agregados[nome], novos[nome]))
+                      for nome in TABELAS})
+
+class Acumulador:
+
+    """ Uma tabela agregada acumulada bloco a bloco, sem reagrupar o que já foi acumulado.
+
+        As chaves de cada linha viram um único inteiro (os códigos de cada coluna,
+        de um vocabulário que só cresce, lado a lado em BITS_CHAVES bits). Um
+        vetor ordenado desses inteiros aponta para a linha de cada chave; as
+        medidas ficam em arrays que crescem por duplicação. Somar a tabela de um
+        bloco é uma busca binária por chave, uma atualização vetorizada das
+        linhas já existentes e um acréscimo das novas, então o custo acompanha o
+        tamanho do bloco (mais uma cópia de memória do vetor de chaves).
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        chaves, self.medidas = TABELAS[nome]
+        self.chaves = [c for c in chaves if c not in CHAVES_DEPENDENTES]
+        self.estatisticas = ESTATISTICAS.get(nome, [])
+        self.colunas = list(self.medidas) + [c for _, media, m2 in self.estatisticas for c in (media, m2)]
+
+        self.bits = [BITS_CHAVES.get(c, BITS_CATEGORICAS) for c in self.chaves]
+        if sum(self.bits) > 64:
+            raise ValueError('as chaves de {} não cabem em 64 bits'.format(nome))
+
+        self.vocabularios = {}
+        self.codigos = np.empty(0, dtype='uint64')
+        self.linhas = np.empty(0, dtype='int64')
+        self.valores = {}
+        self.tamanho = 0
+        self.partes = []
+
+    def _codigos_coluna(self, coluna, serie):
+
+        """ Código de cada valor da coluna no vocabulário acumulado (estendido com os valores novos). """
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            posicoes, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            posicoes, unicos = pd.factorize(serie)
+
+        vocabulario = self.vocabularios.get(coluna, pd.Index(unicos[:0]))
+        codigos = vocabulario.get_indexer(unicos)
+        if (codigos < 0).any():
+            vocabulario = vocabulario.append(pd.Index(unicos[codigos < 0]))
+            codigos = vocabulario.get_indexer(unicos)
+            self.vocabularios[coluna] = vocabulario
+
+        bits = BITS_CHAVES.get(coluna, BITS_CATEGORICAS)
+        if len(vocabulario) > 2 ** bits:
+            raise ValueError('{} tem mais de {} valores distintos'.format(coluna, 2 ** bits))
+
+        return codigos[posicoes].astype('uint64')
+
+    def _codificar(self, parcial):
+        codigos = np.zeros(len(parcial), dtype='uint64')
+        for coluna, bits in zip(self.chaves, self.bits):
+            codigos = (codigos << np.uint64(bits)) | self._codigos_coluna(coluna, parcial[coluna])
+        return codigos
+
+    def _reservar(self, parcial, quantidade):
+
+        """ Garante espaço para `quantidade` linhas novas nos arrays das medidas (duplicando). """
+
+        capacidade = len(next(iter(self.valores.values()))) if self.valores else 0
+        if self.tamanho + quantidade <= capacidade:
+            return
+
+        capacidade = max(2 * capacidade, self.tamanho + quantidade)
+        for coluna in self.colunas:
+            antigo = self.valores.get(coluna)
+            novo = np.empty(capacidade, dtype=parcial[coluna].dtype if antigo is None else antigo.dtype)
+            if antigo is not None:
+                novo[:self.tamanho] = antigo[:self.tamanho]
+            self.valores[coluna] = novo
+
+    def somar(self, parcial):
+
+        """ Soma ao acumulado a tabela agregada de um bloco (saída de montar_agregados). """
+
+        codigos = self._codificar(parcial)
+        posicoes = np.searchsorted(self.codigos, codigos)
+        existentes = posicoes < len(self.codigos)
+        existentes[existentes] = self.codigos[posicoes[existentes]] == codigos[existentes]
+
+        #linhas já acumuladas: Welford antes das somas, que mudam a contagem
+        origem = np.flatnonzero(existentes)
+        if len(origem):
+            linhas = self.linhas[posicoes[existentes]]
+            for n, media, m2 in self.estatisticas:
+                antes = Estatisticas(self.valores[n][linhas], self.valores[media][linhas],
+                                     self.valores[m2][linhas])
+                depois = antes + Estatisticas(parcial[n].to_numpy()[origem], parcial[media].to_numpy()[origem],
+                                              parcial[m2].to_numpy()[origem])
+                self.valores[media][linhas] = depois.media
+                self.valores[m2][linhas] = depois.m2
+            for medida, funcao in self.medidas.items():
+                valores = self.valores[medida]
+                valores[linhas] = OPERACOES[funcao](valores[linhas], parcial[medida].to_numpy()[origem])
+
+        #chaves novas: acrescentadas no fim dos arrays e inseridas no vetor ordenado
+        novas = np.flatnonzero(~existentes)
+        if len(novas) == 0:
+            return
+
+        self._reservar(parcial, len(novas))
+        for coluna in self.colunas:
+            self.valores[coluna][self.tamanho:self.tamanho + len(novas)] = parcial[coluna].to_numpy()[novas]
+        self.partes.append(parcial.iloc[novas][TABELAS[self.nome][0]])
+
+        ordem = np.argsort(codigos[novas], kind='stable')
+        inserir = np.searchsorted(self.codigos, codigos[novas][ordem])
+        self.codigos = np.insert(self.codigos, inserir, codigos[novas][ordem])
+        self.linhas = np.insert(self.linhas, inserir, self.tamanho + ordem)
+        self.tamanho += len(novas)
+
+    def tabela(self):
+
+        """ Tabela acumulada, ordenada pelas chaves como a de montar_agregados(). """
+
+        tabela = dados.concatenar(*self.partes)
+        for coluna in self.colunas:
+            tabela[coluna] = self.valores[coluna][:self.tamanho]
+
+        return tabela.sort_values(TABELAS[self.nome][0], kind='stable', ignore_index=True)
+
+def agregar_em_blocos(caminho=dados.CAMINHO_DATASET, linhas_por_bloco=LINHAS_POR_BLOCO):
+
+    """ Lê o CSV em blocos e monta os agregados sem manter o dataframe completo em memória.
+
+        Cada bloco passa pela mesma limpeza (clean_code), recebe IDs de restaurante
+        consistentes com os blocos anteriores e tem suas tabelas somadas aos
+        acumuladores, sem reagrupar o que já foi lido.
+
+        Input: caminho do CSV e quantidade de linhas por bloco
+        Output: dicionário de agregados, igual ao do modo em memória, exceto pelas
+                coordenadas de pontos, na grade de RESOLUCAO_COORDENADAS
+    """
+
+    acumuladores = {nome: Acumulador(nome) for nome in TABELAS}
+    conhecidas = pd.Index([], dtype='int64')
+
+    for bruto in dados.ler_csv(caminho, chunksize=linhas_por_bloco):
+        bloco = dados.clean_code(bruto)
+        bloco['Restaurant_ID'], conhecidas = estender_restaurantes(bloco, conhecidas)
+
+        for nome, parcial in montar_agregados(bloco, RESOLUCAO_COORDENADAS).items():
+            acumuladores[nome].somar(parcial)
+
+    return Agregados({nome: acumulador.tabela() for nome, acumulador in acumuladores.items()})
+
+def carregar_agregados(caminho=dados.CAMINHO_DATASET, modo=None):
+
+    """ Agregados do dataset, construídos uma vez por versão do CSV e compartilhados pelo processo.
+
+        Input: caminho do CSV e modo de carga ('memoria', 'blocos', 'compartilhado' ou
+               'banco'; padrão NAMASFOOD_CARGA)
+        Output: dicionário nome da tabela -> Dataframe agregado (no modo banco, um
+                banco.Banco, que filtrar_agregados consulta da mesma forma)
+    """
+
+    modo = modo or MODO_CARGA
+
+    if modo == 'banco':
+        from namasfood import banco
+
+        agregados = banco.abrir(caminho)
+        if agregados is not None:
+            return agregados
+        modo = 'memoria'
+
+    if modo == 'compartilhado':
+        from namasfood import compartilhado
+
+        agregados = compartilhado.anexar(caminho)
+        if agregados is not None:
+            return agregados
+        #nenhum trabalhador publicando a versão atual do CSV: monta no próprio processo
+        modo = 'memoria'
+
+    chave = dados._chave(caminho)
+
+    if modo == 'memoria':
+        agregados = dados.carregar_derivado(
+            'agregados', montar_agregados, chave[0],
+            incrementar=lambda agregados, novos: combinar_agregados(agregados, montar_agregados(novos)),
+            chave=chave)
+        #a versão é a do instantâneo carregado (chave), não uma nova leitura do mtime; só uma versão
+        #sem linhas novas reaproveita os mesmos agregados, e aí os dados são os mesmos
+        agregados.versao = chave
+        return agregados
+
+    if modo != 'blocos':
+        raise ValueError("modo de carga desconhecido: {!r} (use 'memoria', 'blocos', 'compartilhado' ou 'banco')"
+                         .format(modo))
+
+    with _cache_blocos_lock:
+        if chave not in _cache_blocos:
+            _cache_blocos.clear()
+            _cache_blocos[chave] = agregar_em_blocos(chave[0])
+            _cache_blocos[chave].versao = chave
+
+        return _cache_blocos[chave]
+
+class AgregadosFiltrados(dict):
+
+    """ Tabelas agregadas filtradas sob demanda: cada tabela só é filtrada quando é acessada. """
+
+    def __init__(self, agregados, *filtros):
+        super().__init__()
+        self._agregados = agregados
+        self._filtros = filtros
+
+    @property
+    def versao(self):
+        return self._agregados.versao
+
+    def __missing__(self, nome):
+        with etapa('filtrar ' + nome):
+            self[nome] = self._agregados.indice(nome).filtrar(*self._filtros)
+        return self[nome]
+
+    def calcular(self, funcao, *args):
+
+        """ Resultado de uma agregação final (ver agregacao_final) sobre as tabelas filtradas.
+
+            Se a origem dos agregados calcula a agregação pelo nome (banco.Banco), ela
+            é calculada lá com os mesmos filtros; senão funcao roda sobre as tabelas.
+        """
+
+        if funcao.__name__ not in getattr(self._agregados, 'agregacoes', ()):
+            return funcao(self, *args)
+
+        with etapa('calcular ' + funcao.__name__):
+            return self._agregados.agregar(funcao.__name__, self._filtros, *args)
+
+def filtrar_agregados(agregados, date_slider, traffic_selection, weather_selection=None):
+
+    """ Aplica às tabelas agregadas os filtros da barra lateral.
+
+        Cada tabela é ordenada por Order_Date e filtrada pelo seu IndiceFiltros:
+        a data limite é uma busca binária e trânsito/clima são uniões de posições
+        pré-calculadas. O filtro de clima só vale para as tabelas que têm a coluna.
+        A filtragem é preguiçosa: uma tabela que a aba ativa não usa nunca é filtrada.
+
+        Input: agregados, data limite, condições de trânsito e (opcional) condições de clima
+        Output: AgregadosFiltrados (nome da tabela -> tabela filtrada, somente leitura)
+    """
+
+    return AgregadosFiltrados(agregados, date_slider, traffic_selection, weather_selection)
+
+def agregacao_final(funcao):
+
+    """ Marca uma agregação final das páginas: agregados filtrados -> resultado pequeno.
+
+        O corpo da função é a versão em pandas, que lê as tabelas filtradas. No modo
+        banco, a agregação de mesmo nome é uma consulta SQL (banco.AGREGACOES) e só
+        o resultado sai do banco, sem as tabelas filtradas (ver AgregadosFiltrados.calcular).
+    """
+
+    @functools.wraps(funcao)
+    def envoltorio(agregados, *args):
+        if isinstance(agregados, AgregadosFiltrados):
+            return agregados.calcular(funcao, *args)
+        return funcao(agregados, *args)
+
+    return envoltorio
+
+def contar_pedidos(tabela, por):
+
+    """ Quantidade de pedidos por grupo, equivalente a df1.groupby(por)['ID'].count().
+
+        Input: tabela agregada (filtrada) e coluna(s) de agrupamento
+        Output: Dataframe com as colunas de agrupamento e 'ID' (quantidade de pedidos)
+    """
+
+    df_aux = tabela.groupby(por, observed=True)['pedidos'].sum().reset_index()
+    df_aux = df_aux.rename(columns={'pedidos': 'ID'})
+
+    return df_aux
+
+def combinar_estatisticas(tabela, por, n='pedidos', media='media', m2='m2'):
+
+    """ Combina as estatísticas de Welford das linhas de cada grupo (fórmula de Chan).
+
+        As linhas podem ser partes de qualquer origem (dias, blocos, partições de
+        entregadores): o resultado é o mesmo que agrupar as linhas originais.
+
+        Input: tabela com colunas de contagem/média/M2, coluna(s) de agrupamento e
+               nomes das colunas de contagem/média/M2
+        Output: Dataframe com as colunas de agrupamento e n, media, m2 combinados
+    """
+
+    agrupado = tabela.groupby(por, observed=True)
+    grupos = agrupado.ngroup().to_numpy()
+    indice = agrupado.size().index
+
+    estatisticas = combinar_por_grupo(grupos, len(indice), tabela[n].to_numpy(),
+                                      tabela[media].to_numpy(), tabela[m2].to_numpy())
+
+    return pd.DataFrame({n: estatisticas.n, media: estatisticas.media, m2: estatisticas.m2},
+                        index=indice).reset_index()
+
+def media_std(tabela, por, n='pedidos', media='media', m2='m2', nomes=('tempo_medio', 'tempo_std')):
+
+    """ Média e desvio padrão amostral (ddof=1) por grupo a partir das estatísticas de Welford.
+
+        Equivale a df1.groupby(por)[medida].agg(['mean', 'std']). As partes de cada
+        grupo (dias, cidades, ...) são combinadas pela fórmula de Chan, sem voltar
+        às linhas e sem a subtração soma_quadrados - soma² da variância por somas.
+
+        Input: tabela agregada (filtrada), coluna(s) de agrupamento, nomes das colunas de
+               contagem/média/M2 e nomes das colunas de saída
+        Output: Dataframe com as colunas de agrupamento, média e desvio padrão
+    """
+
+    df_aux = combinar_estatisticas(tabela, por, n, media, m2)
+    estatisticas = Estatisticas(df_aux[n].to_numpy(), df_aux[media].to_numpy(), df_aux[m2].to_numpy())
+
+    df_aux[nomes[0]] = estatisticas.media
+    df_aux[nomes[1]] = estatisticas.desvio
+
+    return df_aux.drop(columns=[n, media, m2])
+
+def mediana(pontos, por, valor, coluna):
+
+    """ Mediana por grupo a partir do histograma de pontos, como em df1.groupby(por)[...].median().
+
+        Com as coordenadas exatas (modos memoria, compartilhado e banco), o resultado
+        é a mediana exata. No modo blocos os valores são os centros das células da
+        grade (RESOLUCAO_COORDENADAS), e o resultado fica a no máximo meia célula da
+        mediana das coordenadas originais. Com quantidade par de pedidos, a mediana
+        é a média dos dois valores centrais.
+
+        Input: tabela de pontos filtrada, coluna(s) de agrupamento, coluna do histograma
+               ('latitude' ou 'longitude') e nome da coluna de saída
+        Output: Dataframe com as colunas de agrupamento e a mediana
+    """
+
+    por = [por] if isinstance(por, str) else list(por)
+    df_aux = pontos.groupby(por + [valor], observed=True)['pedidos'].sum().reset_index()
+
+    linhas = []
+    for grupo, df_grupo in df_aux.groupby(por, observed=True, sort=True):
+        acumulado = df_grupo['pedidos'].to_numpy().cumsum()
+        valores = df_grupo[valor].to_numpy()
+        total = acumulado[-1]
+        inferior = valores[np.searchsorted(acumulado, (total - 1) // 2, side='right')]
+        superior = valores[np.searchsorted(acumulado, total // 2, side='right')]
+        grupo = grupo if isinstance(grupo, tuple) else (grupo,)
+        linhas.append(grupo + ((inferior + superior) / 2,))
+
+    return pd.DataFrame(linhas, columns=por + [coluna])
+
+@agregacao_final
+def medianas_coordenadas(agregados, por):
+
+    """ Mediana da latitude e da longitude das entregas por grupo, a partir da tabela pontos.
+
+        Input: agregados filtrados e coluna(s) de agrupamento (chaves de pontos)
+        Output: Dataframe com as colunas de agrupamento, Delivery_location_latitude
+                e Delivery_location_longitude
+    """
+
+    pontos = agregados['pontos']
+    latitudes = mediana(pontos, por, 'latitude', 'Delivery_location_latitude')
+    longitudes = mediana(pontos, por, 'longitude', 'Delivery_location_longitude')
+
+    return pd.merge(latitudes, longitudes, how='inner')
+
+@agregacao_final
+def contar_distintos(agregados, nome, coluna):
+
+    """ Quantidade de valores distintos de uma coluna na tabela agregada filtrada.
+
+        Input: agregados filtrados, nome da tabela e coluna (ex.: 'restaurantes', 'Restaurant_ID')
+        Output: inteiro
+    """
+
+    valores = agregados[nome][coluna]
+    if coluna == 'Restaurant_ID':
+        return contar_restaurantes(valores)
+
+    return int(valores.nunique())
+
+def _posicoes_k_menores(valores, k):
+
+    """ Posições dos k menores valores em ordem crescente; empates ficam na ordem de posição. """
+
+    if len(valores) > k:
+        #seleção parcial: só o k-ésimo valor é localizado, sem ordenar o grupo inteiro
+        limite = np.partition(valores, k - 1)[k - 1]
+        abaixo = np.flatnonzero(valores < limite)
+        empatados = np.flatnonzero(valores == limite)[:k - len(abaixo)]
+        posicoes = np.concatenate([abaixo, empatados])
+    else:
+        posicoes = np.arange(len(valores))
+
+    return posicoes[np.argsort(valores[posicoes], kind='stable')]
+
+def extremos_por_grupo(tabela, grupo, valor, k):
+
+    """ Os k menores e os k maiores valores de cada grupo, calculados numa única passada.
+
+        Equivale a ordenar a tabela por grupo e valor (crescente e decrescente) e
+        pegar head(k) de cada grupo, mas usa seleção parcial em vez de ordenar tudo.
+        Empates mantêm a ordem das linhas da tabela.
+
+        Input: Dataframe, coluna de agrupamento, coluna de valor e quantidade k por grupo
+        Output: tupla (menores, maiores) de Dataframes com as colunas da tabela
+    """
+
+    menores, maiores = [], []
+    for _, df_grupo in tabela.groupby(grupo, observed=True, sort=True):
+        valores = df_grupo[valor].to_numpy(dtype='float64')
+        menores.append(df_grupo.iloc[_posicoes_k_menores(valores, k)])
+        maiores.append(df_grupo.iloc[_posicoes_k_menores(-valores, k)])
+
+    if not menores:
+        return tabela.iloc[:0], tabela.iloc[:0]
+
+    return (pd.concat(menores, ignore_index=True), pd.concat(maiores, ignore_index=True))
@@ -0,0 +1,516 @@
+""" Banco analítico local (DuckDB) como alternativa aos agregados em memória.
+
+    Os pedidos limpos ficam na tabela `pedidos` de um arquivo DuckDB ao lado do
+    CSV (train.csv -> train.duckdb), gravada bloco a bloco, sem o dataframe
+    completo em memória. A origem do CSV é registrada como no cache colunar: se
+    o CSV só cresceu, só as linhas novas são lidas; se mudou, o banco é refeito.
+    Um reinício do processo só abre o arquivo e confere a origem.
+
+    As tabelas agregadas (cubo, entregadores, resumo, restaurantes, pontos) são
+    consultas GROUP BY sobre os pedidos (consulta_agregado), gravadas no banco a
+    cada atualização do CSV. A cada rerun, os filtros da barra lateral viram
+    predicados WHERE sobre elas: só as linhas do recorte pedido saem do banco,
+    com as mesmas colunas, tipos e ordem das tabelas do modo memoria, então as
+    funções das páginas (contar_pedidos, media_std, mediana...) rodam sem
+    mudança sobre elas.
+
+    As agregações finais das páginas cuja entrada é grande (entregadores e
+    restaurantes têm perto de uma linha por pedido) não trazem a tabela
+    filtrada: o GROUP BY final também é feito no banco (AGREGACOES), com os
+    mesmos filtros, e só o resultado sai. São elas as contagens distintas, as
+    medianas das coordenadas, os entregadores por semana e as médias por
+    entregador (ver agregados.agregacao_final).
+
+    Uso: NAMASFOOD_CARGA=banco. O banco pode ser montado antes de um deploy:
+
+        python -m namasfood.banco [caminho/do/train.csv] [--forcar]
+"""
+
+import argparse
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # duckdb é opcional: sem ele o modo banco cai no modo memoria
+    duckdb = None
+
+from namasfood import dados
+from namasfood.agregados import LINHAS_POR_BLOCO, TABELAS
+from namasfood.instrumentacao import medir
+from namasfood.memo import CacheLRU
+from namasfood.restaurantes import estender_restaurantes
+
+# colunas do dataset limpo guardadas no banco -> tipo SQL
+COLUNAS = {
+    'Order_Date': 'TIMESTAMP',
+    'week_of_year': 'TINYINT',
+    'City': 'VARCHAR',
+    'Road_traffic_density': 'VARCHAR',
+    'Weatherconditions': 'VARCHAR',
+    'Festival': 'VARCHAR',
+    'Type_of_order': 'VARCHAR',
+    'Delivery_person_ID': 'VARCHAR',
+    'Delivery_person_Age': 'TINYINT',
+    'Delivery_person_Ratings': 'FLOAT',
+    'Vehicle_condition': 'TINYINT',
+    'distancia': 'FLOAT',
+    'Restaurant_ID': 'INTEGER',
+    'Delivery_location_latitude': 'FLOAT',
+    'Delivery_location_longitude': 'FLOAT',
+    'Time_taken(min)': 'TINYINT',
+}
+
+# chaves das tabelas agregadas que não são colunas dos pedidos (coordenadas exatas, como no modo memoria)
+EXPRESSOES = {
+    'latitude': 'CAST("Delivery_location_latitude" AS DOUBLE)',
+    'longitude': 'CAST("Delivery_location_longitude" AS DOUBLE)',
+}
+
+# medidas de cada tabela, com os mesmos nomes e o mesmo significado de agregados.TABELAS/ESTATISTICAS
+# (M2 = var_pop * n, a soma dos quadrados dos desvios)
+MEDIDAS = {
+    'cubo': ['count(*) AS pedidos',
+             'avg(CAST("Time_taken(min)" AS DOUBLE)) AS media',
+             'var_pop(CAST("Time_taken(min)" AS DOUBLE)) * count(*) AS m2'],
+    'entregadores': ['count(*) AS pedidos',
+                     'CAST(sum("Time_taken(min)") AS BIGINT) AS soma_tempo',
+                     'count("Delivery_person_Ratings") AS avaliacoes',
+                     'coalesce(avg(CAST("Delivery_person_Ratings" AS DOUBLE)), 0) AS media_avaliacao',
+                     'coalesce(var_pop(CAST("Delivery_person_Ratings" AS DOUBLE))'
+                     ' * count("Delivery_person_Ratings"), 0) AS m2_avaliacao'],
+    'resumo': ['count(*) AS pedidos',
+               'sum(CAST("distancia" AS DOUBLE)) AS soma_distancia',
+               'min("Delivery_person_Age") AS idade_min', 'max("Delivery_person_Age") AS idade_max',
+               'min("Vehicle_condition") AS condicao_min', 'max("Vehicle_condition") AS condicao_max'],
+    'restaurantes': ['count(*) AS pedidos'],
+    'pontos': ['count(*) AS pedidos'],
+}
+
+CATEGORICAS = [col for col in dados.COLS_CATEGORICAS if col in COLUNAS]
+
+# bancos abertos no processo: caminho absoluto do CSV -> Banco
+_bancos = {}
+_bancos_lock = threading.Lock()
+
+def disponivel():
+
+    """ Indica se o modo banco pode ser usado (duckdb instalado). """
+
+    return duckdb is not None
+
+def caminho_banco(caminho_csv):
+
+    """ Caminho do arquivo DuckDB correspondente a um CSV: train.csv -> train.duckdb """
+
+    base, _ = os.path.splitext(caminho_csv)
+    return base + '.duckdb'
+
+def _coluna(nome):
+    return EXPRESSOES.get(nome, '"{}"'.format(nome))
+
+def tabela_banco(nome):
+    return 'agregado_' + nome
+
+def consulta_agregado(nome):
+
+    """ SQL que monta a tabela agregada `nome` a partir dos pedidos, ordenada pelas chaves.
+
+        Linhas com alguma chave ausente ficam de fora, como no groupby do pandas.
+
+        Input: nome da tabela (ver agregados.TABELAS)
+        Output: texto da consulta
+    """
+
+    chaves = TABELAS[nome][0]
+    selecao = ['{} AS "{}"'.format(_coluna(chave), chave) for chave in chaves] + MEDIDAS[nome]
+    condicoes = ['"{}" IS NOT NULL'.format(chave) for chave in chaves if chave not in EXPRESSOES]
+    ordem = ', '.join('"{}"'.format(chave) for chave in chaves)
+
+    return 'SELECT {} FROM pedidos WHERE {} GROUP BY {} ORDER BY {}'.format(
+        ', '.join(selecao), ' AND '.join(condicoes), ordem, ordem)
+
+def predicados(nome, filtrar_clima=False):
+
+    """ Condições WHERE dos filtros da barra lateral sobre uma tabela (ou os pedidos).
+
+        Os parâmetros são $data (data limite), $trafegos e, quando a tabela tem a
+        coluna Weatherconditions e filtrar_clima, $climas.
+
+        Input: nome da tabela (ver agregados.TABELAS) e se o filtro de clima se aplica
+        Output: texto das condições, unidas por AND
+    """
+
+    condicoes = ['"Order_Date" <= $data', 'list_contains($trafegos, "Road_traffic_density")']
+    if filtrar_clima and 'Weatherconditions' in TABELAS[nome][0]:
+        condicoes.append('list_contains($climas, "Weatherconditions")')
+
+    return ' AND '.join(condicoes)
+
+def pedidos_de(nome):
+
+    """ Condições dos pedidos que entram na tabela agregada `nome` (nenhuma chave ausente). """
+
+    return ' AND '.join('{} IS NOT NULL'.format(_coluna(chave)) for chave in TABELAS[nome][0])
+
+def consulta(nome, filtrar_clima=False):
+
+    """ SQL da tabela agregada `nome` com os filtros da barra lateral como predicados.
+
+        Os parâmetros são $data (data limite), $trafegos e, com filtrar_clima,
+        $climas (listas de condições). Todas as tabelas têm Order_Date e
+        Road_traffic_density (e, quando filtram o clima, Weatherconditions) entre
+        as chaves, então filtrar a tabela agregada dá o mesmo que agregar só os
+        pedidos filtrados. Sem ORDER BY, o DuckDB devolve as linhas na ordem em
+        que foram gravadas (ordenadas pelas chaves; preserve_insertion_order).
+
+        Input: nome da tabela (ver agregados.TABELAS) e se o filtro de clima se aplica
+        Output: texto da consulta
+    """
+
+    return 'SELECT * FROM {} WHERE {}'.format(tabela_banco(nome), predicados(nome, filtrar_clima))
+
+def _lista(colunas):
+    colunas = [colunas] if isinstance(colunas, str) else colunas
+    return ', '.join('"{}"'.format(col) for col in colunas)
+
+def _sql_contar_distintos(filtrar_clima, nome, coluna):
+    return 'SELECT count(DISTINCT "{}") FROM {} WHERE {}'.format(
+        coluna, tabela_banco(nome), predicados(nome, filtrar_clima))
+
+def _sql_mediana(filtrar_clima, por, valor, coluna):
+
+    #mediana ponderada do histograma de pontos, como agregados.mediana: o valor inferior é o
+    #primeiro cuja contagem acumulada passa de (total - 1) // 2, e o superior, de total // 2
+    celulas = 'SELECT {0}, "{1}" AS valor, sum(pedidos) AS pedidos FROM {2} WHERE {3} GROUP BY ALL'.format(
+        _lista(por), valor, tabela_banco('pontos'), predicados('pontos', filtrar_clima))
+    acumulado = ('SELECT *, sum(pedidos) OVER (PARTITION BY {0} ORDER BY valor) AS acumulado,'
+                 ' sum(pedidos) OVER (PARTITION BY {0}) AS total FROM ({1})').format(_lista(por), celulas)
+
+    return ('SELECT {0}, (min(valor) FILTER (WHERE acumulado > (total - 1) // 2)'
+            ' + min(valor) FILTER (WHERE acumulado > total // 2)) / 2 AS "{1}" FROM ({2}) GROUP BY {0}').format(
+        _lista(por), coluna, acumulado)
+
+def _sql_medianas_coordenadas(filtrar_clima, por):
+    return 'SELECT * FROM ({}) JOIN ({}) USING ({}) ORDER BY {}'.format(
+        _sql_mediana(filtrar_clima, por, 'latitude', 'Delivery_location_latitude'),
+        _sql_mediana(filtrar_clima, por, 'longitude', 'Delivery_location_longitude'), _lista(por), _lista(por))
+
+def _sql_pedidos_por_entregador_semana(filtrar_clima):
+    return ('SELECT "week_of_year", "ID", "Delivery_person_ID", "ID" / "Delivery_person_ID" AS order_by_deliver'
+            ' FROM (SELECT "week_of_year", CAST(sum(pedidos) AS BIGINT) AS "ID" FROM {} WHERE {} GROUP BY 1)'
+            ' JOIN (SELECT "week_of_year", count(DISTINCT "Delivery_person_ID") AS "Delivery_person_ID"'
+            ' FROM {} WHERE {} GROUP BY 1) USING ("week_of_year") ORDER BY 1').format(
+        tabela_banco('cubo'), predicados('cubo', filtrar_clima),
+        tabela_banco('entregadores'), predicados('entregadores', filtrar_clima))
+
+def _sql_media_avaliacao_entregadores(filtrar_clima):
+    return ('SELECT "Delivery_person_ID", avg(CAST("Delivery_person_Ratings" AS DOUBLE)) AS "Delivery_person_Ratings"'
+            ' FROM pedidos WHERE {} AND {} GROUP BY 1 ORDER BY 1').format(
+        pedidos_de('entregadores'), predicados('entregadores', filtrar_clima))
+
+def _sql_media_avaliacao_por(filtrar_clima, coluna):
+    return ('SELECT "{0}", avg(CAST("Delivery_person_Ratings" AS DOUBLE)) AS delivery_mean,'
+            ' stddev_samp(CAST("Delivery_person_Ratings" AS DOUBLE)) AS delivery_std'
+            ' FROM pedidos WHERE {1} AND {2} GROUP BY 1 ORDER BY 1').format(
+        coluna, pedidos_de('entregadores'), predicados('entregadores', filtrar_clima))
+
+def _sql_ranking_entregadores(filtrar_clima, k):
+
+    #tempo médio de cada entregador por cidade; os k menores e os k maiores de cada cidade, com os
+    #empates na ordem de Delivery_person_ID, como em agregados.extremos_por_grupo
+    tempos = ('SELECT "City", "Delivery_person_ID", CAST(sum(soma_tempo) AS DOUBLE) / sum(pedidos)'
+              ' AS "Time_taken(min)" FROM {} WHERE {} GROUP BY 1, 2').format(
+        tabela_banco('entregadores'), predicados('entregadores', filtrar_clima))
+
+    return tuple(('SELECT * FROM ({0}) QUALIFY row_number() OVER (PARTITION BY "City" ORDER BY "Time_taken(min)" {1},'
+                  ' "Delivery_person_ID") <= {2} ORDER BY "City", "Time_taken(min)" {1}, "Delivery_person_ID"').format(
+        tempos, sentido, int(k)) for sentido in ('ASC', 'DESC'))
+
+def _como_texto(df_aux, por):
+    #na versão em pandas (agregados.mediana) as colunas de agrupamento saem como texto, não categóricas
+    #(e todas as colunas como object quando não há nenhum grupo)
+    if not len(df_aux):
+        return df_aux.astype('object')
+    return df_aux.astype({col: 'str' for col in ([por] if isinstance(por, str) else por)})
+
+# agregações finais calculadas no banco: nome da função em pandas (agregados.agregacao_final) ->
+# (SQL a partir de filtrar_clima e dos argumentos, conversão do resultado a partir dos argumentos).
+# Um SQL por Dataframe do resultado (uma tupla de SQL dá uma tupla de Dataframes)
+AGREGACOES = {
+    'contar_distintos': (_sql_contar_distintos, lambda df_aux, nome, coluna: int(df_aux.iat[0, 0])),
+    'medianas_coordenadas': (_sql_medianas_coordenadas, _como_texto),
+    'pedidos_por_entregador_semana': (_sql_pedidos_por_entregador_semana, None),
+    'media_avaliacao_entregadores': (_sql_media_avaliacao_entregadores, None),
+    'media_avaliacao_por': (_sql_media_avaliacao_por, None),
+    'ranking_entregadores': (_sql_ranking_entregadores, None),
+}
+
+class _Consulta:
+
+    """ Tabela agregada consultada no banco; tem a mesma interface de filtro de IndiceFiltros. """
+
+    def __init__(self, banco, nome):
+        self.banco = banco
+        self.nome = nome
+
+    def filtrar(self, date_slider, traffic_selection, weather_selection=None):
+        return self.banco.consultar(self.nome, date_slider, traffic_selection, weather_selection)
+
+class Banco:
+
+    """ Versão do banco de um CSV, usada no lugar dos Agregados pelas páginas.
+
+        filtrar_agregados(banco, ...) funciona como com os agregados em memória:
+        cada tabela acessada vira uma consulta com os filtros, e cada agregação
+        final de AGREGACOES também (agregar). Os resultados ficam num cache LRU
+        por estado dos filtros e devem ser tratados como somente leitura.
+    """
+
+    agregacoes = AGREGACOES
+
+    def __init__(self, conexao, chave):
+        self.conexao = conexao
+        self.chave = chave
+        #mesma função de Agregados.versao
+        self.versao = chave
+        self.resultados = CacheLRU(maxsize=64)
+
+        #categorias de todo o banco, para que as colunas categóricas tenham sempre as mesmas
+        #(o cubo tem todas como chave e é bem menor que os pedidos)
+        cursor = conexao.cursor()
+        self.categorias = {}
+        for col in CATEGORICAS:
+            sql = 'SELECT DISTINCT "{}" FROM {} ORDER BY 1'.format(col, tabela_banco('cubo'))
+            self.categorias[col] = [linha[0] for linha in cursor.execute(sql).fetchall()]
+        sql = 'SELECT max("Order_Date") FROM {}'.format(tabela_banco('cubo'))
+        self.ultima_data = cursor.execute(sql).fetchone()[0]
+        cursor.close()
+
+    def __iter__(self):
+        return iter(TABELAS)
+
+    def __getitem__(self, nome):
+        #tabela inteira: sem filtro de data nem de trânsito
+        return self.consultar(nome, self.ultima_data or pd.Timestamp.max, self.categorias['Road_traffic_density'])
+
+    def indice(self, nome):
+        return _Consulta(self, nome)
+
+    def consultar(self, nome, date_slider, traffic_selection, weather_selection=None):
+
+        """ Tabela agregada `nome` só com os pedidos que atendem aos filtros.
+
+            Input: nome da tabela, data limite, condições de trânsito e (opcional) de clima
+            Output: Dataframe com as colunas de agregados.TABELAS[nome], ordenado pelas chaves
+        """
+
+        filtrar_clima = weather_selection is not None and 'Weatherconditions' in TABELAS[nome][0]
+        parametros = self._parametros(date_slider, traffic_selection, weather_selection if filtrar_clima else None)
+
+        chave = (nome, parametros['data'], tuple(parametros['trafegos']), tuple(parametros.get('climas', ())),
+                 filtrar_clima)
+
+        return self.resultados.obter(chave, lambda: self._executar(nome, consulta(nome, filtrar_clima), parametros))
+
+    def agregar(self, nome, filtros, *args):
+
+        """ Agregação final `nome` (ver AGREGACOES) calculada no banco com os filtros.
+
+            Input: nome da agregação, tupla (data limite, condições de trânsito,
+                   condições de clima ou None) e os argumentos da agregação
+            Output: o mesmo resultado da função em pandas de mesmo nome
+        """
+
+        construir, converter = AGREGACOES[nome]
+        parametros = self._parametros(*filtros)
+        filtrar_clima = 'climas' in parametros
+
+        chave = ('agregar', nome, tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args),
+                 parametros['data'], tuple(parametros['trafegos']), tuple(parametros.get('climas', ())))
+
+        def calcular():
+            consultas = construir(filtrar_clima, *args)
+            resultados = [self._executar(nome, sql, {parametro: valor for parametro, valor in parametros.items()
+                                                     if '$' + parametro in sql})
+                          for sql in ((consultas,) if isinstance(consultas, str) else consultas)]
+            if converter is not None:
+                resultados = [converter(df_aux, *args) for df_aux in resultados]
+            return resultados[0] if isinstance(consultas, str) else tuple(resultados)
+
+        return self.resultados.obter(chave, calcular)
+
+    @staticmethod
+    def _parametros(date_slider, traffic_selection, weather_selection=None):
+        parametros = {'data': pd.Timestamp(date_slider).to_pydatetime(),
+                      'trafegos': sorted(set(traffic_selection))}
+        if weather_selection is not None:
+            parametros['climas'] = sorted(set(weather_selection))
+        return parametros
+
+    @medir(nome='consulta_banco')
+    def _executar(self, nome, sql, parametros):
+
+        #um cursor por consulta: a conexão é compartilhada pelas threads das sessões
+        cursor = self.conexao.cursor()
+        try:
+            df_aux = cursor.execute(sql, parametros).fetchdf()
+        finally:
+            cursor.close()
+
+        for col in df_aux.columns:
+            if col in self.categorias:
+                df_aux[col] = pd.Categorical(df_aux[col], categories=self.categorias[col])
+            elif col == 'Delivery_person_ID' and not pd.api.types.is_numeric_dtype(df_aux[col]):
+                #(numérica quando é a contagem de entregadores distintos de uma agregação final)
+                df_aux[col] = df_aux[col].astype('str')
+
+        return df_aux
+
+def _ler_origem(conexao):
+    try:
+        linha = conexao.execute('SELECT origem FROM origem').fetchone()
+    except duckdb.CatalogException:
+        return None
+    return None if linha is None else json.loads(linha[0])
+
+def _recriar(conexao):
+    conexao.execute('DROP TABLE IF EXISTS pedidos')
+    for nome in TABELAS:
+        conexao.execute('DROP TABLE IF EXISTS {}'.format(tabela_banco(nome)))
+    conexao.execute('DROP TABLE IF EXISTS chaves_restaurantes')
+    conexao.execute('DROP TABLE IF EXISTS origem')
+    conexao.execute('CREATE TABLE pedidos ({})'.format(
+        ', '.join('"{}" {}'.format(col, tipo) for col, tipo in COLUNAS.items())))
+    conexao.execute('CREATE TABLE chaves_restaurantes (Restaurant_ID INTEGER, chave BIGINT)')
+    conexao.execute('CREATE TABLE origem (origem VARCHAR)')
+
+def _ingerir(conexao, caminho, inicio, tamanho, linhas_por_bloco):
+
+    """ Lê do CSV os bytes [inicio, tamanho), bloco a bloco, e grava os pedidos limpos. """
+
+    conhecidas = pd.Index(conexao.execute(
+        'SELECT chave FROM chaves_restaurantes ORDER BY Restaurant_ID').fetchdf()['chave'], dtype='int64')
+    quantidade = len(conhecidas)
+    colunas = ', '.join('"{}"'.format(col) for col in COLUNAS)
+
+    with open(caminho, 'rb') as f:
+        cabecalho = f.readline()
+        nomes = pd.read_csv(io.BytesIO(cabecalho)).columns.tolist()
+        inicio = max(inicio, len(cabecalho))
+        f.seek(inicio)
+
+        leitor = io.BufferedReader(dados._ArquivoLimitado(f, tamanho - inicio))
+        for bruto in dados.ler_csv(leitor, header=None, names=nomes, chunksize=linhas_por_bloco):
+            bloco = dados.clean_code(bruto)
+            bloco['Restaurant_ID'], conhecidas = estender_restaurantes(bloco, conhecidas)
+
+            conexao.register('bloco', bloco)
+            conexao.execute('INSERT INTO pedidos SELECT {} FROM bloco'.format(colunas))
+            conexao.unregister('bloco')
+
+    if len(conhecidas) > quantidade:
+        novas = pd.DataFrame({'Restaurant_ID': range(quantidade, len(conhecidas)),
+                              'chave': conhecidas[quantidade:].to_numpy()})
+        conexao.register('novas', novas)
+        conexao.execute('INSERT INTO chaves_restaurantes SELECT Restaurant_ID, chave FROM novas')
+        conexao.unregister('novas')
+
+@medir(nome='atualizar_banco')
+def atualizar(conexao, caminho, forcar=False, linhas_por_bloco=LINHAS_POR_BLOCO):
+
+    """ Deixa o banco em dia com o CSV: nada, só as linhas novas ou tudo de novo.
+
+        As tabelas agregadas são refeitas a partir dos pedidos sempre que entram
+        linhas novas. Tudo acontece numa única transação: uma carga interrompida
+        não deixa o banco pela metade.
+
+        Input: conexão DuckDB, caminho do CSV, se deve refazer mesmo com origem
+               válida e linhas por bloco
+        Output: quantidade de bytes do CSV lidos nesta atualização
+    """
+
+    tamanho = os.path.getsize(caminho)
+    origem = None if forcar else _ler_origem(conexao)
+
+    if dados.origem_valida(caminho, origem) and origem['tamanho'] == tamanho:
+        return 0
+
+    conexao.execute('BEGIN TRANSACTION')
+    try:
+        if dados.origem_valida(caminho, origem):
+            inicio = origem['tamanho']
+        else:
+            _recriar(conexao)
+            inicio = 0
+
+        _ingerir(conexao, caminho, inicio, tamanho, linhas_por_bloco)
+        for nome in TABELAS:
+            conexao.execute('CREATE OR REPLACE TABLE {} AS {}'.format(tabela_banco(nome), consulta_agregado(nome)))
+        conexao.execute('DELETE FROM origem')
+        conexao.execute('INSERT INTO origem VALUES (?)', [json.dumps(dados._origem(caminho, tamanho))])
+        conexao.execute('COMMIT')
+    except BaseException:
+        conexao.execute('ROLLBACK')
+        raise
+
+    return tamanho - inicio
+
+def abrir(caminho=dados.CAMINHO_DATASET):
+
+    """ Banco do CSV, atualizado se o arquivo mudou desde a última consulta.
+
+        A conexão fica aberta pelo processo inteiro (o DuckDB permite um único
+        processo com o arquivo aberto para escrita).
+
+        Input: caminho do CSV
+        Output: Banco ou None (duckdb indisponível ou arquivo em uso por outro processo)
+    """
+
+    if not disponivel():
+        return None
+
+    chave = dados._chave(caminho)
+
+    with _bancos_lock:
+        banco = _bancos.get(chave[0])
+        if banco is not None and banco.chave == chave:
+            return banco
+
+        try:
+            conexao = duckdb.connect(caminho_banco(chave[0])) if banco is None else banco.conexao
+        except duckdb.IOException:
+            return None
+
+        atualizar(conexao, chave[0])
+        _bancos[chave[0]] = Banco(conexao, chave)
+
+        return _bancos[chave[0]]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Monta ou atualiza o banco DuckDB do dataset limpo.')
+    parser.add_argument('caminho', nargs='?', default=dados.CAMINHO_DATASET, help='caminho do train.csv')
+    parser.add_argument('--forcar', action='store_true', help='refaz o banco mesmo se ele estiver em dia')
+    args = parser.parse_args(argv)
+
+    if not disponivel():
+        parser.error('duckdb não está instalado; o modo banco não está disponível')
+
+    with duckdb.connect(caminho_banco(args.caminho)) as conexao:
+        lidos = atualizar(conexao, args.caminho, forcar=args.forcar)
+        linhas = conexao.execute('SELECT count(*) FROM pedidos').fetchone()[0]
+
+    if lidos:
+        print('Banco gravado: {} ({} linhas; {:.1f} MB do CSV lidos)'.format(
+            caminho_banco(args.caminho), linhas, lidos / 2**20))
+    else:
+        print('Banco em dia: {} ({} linhas)'.format(caminho_banco(args.caminho), linhas))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
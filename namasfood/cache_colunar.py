@@ -0,0 +1,140 @@
+""" Cache em disco (Parquet) do dataset limpo.
+
+    O resultado de clean_code() é gravado ao lado do train.csv junto com a
+    origem dos dados (versão da limpeza, quantos bytes do CSV foram lidos e uma
+    impressão digital desses bytes). Uma carga fria lê direto as colunas já
+    tipadas, sem nenhum parse de texto; se o CSV mudar, o cache é descartado e
+    refeito, e se o CSV apenas crescer, só as linhas novas são lidas do texto.
+
+    Uso pela linha de comando (antes de um deploy):
+
+        python -m namasfood.cache_colunar [caminho/do/train.csv] [--forcar]
+"""
+
+import argparse
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele o dashboard lê sempre o CSV
+    pa = None
+    pq = None
+
+from namasfood.instrumentacao import medir
+
+CHAVE_METADADOS = b'namasfood_origem'
+
+def disponivel():
+
+    """ Indica se o cache colunar pode ser usado (pyarrow instalado). """
+
+    return pq is not None
+
+def caminho_cache(caminho_csv):
+
+    """ Caminho do arquivo Parquet correspondente a um CSV: train.csv -> train.clean.parquet """
+
+    base, _ = os.path.splitext(caminho_csv)
+    return base + '.clean.parquet'
+
+def ler_origem(caminho_csv):
+
+    """ Lê apenas a origem registrada no cache (metadados do Parquet), sem carregar os dados.
+
+        A validação da origem frente ao CSV atual fica com quem chama
+        (ver dados.origem_valida).
+
+        Input: caminho do CSV
+        Output: dicionário de origem ou None (cache ausente, ilegível ou pyarrow indisponível)
+    """
+
+    if not disponivel():
+        return None
+
+    try:
+        metadados = pq.read_schema(caminho_cache(caminho_csv)).metadata or {}
+        return json.loads(metadados.get(CHAVE_METADADOS, b'null'))
+
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+@medir(nome='ler_cache_parquet')
+def ler_cache(caminho_csv):
+
+    """ Lê o dataframe limpo do cache colunar.
+
+        Input: caminho do CSV
+        Output: Dataframe limpo ou None (cache ausente, ilegível ou pyarrow indisponível)
+    """
+
+    if not disponivel():
+        return None
+
+    try:
+        return pq.read_table(caminho_cache(caminho_csv)).to_pandas()
+
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+def gravar_cache(df1, caminho_csv, origem):
+
+    """ Grava o dataframe limpo no cache colunar ao lado do CSV.
+
+        A escrita é feita em um arquivo temporário e depois renomeada, para que
+        leitores concorrentes nunca vejam um arquivo pela metade.
+
+        Input: Dataframe limpo, caminho do CSV e origem dos dados (dicionário serializável)
+        Output: caminho do cache gravado ou None se não foi possível gravar
+    """
+
+    if not disponivel():
+        return None
+
+    caminho = caminho_cache(caminho_csv)
+    temporario = '{}.{}.tmp'.format(caminho, os.getpid())
+
+    tabela = pa.Table.from_pandas(df1, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_METADADOS] = json.dumps(origem).encode()
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    try:
+        pq.write_table(tabela, temporario)
+        os.replace(temporario, caminho)
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return None
+
+    return caminho
+
+def main(argv=None):
+
+    from namasfood.dados import CAMINHO_DATASET, origem_valida, reconstruir_cache
+
+    parser = argparse.ArgumentParser(description='Reconstrói o cache Parquet do dataset limpo.')
+    parser.add_argument('caminho', nargs='?', default=CAMINHO_DATASET, help='caminho do train.csv')
+    parser.add_argument('--forcar', action='store_true', help='reconstrói mesmo se o cache estiver válido')
+    args = parser.parse_args(argv)
+
+    if not disponivel():
+        parser.error('pyarrow não está instalado; o cache colunar não está disponível')
+
+    if not args.forcar:
+        origem = ler_origem(args.caminho)
+        if origem_valida(args.caminho, origem) and origem['tamanho'] == os.path.getsize(args.caminho):
+            print('Cache válido: {}'.format(caminho_cache(args.caminho)))
+            return 0
+
+    caminho, linhas = reconstruir_cache(args.caminho)
+    if caminho is None:
+        print('Não foi possível gravar o cache de {}'.format(args.caminho))
+        return 1
+
+    print('Cache gravado: {} ({} linhas)'.format(caminho, linhas))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
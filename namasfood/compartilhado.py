@@ -0,0 +1,341 @@
+""" Agregados publicados em memória compartilhada por um processo trabalhador.
+
+    Um processo à parte (python -m namasfood.compartilhado) carrega o dataset,
+    monta os agregados e copia cada coluna de cada tabela para um segmento de
+    multiprocessing.shared_memory. Um manifesto JSON ao lado do CSV
+    (train.shm.json) descreve o segmento: nome, versão do CSV de origem e, para
+    cada coluna, tipo, posição e categorias.
+
+    Os processos do Streamlit com NAMASFOOD_CARGA=compartilhado apenas anexam o
+    segmento e montam os dataframes como visões somente leitura sobre ele, sem
+    copiar as colunas, então uma sessão ou um processo a mais não refaz a carga
+    nem a agregação. Quando o CSV muda, o trabalhador publica um segmento novo e
+    remove o antigo; quem ainda usa o antigo continua com o mapeamento até soltar
+    as tabelas. Enquanto a reconstrução não termina, o trabalhador continua
+    dando sinal de vida e as páginas continuam servindo o segmento antigo, em vez
+    de cada processo montar os agregados por conta própria.
+
+    Colunas categóricas são publicadas como códigos inteiros mais a lista de
+    categorias; colunas de texto (Delivery_person_ID) viram categóricas.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from namasfood import agregados as _agregados
+from namasfood import dados
+
+# alinhamento de cada coluna dentro do segmento, em bytes
+ALINHAMENTO = 64
+
+# segundos entre duas verificações do CSV pelo trabalhador
+INTERVALO = 1.0
+
+# segundos que uma página espera o trabalhador republicar um CSV alterado antes de servir o segmento antigo
+ESPERA = 10.0
+
+# o trabalhador é dado como parado se o manifesto ficar este número de intervalos sem ser tocado
+INTERVALOS_SEM_SINAL = 5
+
+# segmentos anexados por este processo: caminho do CSV -> (nome do segmento, agregados)
+_anexados = {}
+# segmentos substituídos que ainda têm tabelas em uso (fechados quando forem soltos)
+_antigos = []
+# versão do CSV cuja espera pela republicação já expirou: caminho do CSV -> chave (dados._chave)
+_esperas_expiradas = {}
+_anexados_lock = threading.Lock()
+
+def caminho_manifesto(caminho_csv):
+
+    """ Caminho do manifesto do segmento publicado para um CSV (train.csv -> train.shm.json). """
+
+    base, _ = os.path.splitext(caminho_csv)
+    return base + '.shm.json'
+
+def _colunas(tabela):
+
+    """ Separa as colunas de uma tabela em (nome, array, categorias, ordenada). """
+
+    for nome in tabela.columns:
+        serie = tabela[nome]
+        if pd.api.types.is_string_dtype(serie.dtype) or serie.dtype == object:
+            serie = serie.astype('category')
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            yield nome, serie.array.codes, serie.cat.categories.tolist(), bool(serie.cat.ordered)
+        else:
+            yield nome, serie.to_numpy(), None, None
+
+def publicar(agregados, caminho_csv, origem, nome_segmento, intervalo=INTERVALO):
+
+    """ Copia os agregados para um segmento novo de memória compartilhada e grava o manifesto.
+
+        As tabelas são publicadas já ordenadas por Order_Date (como no IndiceFiltros),
+        para que quem anexa não precise reordená-las.
+
+        Input: agregados, caminho do CSV, origem (chave de dados._chave), nome do segmento e
+               intervalo entre sinais de vida do trabalhador
+        Output: SharedMemory criado (o chamador é dono dele e deve removê-lo depois)
+    """
+
+    tabelas = {}
+    partes = []
+    tamanho = 0
+
+    for nome in agregados:
+        tabela = agregados.indice(nome).tabela
+        colunas = []
+        for coluna, array, categorias, ordenada in _colunas(tabela):
+            array = np.ascontiguousarray(array)
+            colunas.append({'nome': coluna, 'dtype': array.dtype.str, 'deslocamento': tamanho,
+                            'categorias': categorias, 'ordenada': ordenada})
+            partes.append((tamanho, array))
+            tamanho += -(-array.nbytes // ALINHAMENTO) * ALINHAMENTO
+        tabelas[nome] = {'linhas': len(tabela), 'colunas': colunas}
+
+    segmento = shared_memory.SharedMemory(name=nome_segmento, create=True, size=max(tamanho, 1))
+    for deslocamento, array in partes:
+        destino = np.ndarray(array.shape, dtype=array.dtype, buffer=segmento.buf, offset=deslocamento)
+        destino[...] = array
+        del destino
+
+    manifesto = {'segmento': segmento.name, 'origem': list(origem), 'pid': os.getpid(),
+                 'intervalo': intervalo, 'tabelas': tabelas}
+
+    destino = caminho_manifesto(caminho_csv)
+    temporario = '{}.{}.tmp'.format(destino, os.getpid())
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo)
+    os.replace(temporario, destino)
+
+    return segmento
+
+def ler_manifesto(caminho_csv):
+
+    """ Manifesto publicado pelo trabalhador, com a idade do último sinal de vida em 'silencio'.
+
+        Input: caminho do CSV
+        Output: dicionário ou None se não houver trabalhador publicando
+    """
+
+    destino = caminho_manifesto(caminho_csv)
+    try:
+        with open(destino, encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+        manifesto['silencio'] = time.time() - os.path.getmtime(destino)
+    except (OSError, ValueError):
+        return None
+
+    return manifesto
+
+def _trabalhador_ativo(manifesto):
+    return manifesto['silencio'] < INTERVALOS_SEM_SINAL * manifesto['intervalo']
+
+class _Segmento(shared_memory.SharedMemory):
+
+    """ SharedMemory anexado que não reclama ao ser coletado com tabelas ainda em uso. """
+
+    def __del__(self):
+        try:
+            self.close()
+        except BufferError:
+            #o mapeamento continua válido e é desfeito quando os arrays forem coletados
+            pass
+
+def _abrir_segmento(nome):
+
+    """ Anexa um segmento existente sem registrá-lo no resource_tracker deste processo.
+
+        Sem isso, o Python < 3.13 remove o segmento quando o processo que só anexou termina.
+    """
+
+    try:
+        return _Segmento(name=nome, track=False)
+    except TypeError:
+        segmento = _Segmento(name=nome)
+        resource_tracker.unregister(segmento._name, 'shared_memory')
+        return segmento
+
+def _montar(manifesto, segmento):
+
+    """ Monta os agregados como visões somente leitura sobre o segmento. """
+
+    agregados = _agregados.Agregados()
+    #a versão é a do CSV publicado, não a atual: o segmento antigo pode ser servido durante a reconstrução
+    agregados.versao = tuple(manifesto['origem'])
+
+    for nome, tabela in manifesto['tabelas'].items():
+        colunas = {}
+        for coluna in tabela['colunas']:
+            #frombuffer mantém o buffer exportado: o segmento não fecha enquanto o array existir
+            array = np.frombuffer(segmento.buf, dtype=np.dtype(coluna['dtype']),
+                                  count=tabela['linhas'], offset=coluna['deslocamento'])
+            array.flags.writeable = False
+            if coluna['categorias'] is not None:
+                tipo = pd.CategoricalDtype(coluna['categorias'], ordered=coluna['ordenada'])
+                array = pd.Categorical.from_codes(array, dtype=tipo, validate=False)
+            colunas[coluna['nome']] = array
+        agregados[nome] = pd.DataFrame(colunas, copy=False)
+
+    return agregados
+
+def _liberar_antigos():
+
+    #um segmento só pode ser fechado quando nenhuma tabela aponta mais para ele
+    for segmento in list(_antigos):
+        try:
+            segmento.close()
+        except BufferError:
+            continue
+        _antigos.remove(segmento)
+
+def _anexar_publicacao(caminho, manifesto):
+
+    """ Agregados do segmento descrito pelo manifesto, anexado uma única vez por processo.
+
+        Input: caminho absoluto do CSV e manifesto
+        Output: Agregados ou None se o segmento foi removido depois da leitura do manifesto
+    """
+
+    with _anexados_lock:
+        nome, agregados = _anexados.get(caminho, (None, None))
+        if nome == manifesto['segmento']:
+            return agregados
+
+        try:
+            segmento = _abrir_segmento(manifesto['segmento'])
+        except FileNotFoundError:
+            return None
+
+        agregados = _montar(manifesto, segmento)
+        if caminho in _anexados:
+            _antigos.append(_anexados[caminho][1].segmento)
+        agregados.segmento = segmento
+        _anexados[caminho] = (segmento.name, agregados)
+        _liberar_antigos()
+
+        return agregados
+
+def anexar(caminho=dados.CAMINHO_DATASET, espera=ESPERA):
+
+    """ Agregados publicados pelo trabalhador para a versão atual do CSV.
+
+        Se o trabalhador está ativo mas ainda reconstrói os agregados de um CSV
+        alterado, espera até `espera` segundos pela nova publicação e, passado
+        esse tempo, serve a publicação anterior (sem esperar de novo nos reruns
+        seguintes) até a nova ficar pronta.
+
+        Input: caminho do CSV e tempo máximo de espera em segundos
+        Output: Agregados (somente leitura) ou None se não houver publicação utilizável
+    """
+
+    chave = dados._chave(caminho)
+    limite = time.monotonic() + espera
+
+    while True:
+        manifesto = ler_manifesto(caminho)
+        if manifesto is None or not _trabalhador_ativo(manifesto):
+            return None
+
+        atual = tuple(manifesto['origem']) == chave
+        if not atual and time.monotonic() >= limite:
+            _esperas_expiradas[chave[0]] = chave
+
+        if atual or _esperas_expiradas.get(chave[0]) == chave:
+            agregados = _anexar_publicacao(chave[0], manifesto)
+            if agregados is not None:
+                return agregados
+            #o segmento foi substituído entre a leitura do manifesto e a anexação
+            continue
+
+        time.sleep(0.1)
+
+def _sinal_de_vida(caminho, intervalo, parar):
+
+    """ Toca o manifesto a cada intervalo até `parar`, inclusive durante uma reconstrução dos agregados. """
+
+    destino = caminho_manifesto(caminho)
+    while not parar.wait(intervalo):
+        try:
+            os.utime(destino)
+        except OSError:
+            #nada publicado ainda
+            pass
+
+def trabalhar(caminho=dados.CAMINHO_DATASET, intervalo=INTERVALO):
+
+    """ Laço do processo trabalhador: publica os agregados e republica quando o CSV muda.
+
+        Os agregados são montados pelo modo em memória (com ingestão incremental
+        das linhas novas). Uma thread à parte toca o manifesto a cada intervalo
+        como sinal de vida, então uma reconstrução demorada não faz as páginas
+        darem o trabalhador como parado. Ao terminar, remove o segmento e o manifesto.
+
+        Input: caminho do CSV e intervalo entre verificações em segundos
+    """
+
+    contador = itertools.count()
+    publicado = None
+    origem = None
+
+    parar = threading.Event()
+    threading.Thread(target=_sinal_de_vida, args=(caminho, intervalo, parar), name='sinal_de_vida',
+                     daemon=True).start()
+
+    try:
+        while True:
+            chave = dados._chave(caminho)
+            if chave != origem:
+                agregados = _agregados.carregar_agregados(caminho, modo='memoria')
+                nome = 'nf_{}_{}'.format(os.getpid(), next(contador))
+                #a origem é a versão de que os agregados foram montados, que pode ser mais nova que chave
+                novo = publicar(agregados, caminho, agregados.versao, nome, intervalo)
+                if publicado is not None:
+                    publicado.close()
+                    publicado.unlink()
+                publicado, origem = novo, agregados.versao
+                print('Publicado {} ({} bytes) para {}'.format(novo.name, novo.size, chave[0]), flush=True)
+
+            time.sleep(intervalo)
+    finally:
+        parar.set()
+        if publicado is not None:
+            try:
+                os.remove(caminho_manifesto(caminho))
+            except OSError:
+                pass
+            publicado.close()
+            publicado.unlink()
+
+def _terminar(*_):
+    raise SystemExit(0)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Publica os agregados do dataset em memória compartilhada.')
+    parser.add_argument('caminho', nargs='?', default=dados.CAMINHO_DATASET, help='caminho do train.csv')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO,
+                        help='segundos entre verificações do CSV')
+    args = parser.parse_args(argv)
+
+    #SIGTERM também passa pelo finally de trabalhar() e remove o segmento
+    signal.signal(signal.SIGTERM, _terminar)
+
+    try:
+        trabalhar(args.caminho, args.intervalo)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
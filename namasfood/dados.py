@@ -0,0 +1,413 @@
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+
+from namasfood import cache_colunar
+from namasfood.distancia import distancia_entregas
+from namasfood.instrumentacao import medir
+from namasfood.restaurantes import chaves_conhecidas, estender_restaurantes, identificar_restaurantes
+
+# =========================================================================
+# Carregamento e limpeza do dataset
+# =========================================================================
+
+CAMINHO_DATASET = 'food_delivery_dataset/train.csv'
+
+# incrementar sempre que clean_code() mudar o resultado, para invalidar o cache em disco
+VERSAO_LIMPEZA = 8
+
+# tamanho dos blocos lidos ao calcular a impressão digital da parte já lida do CSV
+BLOCO_IMPRESSAO = 1024 * 1024
+
+# cache do processo: caminho absoluto -> estado do dataset carregado
+#   df1: dataframe limpo; mtime_ns: versão do arquivo; origem: bytes já lidos e sua impressão;
+#   restaurantes: chaves dos restaurantes na ordem dos IDs; derivados: nome -> (objeto, incrementar)
+_cache = {}
+_cache_lock = threading.RLock()
+
+# colunas cujas linhas com 'NaN ' são descartadas na limpeza
+COLS_OBRIGATORIAS = ['Delivery_person_Age', 'City', 'Road_traffic_density', 'Festival',
+                     'multiple_deliveries']
+
+# colunas de texto com poucos valores distintos, guardadas como categóricas
+COLS_CATEGORICAS = ['City', 'Road_traffic_density', 'Weatherconditions', 'Type_of_order',
+                    'Type_of_vehicle', 'Festival']
+
+# colunas numéricas guardadas em float32 (coordenadas e avaliação)
+COLS_FLOAT32 = ['Delivery_person_Ratings', 'Restaurant_latitude', 'Restaurant_longitude',
+                'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# tipos declarados já na leitura do CSV
+DTYPES_CSV = {
+    'ID': str,
+    'Delivery_person_ID': str,
+    'Delivery_person_Age': 'float32',
+    'Order_Date': str,
+    'Time_Orderd': str,
+    'Time_Order_picked': str,
+    'Vehicle_condition': 'int8',
+    'multiple_deliveries': 'float32',
+    'Time_taken(min)': 'category',
+    **{col: 'float32' for col in COLS_FLOAT32},
+    **{col: 'category' for col in COLS_CATEGORICAS},
+}
+
+# o dataset marca valores ausentes com o texto 'NaN ' (com espaço no final)
+NA_VALUES_CSV = {col: ['NaN '] for col in COLS_OBRIGATORIAS +
+                 ['Delivery_person_Ratings', 'Time_Orderd']}
+
+def _renomear_categorias(serie, funcao):
+
+    """ Aplica uma função de texto apenas às categorias (e não a cada linha) de uma série categórica. """
+
+    categorias = serie.cat.categories
+    novas = [funcao(c) for c in categorias]
+
+    if len(set(novas)) != len(novas):
+        #duas categorias viraram a mesma: recria a série a partir do texto
+        return serie.astype(str).map(funcao).astype('category')
+
+    serie = serie.cat.rename_categories(novas)
+    return serie.cat.reorder_categories(sorted(novas))
+
+def semana_do_ano(datas):
+
+    """ Semana do ano com domingo como primeiro dia, igual a strftime('%U'), mas vetorizada e inteira.
+
+        Os dias antes do primeiro domingo do ano ficam na semana 0.
+
+        Input: série de datas
+        Output: série int8
+    """
+
+    domingo_zero = (datas.dt.dayofweek + 1) % 7
+    return ((datas.dt.dayofyear + 6 - domingo_zero) // 7).astype('int8')
+
+@medir
+def clean_code(df1):
+    
+    """ Essa funcão tem a responsabilidade de limpar o dataframe.
+
+        Espera o dataframe bruto lido por ler_csv(), com os tipos e os valores
+        'NaN ' já declarados na leitura, e faz a limpeza em uma única passada.
+    
+        Tipos de limpeza:
+            1. Remocao dos dados NaN (uma única máscara para todas as colunas)
+            2. Mudanca do tipo da coluna de dados (tipos compactos: int8/int16, float32, category)
+            3. Remocao dos espacos das variáveis de texto
+            4. Formatacao das colunas de datas
+            5. Limpeza das colunas de horário (remocao do texto da variável numérica)
+            6. Cálculo da distância de cada entrega (coluna distancia, em km)
+            7. Identificação dos restaurantes (coluna Restaurant_ID)
+            8. Colunas de calendário inteiras (week_of_year, day_of_week, hour_of_order)
+        
+        Input: Dataframe
+        Output: Dataframe
+    """
+    
+    #removendo dados NaN com uma única máscara e uma única cópia
+    linhas_validas = df1[COLS_OBRIGATORIAS].notna().all(axis=1)
+    df1 = df1.loc[linhas_validas, :].reset_index(drop=True)
+    
+    #convertendo colunas Age e multiple_deliveries para o menor tipo inteiro que comporta os dados
+    df1['Delivery_person_Age'] = pd.to_numeric(df1['Delivery_person_Age'].astype(int), downcast='integer')
+    df1['multiple_deliveries'] = pd.to_numeric(df1['multiple_deliveries'].astype(int), downcast='integer')
+    
+    #convertendo datas e horários com formatos explícitos
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    horario_pedido = pd.to_datetime(df1['Time_Orderd'], format='%H:%M:%S')
+    df1['Time_Orderd'] = horario_pedido.dt.time
+    df1['Time_Order_picked'] = pd.to_datetime(df1['Time_Order_picked'], format='%H:%M:%S')
+    
+    #removendo os espaços em excesso das colunas de texto livre
+    for col in ['ID', 'Delivery_person_ID']:
+        df1[col] = df1[col].str.strip()
+    
+    #nas colunas categóricas a limpeza é feita só nas categorias
+    for col in COLS_CATEGORICAS:
+        df1[col] = _renomear_categorias(df1[col].cat.remove_unused_categories(), str.strip)
+    
+    #removendo o texto 'conditions ' da coluna Weatherconditions. strip remove os caracteres do
+    #conjunto nas duas pontas, como a versão original: 'conditions Sandstorms' vira 'Sandstorm',
+    #o valor que os filtros das páginas oferecem
+    df1['Weatherconditions'] = _renomear_categorias(df1['Weatherconditions'],
+                                                    lambda c: c.strip('conditions '))
+    
+    #removendo o texto '(min) ' da coluna Time_taken(min): converte cada categoria uma vez
+    tempos = df1['Time_taken(min)'].cat
+    minutos = tempos.categories.str.replace('(min)', '', regex=False).str.strip().astype(int)
+    df1['Time_taken(min)'] = pd.to_numeric(minutos.to_numpy()[tempos.codes], downcast='integer')
+
+    #calculando a distância entre restaurante e local de entrega (haversine vetorizado)
+    df1['distancia'] = distancia_entregas(df1).astype('float32')
+
+    #identificando os restaurantes pelas coordenadas quantizadas
+    df1['Restaurant_ID'] = identificar_restaurantes(df1)
+
+    #colunas de calendário calculadas uma única vez, sem formatar texto linha a linha
+    df1['week_of_year'] = semana_do_ano(df1['Order_Date'])
+    df1['day_of_week'] = df1['Order_Date'].dt.dayofweek.astype('int8')
+    df1['hour_of_order'] = horario_pedido.dt.hour.astype('Int8')
+
+    return df1
+
+def _chave(caminho):
+    caminho = os.path.abspath(caminho)
+    return (caminho, os.stat(caminho).st_mtime_ns)
+
+@medir
+def ler_csv(caminho, **kwargs):
+
+    """ Lê o CSV bruto do dataset, declarando tipos e valores ausentes na leitura.
+
+        Input: caminho do CSV (ou buffer) e argumentos extras para pd.read_csv
+        Output: Dataframe bruto
+    """
+
+    return pd.read_csv(caminho, dtype=DTYPES_CSV, na_values=NA_VALUES_CSV, **kwargs)
+
+def concatenar(*dfs):
+
+    """ Concatena dataframes limpos preservando as colunas categóricas.
+
+        As categorias de cada coluna são unidas (em ordem alfabética, como na
+        limpeza) antes da concatenação; sem isso o pandas converteria as colunas
+        para texto.
+
+        Input: dataframes limpos (ou cubos) com as mesmas colunas
+        Output: Dataframe concatenado com índice novo
+    """
+
+    dfs = [df for df in dfs if len(df) > 0] or list(dfs[:1])
+    dfs = [df.copy(deep=False) for df in dfs]
+
+    for col in dfs[0].columns:
+        if isinstance(dfs[0][col].dtype, pd.CategoricalDtype):
+            categorias = sorted(set().union(*(df[col].cat.categories for df in dfs)))
+            for df in dfs:
+                df[col] = df[col].cat.set_categories(categorias)
+
+    return pd.concat(dfs, ignore_index=True)
+
+def _impressao(caminho, tamanho):
+
+    """ Impressão digital dos primeiros `tamanho` bytes do arquivo (todos eles, lidos em blocos).
+
+        Ler os bytes custa muito menos que interpretá-los, então o prefixo inteiro
+        é conferido: qualquer alteração em uma linha já lida muda a impressão,
+        mesmo que o tamanho do arquivo continue o mesmo.
+    """
+
+    impressao = hashlib.sha1(str(tamanho).encode())
+
+    with open(caminho, 'rb') as f:
+        restante = tamanho
+        while restante > 0:
+            bloco = f.read(min(restante, BLOCO_IMPRESSAO))
+            if not bloco:
+                break
+            impressao.update(bloco)
+            restante -= len(bloco)
+
+    return impressao.hexdigest()
+
+def _origem(caminho, tamanho):
+    return {'versao': VERSAO_LIMPEZA, 'tamanho': tamanho, 'impressao': _impressao(caminho, tamanho)}
+
+def origem_valida(caminho, origem):
+
+    """ Indica se o CSV atual ainda começa com os bytes que geraram um dataframe limpo.
+
+        Vale quando a versão da limpeza é a mesma e o arquivo só cresceu desde
+        então (novas linhas no final). A parte já lida é conferida por inteiro
+        (ver _impressao), então qualquer edição de uma linha existente, inclusive
+        uma que mantém o tamanho do arquivo, invalida a origem.
+
+        Input: caminho do CSV e origem registrada ({versao, tamanho, impressao})
+        Output: True ou False
+    """
+
+    return (isinstance(origem, dict) and
+            origem.get('versao') == VERSAO_LIMPEZA and
+            os.path.getsize(caminho) >= origem.get('tamanho', -1) and
+            _impressao(caminho, origem['tamanho']) == origem.get('impressao'))
+
+class _ArquivoLimitado(io.RawIOBase):
+
+    """ Leitura de um arquivo até um número máximo de bytes, para não ler linhas gravadas durante a carga. """
+
+    def __init__(self, arquivo, limite):
+        self._arquivo = arquivo
+        self._restante = limite
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._restante)
+        dados = self._arquivo.read(n)
+        buffer[:len(dados)] = dados
+        self._restante -= len(dados)
+        return len(dados)
+
+def _ler_completo(caminho):
+
+    """ Lê e limpa o CSV inteiro, registrando até onde o arquivo foi lido. """
+
+    tamanho = os.path.getsize(caminho)
+
+    with open(caminho, 'rb') as f:
+        df1 = clean_code(ler_csv(io.BufferedReader(_ArquivoLimitado(f, tamanho))))
+
+    return {'df1': df1, 'origem': _origem(caminho, tamanho), 'restaurantes': None, 'derivados': {}}
+
+def _ingerir(caminho, estado):
+
+    """ Lê, limpa e acrescenta ao estado apenas as linhas gravadas depois da última leitura.
+
+        Os IDs de restaurante já atribuídos são mantidos e as estruturas derivadas
+        que sabem se atualizar (ver carregar_derivado) recebem só as linhas novas;
+        as demais são descartadas e reconstruídas sob demanda.
+
+        Input: caminho do CSV e estado atual (com origem válida)
+        Output: novo estado
+    """
+
+    inicio = estado['origem']['tamanho']
+    tamanho = os.path.getsize(caminho)
+
+    with open(caminho, 'rb') as f:
+        cabecalho = f.readline()
+        f.seek(inicio)
+        corpo = f.read(tamanho - inicio)
+
+    if not corpo.strip():
+        return dict(estado, origem=_origem(caminho, tamanho))
+
+    novos = clean_code(ler_csv(io.BytesIO(cabecalho + corpo)))
+
+    conhecidas = estado['restaurantes']
+    if conhecidas is None:
+        conhecidas = chaves_conhecidas(estado['df1'])
+    novos['Restaurant_ID'], conhecidas = estender_restaurantes(novos, conhecidas)
+
+    derivados = {}
+    for nome, (valor, incrementar) in estado['derivados'].items():
+        if incrementar is not None:
+            derivados[nome] = (incrementar(valor, novos), incrementar)
+
+    return {'df1': concatenar(estado['df1'], novos), 'origem': _origem(caminho, tamanho),
+            'restaurantes': conhecidas, 'derivados': derivados}
+
+def _ler_cache_disco(caminho):
+
+    """ Estado a partir do cache colunar em disco, se ele ainda for um prefixo válido do CSV. """
+
+    origem = cache_colunar.ler_origem(caminho)
+    if not origem_valida(caminho, origem):
+        return None
+
+    df1 = cache_colunar.ler_cache(caminho)
+    if df1 is None:
+        return None
+
+    return {'df1': df1, 'origem': origem, 'restaurantes': None, 'derivados': {}}
+
+def reconstruir_cache(caminho=CAMINHO_DATASET):
+
+    """ Lê o CSV inteiro e regrava o cache colunar em disco.
+
+        Input: caminho do CSV
+        Output: (caminho do cache gravado ou None, quantidade de linhas limpas)
+    """
+
+    estado = _ler_completo(os.path.abspath(caminho))
+    gravado = cache_colunar.gravar_cache(estado['df1'], caminho, estado['origem'])
+
+    return gravado, len(estado['df1'])
+
+def carregar_dados(caminho=CAMINHO_DATASET):
+
+    """ Carrega o dataset limpo, lendo e limpando o CSV uma única vez por processo.
+
+        O resultado fica em um cache compartilhado por todas as páginas e sessões.
+        A cada chamada a data de modificação (mtime) do arquivo é conferida:
+            - se o CSV só recebeu linhas novas no final, apenas elas são lidas,
+              limpas e acrescentadas ao dataframe e às pré-agregações;
+            - se alguma linha já lida mudou, o arquivo é recarregado por inteiro.
+
+        Antes de ler o CSV, tenta o cache colunar em disco (ver cache_colunar);
+        quando ele não existe ou está desatualizado, o CSV é limpo e o cache é
+        regravado para a próxima carga fria. Um cache de uma versão anterior do
+        arquivo continua servindo quando o CSV só cresceu: as linhas que faltam
+        são ingeridas por cima dele.
+
+        O dataframe retornado é o mesmo objeto para todos os chamadores e deve ser
+        tratado como somente leitura: os filtros das páginas geram cópias novas.
+        O arquivo deve receber linhas completas (uma escrita por linha).
+
+        Input: caminho do CSV
+        Output: Dataframe limpo
+    """
+
+    return _carregar(_chave(caminho))
+
+def _carregar(chave):
+
+    caminho, mtime_ns = chave
+
+    with _cache_lock:
+        estado = _cache.get(caminho)
+
+        if estado is not None and estado['mtime_ns'] == mtime_ns:
+            return estado['df1']
+
+        if estado is None:
+            estado = _ler_cache_disco(caminho)
+        elif os.path.getsize(caminho) == estado['origem']['tamanho']:
+            #o arquivo foi modificado sem crescer: é uma reescrita, não um acréscimo
+            estado = None
+        elif not origem_valida(caminho, estado['origem']):
+            estado = None
+
+        if estado is None:
+            estado = _ler_completo(caminho)
+            cache_colunar.gravar_cache(estado['df1'], caminho, estado['origem'])
+        elif os.path.getsize(caminho) != estado['origem']['tamanho']:
+            estado = _ingerir(caminho, estado)
+
+        estado['mtime_ns'] = mtime_ns
+        _cache[caminho] = estado
+
+        return estado['df1']
+
+def carregar_derivado(nome, construir, caminho=CAMINHO_DATASET, incrementar=None, chave=None):
+
+    """ Retorna uma estrutura derivada do dataset limpo (cubo, índices...), construída uma vez.
+
+        A estrutura é guardada no mesmo cache do processo que o dataframe limpo.
+        Quando o CSV recebe linhas novas, incrementar(estrutura, linhas_novas_limpas)
+        é chamada para atualizá-la; sem incrementar, a estrutura é descartada e
+        reconstruída na próxima chamada. Se o CSV for recarregado por inteiro, ela
+        também é reconstruída.
+
+        Input: nome da estrutura, função construir(df1), caminho do CSV,
+               (opcional) função incrementar(estrutura, novos) e (opcional) a
+               versão do CSV (_chave) já conferida pelo chamador, para que ele
+               saiba de qual versão é a estrutura retornada
+        Output: objeto retornado por construir(df1)
+    """
+
+    chave = chave or _chave(caminho)
+
+    with _cache_lock:
+        _carregar(chave)
+        estado = _cache[chave[0]]
+
+        if nome not in estado['derivados']:
+            estado['derivados'][nome] = (construir(estado['df1']), incrementar)
+
+        return estado['derivados'][nome][0]
@@ -0,0 +1,38 @@
+""" Distância de grande círculo (haversine) vetorizada com NumPy.
+
+    Substitui o apply linha a linha com geopy.distance.geodesic: a fórmula de
+    haversine sobre a esfera de raio médio da Terra difere do geodésico no
+    elipsoide WGS84 em até ~0,6% (~0,2% em média), e é calculada para o dataset inteiro em
+    uma única operação vetorizada (ver benchmarks/bench_distancia.py).
+"""
+
+import numpy as np
+
+# raio médio da Terra (IUGG), em km
+RAIO_TERRA_KM = 6371.0088
+
+def haversine_km(lat1, lon1, lat2, lon2):
+
+    """ Distância em km entre pares de pontos (em graus), calculada em float64.
+
+        Input: arrays (ou séries) de latitude/longitude de origem e de destino
+        Output: array de distâncias em km
+    """
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='float64')) for v in (lat1, lon1, lat2, lon2))
+
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def distancia_entregas(df1):
+
+    """ Distância do restaurante ao local de entrega de cada pedido.
+
+        Input: Dataframe com as colunas Restaurant_* e Delivery_location_*
+        Output: array de distâncias em km
+    """
+
+    return haversine_km(df1['Restaurant_latitude'], df1['Restaurant_longitude'],
+                        df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
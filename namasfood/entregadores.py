@@ -0,0 +1,130 @@
+""" Agregações por entregador da Visão Entregadores, com execução paralela opcional.
+
+    Cada função tem uma parte que roda por partição de Delivery_person_ID
+    (funções _parcial_*) e uma combinação dos resultados parciais. Com um único
+    trabalhador há uma única partição e a combinação não muda nada; com vários,
+    o resultado é o mesmo da execução serial (ver namasfood.paralelo).
+
+    As páginas chamam as versões sobre os agregados filtrados (final do módulo),
+    que são agregações finais: no modo banco, cada uma é uma consulta SQL e a
+    tabela entregadores não sai do banco.
+"""
+
+import pandas as pd
+
+from namasfood.agregados import agregacao_final, combinar_estatisticas, contar_pedidos, extremos_por_grupo, media_std
+from namasfood.paralelo import executar
+
+def _parcial_avaliacao_entregador(entregadores):
+    return media_std(entregadores, 'Delivery_person_ID', n='avaliacoes', media='media_avaliacao',
+                     m2='m2_avaliacao', nomes=('Delivery_person_Ratings', 'Delivery_person_Ratings_std'))
+
+def avaliacao_por_entregador(entregadores, trabalhadores=None):
+
+    """ Avaliação média de cada entregador.
+
+        As partições têm entregadores disjuntos: a combinação só concatena e ordena.
+
+        Input: tabela entregadores (filtrada) e quantidade de trabalhadores
+        Output: Dataframe com Delivery_person_ID e Delivery_person_Ratings
+    """
+
+    parciais = executar(_parcial_avaliacao_entregador, entregadores, trabalhadores=trabalhadores)
+
+    df_aux = pd.concat(parciais, ignore_index=True)
+    if len(parciais) > 1:
+        df_aux = df_aux.sort_values('Delivery_person_ID', ignore_index=True)
+
+    return df_aux[['Delivery_person_ID', 'Delivery_person_Ratings']]
+
+def _parcial_avaliacao(entregadores, coluna):
+    return combinar_estatisticas(entregadores, coluna, n='avaliacoes', media='media_avaliacao',
+                                 m2='m2_avaliacao')
+
+def avaliacao_por(entregadores, coluna, trabalhadores=None):
+
+    """ Média e desvio padrão das avaliações por uma coluna (trânsito ou clima).
+
+        Cada partição devolve as estatísticas de Welford parciais de cada grupo, que
+        são combinadas como as de quaisquer outras partes.
+
+        Input: tabela entregadores (filtrada), coluna de agrupamento e quantidade de trabalhadores
+        Output: Dataframe com a coluna, delivery_mean e delivery_std
+    """
+
+    parciais = executar(_parcial_avaliacao, entregadores, coluna, trabalhadores=trabalhadores)
+
+    return media_std(pd.concat(parciais, ignore_index=True), coluna, n='avaliacoes',
+                     media='media_avaliacao', m2='m2_avaliacao', nomes=('delivery_mean', 'delivery_std'))
+
+def _parcial_extremos(entregadores, k):
+
+    df_aux = entregadores.groupby(['City', 'Delivery_person_ID'], observed=True)[['pedidos', 'soma_tempo']].sum()
+    df_aux['Time_taken(min)'] = df_aux['soma_tempo'] / df_aux['pedidos']
+    df_aux = df_aux[['Time_taken(min)']].reset_index()
+
+    return extremos_por_grupo(df_aux, 'City', 'Time_taken(min)', k)
+
+def extremos_entregadores(entregadores, k, trabalhadores=None):
+
+    """ Os k entregadores mais rápidos e os k mais lentos de cada cidade, pelo tempo médio.
+
+        Os k melhores de cada partição são candidatos; os k melhores da cidade estão
+        entre eles. Os candidatos voltam à ordem (City, Delivery_person_ID) da execução
+        serial antes da seleção final, para que os empates saiam iguais.
+
+        Input: tabela entregadores (filtrada), k e quantidade de trabalhadores
+        Output: tupla (mais rápidos, mais lentos) de Dataframes com City,
+                Delivery_person_ID e Time_taken(min)
+    """
+
+    parciais = executar(_parcial_extremos, entregadores, k, trabalhadores=trabalhadores)
+    if len(parciais) == 1:
+        return parciais[0]
+
+    resultado = []
+    #lado 0: mais rápidos (menores tempos); lado 1: mais lentos
+    for lado in (0, 1):
+        candidatos = pd.concat([parcial[lado] for parcial in parciais], ignore_index=True)
+        candidatos = candidatos.sort_values(['City', 'Delivery_person_ID'], ignore_index=True)
+        resultado.append(extremos_por_grupo(candidatos, 'City', 'Time_taken(min)', k)[lado])
+
+    return tuple(resultado)
+
+@agregacao_final
+def media_avaliacao_entregadores(agregados):
+
+    """ avaliacao_por_entregador sobre a tabela entregadores dos agregados filtrados. """
+
+    return avaliacao_por_entregador(agregados['entregadores'])
+
+@agregacao_final
+def media_avaliacao_por(agregados, coluna):
+
+    """ avaliacao_por sobre a tabela entregadores dos agregados filtrados. """
+
+    return avaliacao_por(agregados['entregadores'], coluna)
+
+@agregacao_final
+def ranking_entregadores(agregados, k):
+
+    """ extremos_entregadores sobre a tabela entregadores dos agregados filtrados. """
+
+    return extremos_entregadores(agregados['entregadores'], k)
+
+@agregacao_final
+def pedidos_por_entregador_semana(agregados):
+
+    """ Pedidos, entregadores distintos e pedidos por entregador em cada semana do ano.
+
+        Input: agregados filtrados (tabelas cubo e entregadores)
+        Output: Dataframe com week_of_year, ID (pedidos), Delivery_person_ID
+                (entregadores distintos) e order_by_deliver
+    """
+
+    df_aux01 = contar_pedidos(agregados['cubo'], 'week_of_year')
+    df_aux02 = agregados['entregadores'].groupby('week_of_year')['Delivery_person_ID'].nunique().reset_index()
+    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
+    df_aux['order_by_deliver'] = df_aux['ID'] / df_aux['Delivery_person_ID']
+
+    return df_aux
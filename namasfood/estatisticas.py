@@ -0,0 +1,126 @@
+""" Estatísticas combináveis (contagem, média e M2) no estilo de Welford.
+
+    Em vez de somas e somas dos quadrados, cada parte dos dados guarda
+    (n, média, M2), onde M2 é a soma dos quadrados dos desvios em relação à
+    média da parte. Duas partes se combinam pela fórmula de Chan et al., e uma
+    parte pode ser retirada de um total que a contém; não há a subtração de dois
+    números grandes e próximos que faz a variância por somas perder precisão.
+
+    As operações são aritméticas, então n, média e M2 podem ser escalares ou
+    arrays numpy do mesmo tamanho (uma estatística por elemento).
+"""
+
+import numpy as np
+
+class Estatisticas:
+
+    """ Estado (n, media, m2) de um conjunto de valores, combinável e subtraível.
+
+        Ex.:
+            total = Estatisticas.de_valores(dia1) + Estatisticas.de_valores(dia2)
+            total.media, total.desvio   # iguais a pd.Series(dia1 + dia2).mean() / .std()
+            (total - Estatisticas.de_valores(dia2)).media   # só o dia1
+    """
+
+    __slots__ = ('n', 'media', 'm2')
+
+    def __init__(self, n=0, media=0.0, m2=0.0):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+
+    @classmethod
+    def de_valores(cls, valores):
+
+        """ Estatísticas de uma sequência de valores (NaN são ignorados). """
+
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return cls()
+
+        media = valores.mean()
+        return cls(len(valores), media, float(((valores - media) ** 2).sum()))
+
+    def adicionar(self, valor):
+
+        """ Atualização de Welford com um único valor, no próprio objeto. """
+
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+    def combinar(self, outra):
+
+        """ Estatísticas da união das duas partes. """
+
+        n = self.n + outra.n
+        #em float64 do numpy, para que partes vazias (n = 0) não dividam por zero em Python puro
+        n_a, n_b, total = (np.asarray(valor, dtype='float64') for valor in (self.n, outra.n, n))
+        delta = np.asarray(outra.media, dtype='float64') - np.asarray(self.media, dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.where(total > 0, self.media + delta * n_b / total, 0.0)
+            m2 = np.where(total > 0, self.m2 + outra.m2 + delta * delta * n_a * n_b / total, 0.0)
+
+        return Estatisticas(n, media[()], m2[()])
+
+    def subtrair(self, outra):
+
+        """ Estatísticas do total sem a parte informada (que deve estar contida no total). """
+
+        n = self.n - outra.n
+        n_total, n_b, resto = (np.asarray(valor, dtype='float64') for valor in (self.n, outra.n, n))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.where(resto > 0, (n_total * self.media - n_b * outra.media) / resto, 0.0)
+            delta = outra.media - media
+            m2 = np.where(resto > 0, self.m2 - outra.m2 - delta * delta * resto * n_b / n_total, 0.0)
+
+        #arredondamentos não podem deixar M2 negativo
+        return Estatisticas(n, media[()], np.maximum(m2, 0.0)[()])
+
+    __add__ = combinar
+    __sub__ = subtrair
+
+    @property
+    def variancia(self):
+
+        """ Variância amostral (ddof=1, como no pandas); NaN com menos de dois valores. """
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(np.asarray(self.n) > 1, self.m2 / (np.asarray(self.n) - 1), np.nan)[()]
+
+    @property
+    def desvio(self):
+
+        """ Desvio padrão amostral (ddof=1). """
+
+        return np.sqrt(self.variancia)
+
+    def __repr__(self):
+        return 'Estatisticas(n={!r}, media={!r}, m2={!r})'.format(self.n, self.media, self.m2)
+
+def combinar_por_grupo(grupos, quantidade, n, media, m2):
+
+    """ Combina várias partes por grupo de uma vez (fórmula de Chan para k partes).
+
+        A média do grupo é a média das médias ponderada por n, e o M2 do grupo é a
+        soma dos M2 das partes mais n * (média da parte - média do grupo)².
+
+        Input: número do grupo de cada parte (0..quantidade-1), quantidade de grupos
+               e arrays n, media e m2 das partes
+        Output: Estatisticas com arrays de tamanho quantidade (média NaN em grupos com n = 0)
+    """
+
+    n = np.asarray(n, dtype='float64')
+    media = np.where(n > 0, np.asarray(media, dtype='float64'), 0.0)
+
+    total = np.bincount(grupos, weights=n, minlength=quantidade)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_grupo = np.bincount(grupos, weights=n * media, minlength=quantidade) / total
+
+    desvio = np.where(n > 0, media - media_grupo[grupos], 0.0)
+    m2_grupo = (np.bincount(grupos, weights=np.asarray(m2, dtype='float64'), minlength=quantidade)
+                + np.bincount(grupos, weights=n * desvio * desvio, minlength=quantidade))
+
+    return Estatisticas(total.astype('int64'), media_grupo, m2_grupo)
@@ -0,0 +1,79 @@
+""" Redução de séries temporais antes de montar os gráficos (LTTB).
+
+    Um gráfico com um ponto por dia cresce com o histórico: anos de pedidos viram
+    milhares de pontos que o Streamlit serializa para o navegador a cada rerun.
+    Acima de um orçamento de pontos (NAMASFOOD_PONTOS_GRAFICO, padrão 1500), a
+    série é reduzida com o Largest-Triangle-Three-Buckets (Steinarsson, 2013):
+    o primeiro e o último ponto são mantidos e, de cada balde intermediário, fica
+    o ponto que forma o maior triângulo com o ponto escolhido no balde anterior e
+    a média do balde seguinte. Picos e vales sobrevivem à redução, ao contrário
+    de uma amostragem a cada k pontos.
+
+    Abaixo do orçamento a série não muda, então o gráfico do dataset original
+    (algumas semanas) é o mesmo de antes.
+"""
+
+import os
+
+import numpy as np
+
+PONTOS_GRAFICO = int(os.environ.get('NAMASFOOD_PONTOS_GRAFICO', '1500'))
+
+def indices_lttb(x, y, limite):
+
+    """ Posições dos pontos mantidos pelo LTTB, em ordem crescente.
+
+        Input: arrays x (ordenado) e y numéricos e quantidade máxima de pontos
+        Output: array de posições (todas, se a série já cabe no limite)
+    """
+
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    #limite - 2 baldes entre o primeiro e o último ponto; bordas[i]:bordas[i+1] é o balde i
+    bordas = np.linspace(1, n - 1, limite - 1).astype('int64')
+    escolhidos = np.empty(limite, dtype='int64')
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        #o "balde" seguinte ao último é o último ponto da série
+        proximo_inicio, proximo_fim = (bordas[i + 1], bordas[i + 2]) if i + 2 < len(bordas) else (n - 1, n)
+        media_x = x[proximo_inicio:proximo_fim].mean()
+        media_y = y[proximo_inicio:proximo_fim].mean()
+
+        #o dobro da área do triângulo (anterior, candidato, média do próximo balde)
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+
+    return escolhidos
+
+def reduzir_serie(df_aux, x, y, limite=None):
+
+    """ Reduz uma série ordenada por x ao orçamento de pontos dos gráficos.
+
+        Input: Dataframe ordenado pela coluna x, nomes das colunas x (data ou
+               número) e y e quantidade máxima de pontos (padrão PONTOS_GRAFICO)
+        Output: o próprio Dataframe, se couber no limite, ou as linhas mantidas pelo LTTB
+    """
+
+    limite = PONTOS_GRAFICO if limite is None else limite
+    if len(df_aux) <= limite:
+        return df_aux
+
+    eixo_x = df_aux[x]
+    #datas entram como inteiros (a unidade não importa, só a proporção entre os intervalos)
+    if eixo_x.dtype.kind == 'M':
+        eixo_x = eixo_x.astype('int64')
+
+    posicoes = indices_lttb(eixo_x.to_numpy(), df_aux[y].to_numpy(dtype='float64'), limite)
+
+    return df_aux.iloc[posicoes].reset_index(drop=True)
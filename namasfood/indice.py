@@ -0,0 +1,69 @@
+""" Índice de filtros da barra lateral sobre uma tabela ordenada por Order_Date.
+
+    Em vez de varrer a tabela inteira com uma máscara booleana por filtro (e
+    copiar o resultado a cada passo), o índice guarda:
+
+        - as datas ordenadas, para que a data limite vire uma busca binária
+          (searchsorted) e um corte sem cópia (iloc[:corte]);
+        - as posições das linhas de cada combinação trânsito x clima, já
+          ordenadas, que são combinadas por união (as combinações são disjuntas).
+
+    Assim o custo do filtro acompanha o tamanho do resultado, e não o da tabela.
+"""
+
+import numpy as np
+import pandas as pd
+
+class IndiceFiltros:
+
+    """ Índice de data/trânsito/clima de uma tabela (dataset limpo ou tabela agregada). """
+
+    def __init__(self, tabela):
+
+        """ Input: Dataframe com Order_Date, Road_traffic_density e (opcional) Weatherconditions """
+
+        datas = tabela['Order_Date']
+        if not datas.is_monotonic_increasing:
+            tabela = tabela.sort_values('Order_Date', kind='stable', ignore_index=True)
+
+        self.tabela = tabela
+        self.datas = tabela['Order_Date'].to_numpy()
+        self.tem_clima = 'Weatherconditions' in tabela
+
+        colunas = ['Road_traffic_density'] + (['Weatherconditions'] if self.tem_clima else [])
+        self.posicoes = {}
+        for combinacao, posicoes in tabela.groupby(colunas, observed=True).indices.items():
+            combinacao = combinacao if isinstance(combinacao, tuple) else (combinacao,)
+            self.posicoes[combinacao] = np.sort(posicoes)
+
+        self.trafegos = {c[0] for c in self.posicoes}
+        self.climas = {c[1] for c in self.posicoes} if self.tem_clima else set()
+
+    def filtrar(self, date_slider, traffic_selection, weather_selection=None):
+
+        """ Linhas com Order_Date <= date_slider, trânsito e (opcional) clima selecionados.
+
+            Quando trânsito e clima cobrem todas as categorias presentes, o
+            resultado é um corte da tabela, sem cópia; caso contrário só as
+            posições selecionadas são lidas.
+
+            Input: data limite, condições de trânsito e (opcional) condições de clima
+            Output: Dataframe filtrado (somente leitura), na ordem da tabela
+        """
+
+        corte = int(np.searchsorted(self.datas, pd.Timestamp(date_slider).to_datetime64(), side='right'))
+
+        trafegos = self.trafegos.intersection(traffic_selection)
+        climas = self.climas if weather_selection is None else self.climas.intersection(weather_selection)
+
+        if trafegos == self.trafegos and climas == self.climas:
+            return self.tabela.iloc[:corte]
+
+        partes = [posicoes[:np.searchsorted(posicoes, corte)]
+                  for combinacao, posicoes in self.posicoes.items()
+                  if combinacao[0] in trafegos and (not self.tem_clima or combinacao[1] in climas)]
+
+        if not partes:
+            return self.tabela.iloc[:0]
+
+        return self.tabela.take(np.sort(np.concatenate(partes)))
@@ -0,0 +1,223 @@
+""" Instrumentação das páginas: tempo e memória de cada etapa de um rerun.
+
+    Cada página abre uma execução no início do script (iniciar_execucao) e a fecha
+    no fim (finalizar_execucao). Entre as duas, cada etapa marcada com
+    `with etapa(nome):` ou com o decorador @medir registra duração e variação da
+    memória residente do processo; etapas dentro de etapas aparecem como
+    'externa/interna'. Fora de uma execução (benchmarks, trabalhador), as
+    marcações não registram nada.
+
+    Saídas, todas opcionais (variáveis de ambiente):
+        NAMASFOOD_LOG      arquivo JSON lines; uma linha por rerun com as etapas
+        NAMASFOOD_DEBUG=1  painel na barra lateral com as etapas do rerun (também
+                           com ?debug=1 na URL)
+        NAMASFOOD_PERFIL   pasta onde cada rerun grava um perfil do cProfile
+                           (<pagina>-<horario>.prof, para pstats/snakeviz)
+
+    A memória é a do processo inteiro: com várias sessões simultâneas, a variação
+    de uma etapa inclui o que as outras alocaram no mesmo intervalo.
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+ARQUIVO_LOG = os.environ.get('NAMASFOOD_LOG')
+DEPURACAO = os.environ.get('NAMASFOOD_DEBUG') == '1'
+PASTA_PERFIL = os.environ.get('NAMASFOOD_PERFIL')
+
+# execução (rerun) em andamento na thread do script da sessão
+_execucao = contextvars.ContextVar('namasfood_execucao', default=None)
+_log_lock = threading.Lock()
+
+# execução cujo perfil está ligado (no Python >= 3.12 só um cProfile pode estar ativo no processo)
+_perfilada = None
+_perfil_lock = threading.Lock()
+
+try:
+    _PAGINA_BYTES = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGINA_BYTES = None
+
+def memoria_residente():
+
+    """ Memória residente (RSS) do processo em bytes, ou None onde /proc não existe. """
+
+    if _PAGINA_BYTES is None:
+        return None
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGINA_BYTES
+    except (OSError, IndexError, ValueError):
+        return None
+
+class Execucao:
+
+    """ Registro de um rerun de uma página: etapas na ordem em que terminaram. """
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.horario = datetime.now()
+        self.inicio = time.perf_counter()
+        self.etapas = []
+        self.pilha = []
+        self.perfil = None
+        self.thread = threading.current_thread()
+
+    def registrar(self, nome, segundos, memoria):
+        self.etapas.append({'etapa': nome, 'ms': round(1000 * segundos, 3),
+                            'memoria_mb': None if memoria is None else round(memoria / 2**20, 3)})
+
+@contextmanager
+def etapa(nome):
+
+    """ Marca um trecho como etapa da execução atual (sem efeito fora de uma execução). """
+
+    execucao = _execucao.get()
+    if execucao is None:
+        yield
+        return
+
+    execucao.pilha.append(nome)
+    caminho = '/'.join(execucao.pilha)
+    memoria = memoria_residente()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        execucao.pilha.pop()
+        depois = memoria_residente()
+        execucao.registrar(caminho, duracao, None if memoria is None or depois is None else depois - memoria)
+
+def medir(funcao=None, nome=None):
+
+    """ Decorador que registra cada chamada da função como uma etapa.
+
+        Ex.:
+            @medir
+            @memoizar
+            def qtde_pedidos_dia(cubo): ...
+
+        Acima de @memoizar, a etapa inclui a consulta ao cache (um acerto custa ~0 ms).
+    """
+
+    if funcao is None:
+        return functools.partial(medir, nome=nome)
+
+    nome = nome or funcao.__name__
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        with etapa(nome):
+            return funcao(*args, **kwargs)
+
+    return medida
+
+def _desligar_perfil(execucao):
+
+    """ Desliga o perfil da execução, se ele ainda estiver ligado (chamar com _perfil_lock). """
+
+    global _perfilada
+
+    if execucao.perfil is not None:
+        execucao.perfil.disable()
+    if _perfilada is execucao:
+        _perfilada = None
+
+def iniciar_execucao(pagina):
+
+    """ Abre o registro do rerun da página (chamar logo após st.set_page_config).
+
+        Um rerun interrompido (o Streamlit para o script quando um widget muda, e a
+        página pode levantar uma exceção) não chega a finalizar_execucao. O perfil
+        que ele deixou ligado é desligado aqui: o da execução anterior na mesma
+        thread e o de uma execução cuja thread já terminou. Sem isso, no Python
+        >= 3.12 nenhum outro perfil poderia ser ligado no processo.
+    """
+
+    global _perfilada
+
+    anterior = _execucao.get()
+    execucao = Execucao(pagina)
+    _execucao.set(execucao)
+
+    with _perfil_lock:
+        if anterior is not None:
+            _desligar_perfil(anterior)
+        if _perfilada is not None and not _perfilada.thread.is_alive():
+            _desligar_perfil(_perfilada)
+
+        if PASTA_PERFIL:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                execucao.perfil = perfil
+                _perfilada = execucao
+            except ValueError:
+                #outro perfil ativo no processo (outra sessão já está sendo perfilada)
+                pass
+
+    return execucao
+
+def _painel(execucao, total, cache):
+
+    #streamlit só é importado aqui: dados e agregados usam este módulo fora das páginas
+    import streamlit as st
+
+    with st.sidebar.expander('Depuração: tempo por etapa', expanded=True):
+        st.caption('Rerun de {}: {:.1f} ms'.format(execucao.pagina, 1000 * total))
+        st.dataframe(pd.DataFrame(execucao.etapas, columns=['etapa', 'ms', 'memoria_mb']), hide_index=True)
+        st.caption('Cache das agregações: {acertos} acertos, {falhas} falhas, {tamanho}/{maxsize} itens'
+                   .format(**cache))
+
+def _depuracao_na_url():
+    import streamlit as st
+
+    return st.query_params.get('debug') == '1'
+
+def finalizar_execucao():
+
+    """ Fecha o registro do rerun: grava o log e o perfil e mostra o painel de depuração.
+
+        Output: dicionário com o registro do rerun (o mesmo gravado no log) ou None
+    """
+
+    #import tardio: memo importa dados, que importa este módulo
+    from namasfood.memo import cache_agregacoes
+
+    execucao = _execucao.get()
+    if execucao is None:
+        return None
+    _execucao.set(None)
+
+    total = time.perf_counter() - execucao.inicio
+    registro = {'pagina': execucao.pagina, 'horario': execucao.horario.isoformat(timespec='milliseconds'),
+                'total_ms': round(1000 * total, 3), 'etapas': execucao.etapas,
+                'cache': cache_agregacoes.estatisticas()}
+
+    with _perfil_lock:
+        _desligar_perfil(execucao)
+
+    if execucao.perfil is not None:
+        os.makedirs(PASTA_PERFIL, exist_ok=True)
+        nome = '{}-{}.prof'.format(execucao.pagina, execucao.horario.strftime('%Y%m%d-%H%M%S-%f'))
+        registro['perfil'] = os.path.join(PASTA_PERFIL, nome)
+        execucao.perfil.dump_stats(registro['perfil'])
+
+    if ARQUIVO_LOG:
+        with _log_lock, open(ARQUIVO_LOG, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    if DEPURACAO or _depuracao_na_url():
+        _painel(execucao, total, registro['cache'])
+
+    return registro
@@ -0,0 +1,86 @@
+""" Renderização dos mapas do dashboard em lote.
+
+    Os pontos entram no mapa como uma única camada (GeoJSON para os marcadores,
+    HeatMap para a densidade), montada a partir de arrays, sem um objeto folium
+    por linha. O resultado é o HTML final do mapa, que pode ser guardado em
+    cache por estado dos filtros e enviado direto ao navegador.
+
+    O folium é importado só dentro das funções: o import leva centenas de ms e
+    só a aba geográfica da Visão Empresa precisa dele.
+"""
+
+import numpy as np
+
+# mesmas dimensões usadas pelo folium_static do streamlit_folium
+LARGURA = 700
+ALTURA = 500
+
+def _html(mapa):
+    import folium
+
+    return folium.Figure().add_child(mapa).render()
+
+def mapa_marcadores_html(df_aux, lat, lon, campos):
+
+    """ Mapa com um marcador por linha, em uma única camada GeoJSON.
+
+        Input: Dataframe com as coordenadas, nomes das colunas de latitude e
+               longitude e colunas exibidas no popup
+        Output: HTML do mapa
+    """
+
+    latitudes = df_aux[lat].to_numpy(dtype='float64')
+    longitudes = df_aux[lon].to_numpy(dtype='float64')
+    propriedades = df_aux[campos].astype(str).to_dict('records')
+
+    import folium
+
+    geojson = {
+        'type': 'FeatureCollection',
+        'features': [{'type': 'Feature',
+                      'geometry': {'type': 'Point', 'coordinates': [x, y]},
+                      'properties': p}
+                     for x, y, p in zip(longitudes.tolist(), latitudes.tolist(), propriedades)],
+    }
+
+    mapa = folium.Map()
+    folium.GeoJson(geojson, marker=folium.Marker(),
+                   popup=folium.GeoJsonPopup(fields=campos)).add_to(mapa)
+
+    return _html(mapa)
+
+def _pontos_calor(pontos, lat, lon, peso):
+
+    """ Soma os pesos das linhas com as mesmas coordenadas (o histograma de entregas
+        repete a coordenada para cada data, cidade e trânsito).
+
+        Input: Dataframe de pontos e nomes das colunas de latitude, longitude e peso
+        Output: array com uma linha [latitude, longitude, peso] por coordenada
+    """
+
+    somados = pontos.groupby([lat, lon], sort=False)[peso].sum()
+
+    return np.column_stack([somados.index.get_level_values(0).to_numpy(dtype='float64'),
+                            somados.index.get_level_values(1).to_numpy(dtype='float64'),
+                            somados.to_numpy(dtype='float64')])
+
+def mapa_calor_html(pontos, lat='latitude', lon='longitude', peso='pedidos'):
+
+    """ Mapa de densidade de todos os pontos em uma única camada HeatMap.
+
+        Input: Dataframe de pontos (por exemplo, o histograma de coordenadas de
+               entrega) e nomes das colunas de latitude, longitude e peso
+        Output: HTML do mapa
+    """
+
+    dados = _pontos_calor(pontos, lat, lon, peso)
+
+    import folium
+    from folium.plugins import HeatMap
+
+    mapa = folium.Map()
+    if len(dados):
+        HeatMap(dados.tolist()).add_to(mapa)
+        mapa.fit_bounds([dados[:, :2].min(axis=0).tolist(), dados[:, :2].max(axis=0).tolist()])
+
+    return _html(mapa)
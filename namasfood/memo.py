@@ -0,0 +1,117 @@
+""" Memoização das agregações das páginas por estado dos filtros.
+
+    Os usuários alternam entre poucas combinações de data limite e seleções de
+    trânsito/clima; cada combinação (mais a versão dos agregados servidos) vira uma chave e
+    o resultado de cada função de agregação fica em um cache LRU do processo,
+    compartilhado por todas as sessões.
+
+    Os resultados (dataframes e figuras) são compartilhados entre sessões e
+    devem ser tratados como somente leitura.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+
+    """ Cache limitado com descarte do item usado há mais tempo e contadores de acertos/falhas. """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, construir):
+
+        """ Retorna o valor da chave, chamando construir() e guardando o resultado em caso de falha. """
+
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+
+        #calculando fora do lock para não serializar as sessões
+        valor = construir()
+
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maxsize:
+                self._itens.popitem(last=False)
+
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas,
+                    'tamanho': len(self._itens), 'maxsize': self.maxsize}
+
+# cache compartilhado por todas as páginas e sessões do processo
+cache_agregacoes = CacheLRU(maxsize=256)
+
+def _congelar(valor):
+
+    """ Converte listas/dicionários/conjuntos em tuplas para que possam compor uma chave. """
+
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(_congelar(v) for v in valor))
+    return valor
+
+def chave_filtros(agregados, **filtros):
+
+    """ Chave do estado dos filtros de uma página, incluindo a versão dos agregados servidos.
+
+        A versão é a do CSV de que os agregados foram montados (agregados.versao), e
+        não a do arquivo no disco: enquanto um CSV alterado é reagregado, os
+        agregados antigos continuam sendo servidos com a chave antiga.
+
+        Ex.: chave_filtros(agregados, date_slider=date_slider, traffic_selection=traffic_selection)
+
+        Input: agregados carregados pela página e valores dos filtros da barra lateral
+        Output: tupla imutável usada como chave do cache
+    """
+
+    return (agregados.versao, _congelar(filtros))
+
+def memoizar(funcao=None, cache=cache_agregacoes):
+
+    """ Decorador que memoiza uma função de agregação pelo estado dos filtros.
+
+        A função decorada recebe o argumento extra filtros=chave_filtros(...). O
+        primeiro argumento (o dataframe ou o cubo já filtrado) não entra na chave,
+        pois é determinado pelos filtros; os demais argumentos entram.
+
+        Ex.:
+            @memoizar
+            def qtde_pedidos_dia(cubo): ...
+
+            fig = qtde_pedidos_dia(cubo, filtros=filtros)
+    """
+
+    if funcao is None:
+        return functools.partial(memoizar, cache=cache)
+
+    #as páginas do Streamlit rodam todas como __main__: o arquivo distingue funções homônimas
+    identificacao = (funcao.__code__.co_filename, funcao.__qualname__)
+
+    @functools.wraps(funcao)
+    def memoizada(dados_filtrados, *args, filtros, **kwargs):
+        chave = (identificacao, filtros, _congelar(args), _congelar(kwargs))
+        return cache.obter(chave, lambda: funcao(dados_filtrados, *args, **kwargs))
+
+    return memoizada
@@ -0,0 +1,59 @@
+""" Métricas do cabeçalho das páginas, calculadas de uma vez a partir dos agregados filtrados.
+
+    Cada cartão de métrica lê um campo do objeto de resultado, em vez de disparar
+    a sua própria agregação. O objeto é imutável e memoizado por estado dos
+    filtros, como as demais agregações das páginas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from namasfood.agregados import contar_distintos, media_std
+from namasfood.instrumentacao import medir
+from namasfood.memo import memoizar
+
+@dataclass(frozen=True)
+class MetricasRestaurantes:
+
+    """ Métricas gerais da Visão Restaurantes (tempos em minutos, distância em km). """
+
+    entregadores: int
+    restaurantes: int
+    distancia_media: float
+    tempo_medio_festival: float
+    tempo_std_festival: float
+    tempo_medio_sem_festival: float
+    tempo_std_sem_festival: float
+
+@medir
+@memoizar
+def metricas_restaurantes(agregados):
+
+    """ Calcula todas as métricas do cabeçalho da Visão Restaurantes.
+
+        Cada tabela é consultada uma única vez: um agrupamento por Festival no cubo
+        dá média e desvio padrão dos dois grupos, e o resumo dá a distância média.
+        As contagens de entregadores e restaurantes são agregações finais (no modo
+        banco, um count(DISTINCT) no SQL). Um grupo de Festival sem pedidos nos
+        filtros fica com NaN.
+
+        Input: agregados filtrados (com as tabelas cubo, entregadores, restaurantes e resumo)
+        Output: MetricasRestaurantes
+    """
+
+    festivais = media_std(agregados['cubo'], 'Festival').set_index('Festival')
+    festivais = festivais.reindex(['Yes', 'No'])
+
+    resumo = agregados['resumo']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distancia_media = np.float64(resumo['soma_distancia'].sum()) / resumo['pedidos'].sum()
+
+    return MetricasRestaurantes(
+        entregadores=contar_distintos(agregados, 'entregadores', 'Delivery_person_ID'),
+        restaurantes=contar_distintos(agregados, 'restaurantes', 'Restaurant_ID'),
+        distancia_media=float(distancia_media),
+        tempo_medio_festival=float(festivais.at['Yes', 'tempo_medio']),
+        tempo_std_festival=float(festivais.at['Yes', 'tempo_std']),
+        tempo_medio_sem_festival=float(festivais.at['No', 'tempo_medio']),
+        tempo_std_sem_festival=float(festivais.at['No', 'tempo_std']))
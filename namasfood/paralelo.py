@@ -0,0 +1,145 @@
+""" Execução opcional em vários processos, particionando as tabelas por entregador.
+
+    A tabela é dividida em partições disjuntas pelo hash de Delivery_person_ID
+    (todas as linhas de um entregador caem na mesma partição), cada partição é
+    agregada em um processo do pool e os resultados parciais são combinados por
+    quem chamou (ver namasfood.entregadores).
+
+    A quantidade de processos vem de NAMASFOOD_TRABALHADORES (padrão 1, sem pool:
+    tudo roda no próprio processo, com uma única partição). As partições são
+    serializadas para os processos, então o modo paralelo só compensa com tabelas
+    grandes e núcleos livres (ver benchmarks/bench_entregadores.py).
+
+    Os processos do pool são criados por fork, e só enquanto o processo tem uma
+    única thread: spawn e forkserver não servem, porque o Streamlit põe o script
+    da página em sys.modules['__main__'] e cada processo novo executaria a página
+    inteira ao preparar o __main__; e um fork dentro do servidor do Streamlit,
+    que já tem várias threads, pode herdar locks presos por elas. Para usar o
+    pool no dashboard, suba o Streamlit por este módulo, que cria o pool antes:
+
+        NAMASFOOD_TRABALHADORES=4 python -m namasfood.paralelo Home.py [opções do streamlit run]
+
+    Sem pool (servidor subido com streamlit run, ou pool quebrado porque um
+    processo morreu), as funções rodam no próprio processo, com uma partição.
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+TRABALHADORES = int(os.environ.get('NAMASFOOD_TRABALHADORES', '1'))
+
+# pools do processo: quantidade de trabalhadores -> ProcessPoolExecutor
+_pools = {}
+_pools_lock = threading.Lock()
+
+def iniciar(trabalhadores=None):
+
+    """ Pool com `trabalhadores` processos, todos já iniciados, criado uma única vez por processo.
+
+        O pool só é criado se o processo ainda tiver uma única thread (ver a
+        descrição do módulo); depois disso, só um pool já existente é retornado.
+
+        Input: quantidade de trabalhadores (padrão TRABALHADORES)
+        Output: ProcessPoolExecutor ou None se o pool não pode ser criado com segurança
+    """
+
+    trabalhadores = trabalhadores or TRABALHADORES
+
+    with _pools_lock:
+        if trabalhadores not in _pools:
+            if threading.active_count() > 1 or 'fork' not in multiprocessing.get_all_start_methods():
+                return None
+
+            pool = ProcessPoolExecutor(max_workers=trabalhadores, mp_context=multiprocessing.get_context('fork'))
+            #com fork, a primeira tarefa cria todos os processos de uma vez, ainda sem outras threads
+            pool.submit(int).result()
+            _pools[trabalhadores] = pool
+
+        return _pools[trabalhadores]
+
+def _descartar(trabalhadores, pool):
+    with _pools_lock:
+        if _pools.get(trabalhadores) is pool:
+            del _pools[trabalhadores]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def encerrar():
+
+    """ Encerra todos os pools do processo, esperando os processos terminarem. """
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+def particionar(tabela, coluna, partes):
+
+    """ Divide a tabela em partições disjuntas pelo hash dos valores de uma coluna.
+
+        O hash não depende do tipo da coluna (texto ou categórica), e cada partição
+        mantém a ordem original das linhas.
+
+        Input: Dataframe, coluna da chave de partição e quantidade de partições
+        Output: lista com `partes` Dataframes
+    """
+
+    particao = pd.util.hash_pandas_object(tabela[coluna], index=False).to_numpy() % np.uint64(partes)
+    ordem = np.argsort(particao, kind='stable')
+    limites = np.cumsum(np.bincount(particao.astype('int64'), minlength=partes))[:-1]
+
+    return [tabela.iloc[posicoes] for posicoes in np.split(ordem, limites)]
+
+def executar(funcao, tabela, *args, coluna='Delivery_person_ID', trabalhadores=None):
+
+    """ Aplica funcao(particao, *args) a cada partição da tabela, em paralelo.
+
+        Com um trabalhador, ou sem pool disponível, funcao recebe a tabela inteira
+        no próprio processo. Se o pool quebrar (um processo morto, por exemplo por
+        falta de memória), ele é descartado e a chamada é refeita no próprio processo.
+        funcao precisa ser definida em um módulo importável (não nas páginas), pois
+        é enviada aos processos do pool.
+
+        Input: função de agregação, Dataframe, argumentos extras da função, coluna
+               da chave de partição e quantidade de trabalhadores (padrão TRABALHADORES)
+        Output: lista com o resultado de cada partição
+    """
+
+    trabalhadores = trabalhadores or TRABALHADORES
+    pool = iniciar(trabalhadores) if trabalhadores > 1 else None
+    if pool is None:
+        return [funcao(tabela, *args)]
+
+    particoes = particionar(tabela, coluna, trabalhadores)
+    try:
+        return list(pool.map(funcao, particoes, *[[arg] * len(particoes) for arg in args]))
+    except BrokenProcessPool:
+        _descartar(trabalhadores, pool)
+        return [funcao(tabela, *args)]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description='Cria o pool de processos e depois sobe o Streamlit (streamlit run) no mesmo processo.')
+    parser.add_argument('script', help='script principal do Streamlit (Home.py)')
+    parser.add_argument('opcoes', nargs=argparse.REMAINDER, help='opções repassadas ao streamlit run')
+    args = parser.parse_args(argv)
+
+    if TRABALHADORES > 1 and iniciar(TRABALHADORES) is None:
+        parser.error('não foi possível criar o pool de processos (fork indisponível)')
+
+    #o Streamlit só é importado depois do fork: os processos do pool não carregam o servidor
+    from streamlit.web import cli
+
+    return cli.main(['run', args.script, *args.opcoes], prog_name='streamlit')
+
+if __name__ == '__main__':
+    raise SystemExit(main())
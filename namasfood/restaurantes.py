@@ -0,0 +1,84 @@
+""" Índice de identificação dos restaurantes.
+
+    O dataset não tem um ID de restaurante; cada restaurante é identificado pelo
+    par (latitude, longitude). O par é quantizado (1e-5 grau, ~1 m) e mapeado
+    para IDs inteiros densos (0..n-1) uma única vez na carga, de modo que
+    contagens distintas e agregações por restaurante viram operações sobre
+    inteiros, sem a colisão de restaurantes diferentes cuja soma lat + lon dá o
+    mesmo valor.
+"""
+
+import numpy as np
+import pandas as pd
+
+# passos por grau na quantização das coordenadas (1e-5 grau)
+QUANTIZACAO = 100_000
+
+def chave_restaurante(df1):
+
+    """ Chave int64 de cada pedido, formada pelas coordenadas quantizadas do restaurante.
+
+        Input: Dataframe com Restaurant_latitude e Restaurant_longitude
+        Output: array int64
+    """
+
+    lat = np.rint(df1['Restaurant_latitude'].to_numpy(dtype='float64') * QUANTIZACAO).astype('int64')
+    lon = np.rint(df1['Restaurant_longitude'].to_numpy(dtype='float64') * QUANTIZACAO).astype('int64')
+
+    #latitude em [-90, 90] e longitude em [-180, 180] cabem juntas em um único int64
+    return (lat + 90 * QUANTIZACAO) * (360 * QUANTIZACAO + 1) + (lon + 180 * QUANTIZACAO)
+
+def identificar_restaurantes(df1):
+
+    """ ID denso de restaurante de cada pedido, a partir das coordenadas quantizadas.
+
+        Os IDs seguem a ordem da primeira aparição de cada restaurante no arquivo,
+        então linhas acrescentadas ao final nunca mudam os IDs já atribuídos
+        (ver estender_restaurantes).
+
+        Input: Dataframe com Restaurant_latitude e Restaurant_longitude
+        Output: array int32 com o ID do restaurante de cada linha
+    """
+
+    codigos, _ = pd.factorize(chave_restaurante(df1), sort=False)
+
+    return codigos.astype('int32')
+
+def chaves_conhecidas(df1):
+
+    """ Chaves dos restaurantes já identificados, na ordem dos IDs (a posição é o ID). """
+
+    return pd.Index(pd.unique(chave_restaurante(df1)))
+
+def estender_restaurantes(novos, conhecidas):
+
+    """ Atribui IDs às linhas novas mantendo os IDs dos restaurantes já conhecidos.
+
+        Input: Dataframe com as linhas novas e Index de chaves conhecidas
+        Output: (array int32 de IDs, Index de chaves conhecidas atualizado)
+    """
+
+    chaves = chave_restaurante(novos)
+    ids = conhecidas.get_indexer(chaves)
+
+    desconhecidas = ids < 0
+    if desconhecidas.any():
+        novas_chaves = pd.unique(chaves[desconhecidas])
+        conhecidas = conhecidas.append(pd.Index(novas_chaves))
+        ids[desconhecidas] = conhecidas.get_indexer(chaves[desconhecidas])
+
+    return ids.astype('int32'), conhecidas
+
+def contar_restaurantes(ids):
+
+    """ Quantidade de restaurantes distintos entre os IDs informados, em O(n) sem ordenação.
+
+        Input: série ou array de Restaurant_ID
+        Output: inteiro
+    """
+
+    ids = np.asarray(ids)
+    if len(ids) == 0:
+        return 0
+
+    return int(np.count_nonzero(np.bincount(ids)))
@@ -0,0 +1,111 @@
+""" Tabela paginada para as páginas do Streamlit, com ordenação e busca no servidor.
+
+    O st.dataframe serializa e envia ao navegador todas as linhas que recebe, a
+    cada rerun. Aqui a tabela completa fica no servidor (memoizada por estado dos
+    filtros, como as demais agregações), com as ordens de cada coluna calculadas
+    uma única vez, e só as linhas da página visível vão para o st.dataframe.
+
+    Uso:
+        @memoizar
+        def avaliacao_media_entregador(agregados):
+            return TabelaOrdenada(media_avaliacao_entregadores(agregados), busca='Delivery_person_ID')
+
+        tabela_paginada(avaliacao_media_entregador(agregados, filtros=filtros), chave='avaliacoes')
+"""
+
+import math
+
+import numpy as np
+import streamlit as st
+
+LINHAS_POR_PAGINA = 50
+
+class TabelaOrdenada:
+
+    """ Dataframe com as ordens das linhas por coluna e busca por texto em uma coluna.
+
+        As ordens são calculadas na primeira vez em que cada coluna/sentido é pedido
+        e reaproveitadas por todas as sessões que compartilham o objeto.
+    """
+
+    def __init__(self, df, busca):
+        self.df = df.reset_index(drop=True)
+        self.busca = busca
+        self._ordens = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def ordem(self, coluna, decrescente=False):
+
+        """ Posições das linhas ordenadas pela coluna (ordenação estável, ausentes no fim). """
+
+        chave = (coluna, decrescente)
+        if chave not in self._ordens:
+            ordenado = self.df[coluna].sort_values(ascending=not decrescente, kind='stable', na_position='last')
+            self._ordens[chave] = ordenado.index.to_numpy()
+        return self._ordens[chave]
+
+    def posicoes(self, coluna=None, decrescente=False, texto=''):
+
+        """ Posições das linhas que contêm o texto na coluna de busca, na ordem pedida.
+
+            Input: coluna de ordenação (None mantém a ordem original), sentido e
+                   texto buscado (sem diferenciar maiúsculas; vazio não filtra)
+            Output: array de posições no Dataframe
+        """
+
+        posicoes = np.arange(len(self.df)) if coluna is None else self.ordem(coluna, decrescente)
+
+        if texto:
+            encontrados = self.df[self.busca].str.contains(texto, case=False, regex=False, na=False).to_numpy()
+            posicoes = posicoes[encontrados[posicoes]]
+
+        return posicoes
+
+    def pagina(self, posicoes, numero, tamanho=LINHAS_POR_PAGINA):
+
+        """ Linhas da página `numero` (a partir de 1) de uma seleção de posições. """
+
+        inicio = (numero - 1) * tamanho
+        return self.df.iloc[posicoes[inicio:inicio + tamanho]]
+
+def _primeira_pagina(chave_pagina):
+    st.session_state[chave_pagina] = 1
+
+def tabela_paginada(tabela, chave, tamanho=LINHAS_POR_PAGINA):
+
+    """ Mostra uma página da tabela com busca, ordenação e navegação entre páginas.
+
+        Input: TabelaOrdenada, chave dos widgets (única na página) e linhas por página
+        Output: Dataframe da página exibida
+    """
+
+    #mudar a busca ou a ordem volta para a primeira página
+    chave_pagina = chave + '_pagina'
+    volta = {'on_change': _primeira_pagina, 'args': (chave_pagina,)}
+
+    col1, col2, col3 = st.columns([2, 2, 1], vertical_alignment='bottom')
+    texto = col1.text_input('Buscar ' + tabela.busca, key=chave + '_busca', **volta)
+    coluna = col2.selectbox('Ordenar por', list(tabela.df.columns), key=chave + '_coluna', **volta)
+    decrescente = col3.toggle('Decrescente', key=chave + '_decrescente', **volta)
+
+    posicoes = tabela.posicoes(coluna, decrescente, texto.strip())
+    paginas = max(1, math.ceil(len(posicoes) / tamanho))
+
+    #um filtro novo na barra lateral pode deixar a página atual além da última
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+
+    numero = st.number_input('Página', min_value=1, max_value=paginas, step=1, key=chave_pagina)
+    df_pagina = tabela.pagina(posicoes, numero, tamanho)
+
+    st.dataframe(df_pagina, hide_index=True)
+    if len(posicoes):
+        inicio = (numero - 1) * tamanho
+        st.caption('Linhas {} a {} de {} (página {} de {})'.format(
+            inicio + 1, inicio + len(df_pagina), len(posicoes), numero, paginas))
+    else:
+        st.caption('Nenhuma linha encontrada')
+
+    return df_pagina
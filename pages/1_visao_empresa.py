@@ -1,147 +1,106 @@
 #importando bibliotecas
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-import geopy.distance
 import streamlit as st
 from datetime import datetime
 from PIL import Image
-from streamlit_folium import folium_static
+from namasfood.abas import selecionar_aba
+from namasfood.agregados import carregar_agregados, contar_pedidos, filtrar_agregados, medianas_coordenadas
+from namasfood.entregadores import pedidos_por_entregador_semana
+from namasfood.graficos import reduzir_serie
+from namasfood.instrumentacao import etapa, finalizar_execucao, iniciar_execucao, medir
+from namasfood.mapa import ALTURA, LARGURA, mapa_calor_html, mapa_marcadores_html
+from namasfood.memo import chave_filtros, memoizar
 
 st.set_page_config(page_title='Visão Empresa', page_icon='📊', layout='wide')
+iniciar_execucao('empresa')
 
 # =========================================================================
 # Funções
 # =========================================================================
 
-def clean_code(df1):
-    
-    """ Essa funcão tem a responsabilidade de limpar o dataframe.
-    
-        Tipos de limpeza:
-            1. Remocao dos dados NaN
-            2. Mudanca do tipo da coluna de dados
-            3. Remocao dos espacos das variáveis de texto
-            4. Formatacao das colunas de datas
-            5. Limpeza das colunas de horário (remocao do texto da variável numérica)
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    
-    #removendo dados NaN
-    df1 = df1[df['Delivery_person_Age'] != 'NaN '].copy()
-    df1 = df1[df['City'] != 'NaN '].copy()
-    df1 = df1[df['Road_traffic_density'] != 'NaN '].copy()
-    df1 = df1[df['Festival'] != 'NaN '].copy()
-    df1 = df1[df1['multiple_deliveries'] != 'NaN '].copy()
-    
-    #convertendo colunas Age e Ratings de texto para número (int e float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    
-    #convertendo coluna Order Date para data
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-    
-    #convertendo Time_Orderd e Time_Order_picked para tempo (horário)
-    df1['Time_Orderd'] = pd.to_datetime(df1['Time_Orderd']).dt.time
-    df1['Time_Order_picked'] = pd.to_datetime(df1['Time_Order_picked'], format='%H:%M:%S')
-    
-    #convertendo multiple_deliveries para texto
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    #resetando index
-    df1 = df1.reset_index(drop=True)
-    
-    #removendo os espaços em excesso das colunas
-    cols_strip = ['ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
-                'Type_of_vehicle', 'Festival', 'City']
-    
-    for col in cols_strip:
-      df1.loc[:, col] = df1.loc[:, col].str.strip()
-    
-    #removendo o texto 'conditions ' da coluna Weatherconditions
-    df1['Weatherconditions'] = df1['Weatherconditions'].str.strip('conditions ')
-    
-    #removendo o texto '(min) ' da coluna Time_taken(min)
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip('(min) ').astype(int)
+@medir
+@memoizar
+def qtde_pedidos_dia(cubo):
 
-    return df1
-    
-def qtde_pedidos_dia(df1):
+    #plotly só é importado quando um gráfico é montado de fato (fora do cache)
+    import plotly.express as px
     
-    cols = ['ID','Order_Date']
-    df_aux = df1[cols].groupby('Order_Date').count().reset_index()
+    #um ponto por dia: com anos de histórico, a série é reduzida ao orçamento de pontos
+    df_aux = reduzir_serie(contar_pedidos(cubo, 'Order_Date'), 'Order_Date', 'ID')
     fig = px.bar(df_aux, x='Order_Date', y='ID')
     
     return fig
 
-def pedidos_tipo_trafego(df1):
+@medir
+@memoizar
+def pedidos_tipo_trafego(cubo):
+
+    import plotly.express as px
     
-    cols = ['ID','Road_traffic_density']
-    df_aux = df1[cols].groupby('Road_traffic_density').count().reset_index()
+    df_aux = contar_pedidos(cubo, 'Road_traffic_density')
     df_aux['entregas_pct'] = df_aux['ID'] / df_aux['ID'].sum()
     fig = px.pie(df_aux, values='entregas_pct', names='Road_traffic_density')
 
     return fig
 
-def pedidos_cidade_trafego(df1):
+@medir
+@memoizar
+def pedidos_cidade_trafego(cubo):
+
+    import plotly.express as px
     
-    cols = ['ID','City', 'Road_traffic_density']
-    df_aux = df1[cols].groupby(['City', 'Road_traffic_density']).count().reset_index()
+    df_aux = contar_pedidos(cubo, ['City', 'Road_traffic_density'])
     fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='ID', color='City')
     
     return fig
 
-def pedidos_semana(df1):    
+@medir
+@memoizar
+def pedidos_semana(cubo):    
+
+    import plotly.express as px
     
-    df1['week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-    cols = ['ID','week_of_year']
-    df_aux = df1[cols].groupby('week_of_year').count().reset_index() 
+    df_aux = contar_pedidos(cubo, 'week_of_year')
     fig = px.line(df_aux, x='week_of_year', y='ID')
 
     return fig
 
-def media_pedidos_entregador_semana(df1):
+@medir
+@memoizar
+def media_pedidos_entregador_semana(agregados):
+
+    import plotly.express as px
     
-    df_aux01 = df1[['ID','week_of_year']].groupby('week_of_year').count().reset_index()
-    df_aux02 = df1[['Delivery_person_ID','week_of_year']].groupby('week_of_year').nunique().reset_index()
-    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
-    df_aux['order_by_deliver'] = df_aux['ID']/df_aux['Delivery_person_ID']
+    #no modo banco, os entregadores distintos por semana são contados no SQL
+    df_aux = pedidos_por_entregador_semana(agregados)
     fig = px.line(df_aux, x='week_of_year', y='order_by_deliver')
 
     return fig
 
-def mapa_central_trafego(df1):
+@medir
+@memoizar
+def mapa_central_trafego(agregados):
     
-    cols = ['City', 'Delivery_location_latitude', 'Delivery_location_longitude', 'Road_traffic_density']
-    df_aux = df1[cols].groupby(['City', 'Road_traffic_density']).median().reset_index()
+    cols = ['City', 'Road_traffic_density']
+    df_aux = medianas_coordenadas(agregados, cols)
 
-    #Create base map
-    map = folium.Map()
-    
-    #Loop through each row in the dataframe
-    for index, location_info in df_aux.iterrows():
-        folium.Marker([location_info['Delivery_location_latitude'],
-                       location_info['Delivery_location_longitude']],
-                      popup = location_info[['City', 'Road_traffic_density']]).add_to(map)
-        
-    folium_static (map)
+    #um marcador por cidade/tráfego, todos em uma única camada
+    html = mapa_marcadores_html(df_aux, 'Delivery_location_latitude', 'Delivery_location_longitude', cols)
 
-    return None
-    
-# ============================ Início da estrutura lógica do código ============================
+    return html
+
+@medir
+@memoizar
+def mapa_calor_entregas(pontos):
 
-#importando dataset
-df = pd.read_csv('food_delivery_dataset/train.csv')
+    html = mapa_calor_html(pontos)
 
-#criando cópia do dataframe
-df1 = df.copy()
+    return html
+    
+# ============================ Início da estrutura lógica do código ============================
 
-#aplicando função de limpeza
-df1 = clean_code(df1)
+#importando os agregados do dataset (montados uma única vez por processo, compartilhados entre as páginas)
+with etapa('carregar_agregados'):
+    agregados = carregar_agregados()
 
 # =========================================================================
 # Header no Streamlit
@@ -183,24 +142,23 @@ st.sidebar.markdown("""---""")
 
 st.sidebar.markdown('## Criado por Rodolfo Stremel')
 
-# filtro de data
-linhas_selecionadas = df1['Order_Date'] <= date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+# filtros de data e trânsito aplicados a todas as tabelas agregadas
+agregados = filtrar_agregados(agregados, date_slider, traffic_selection)
+cubo = agregados['cubo']
 
-# filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_selection)
-df1 = df1.loc[linhas_selecionadas, :]
+# estado dos filtros, usado como chave do cache das agregações
+filtros = chave_filtros(agregados, date_slider=date_slider, traffic_selection=traffic_selection)
 
 # =========================================================================
 # Layout no Streamlit
 # =========================================================================
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial','Visão Tática','Visão Geográfica'])
+aba = selecionar_aba(['Visão Gerencial','Visão Tática','Visão Geográfica'])
 
-with tab1:
+if aba == 'Visão Gerencial':
     with st.container():
         st.markdown('### Quantidade de pedidos por dia')
-        fig = qtde_pedidos_dia(df1)
+        fig = qtde_pedidos_dia(cubo, filtros=filtros)
         st.plotly_chart(fig, use_container_width=True)
 
     with st.container():
@@ -208,26 +166,37 @@ with tab1:
         
         with col1:            
             st.markdown('### Distribuição dos pedidos por tipo de tráfego')
-            fig = pedidos_tipo_trafego(df1)
+            fig = pedidos_tipo_trafego(cubo, filtros=filtros)
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
             st.markdown('### Comparação do volume de pedidos por cidade e tipo de tráfego')
-            fig = pedidos_cidade_trafego(df1)
+            fig = pedidos_cidade_trafego(cubo, filtros=filtros)
             st.plotly_chart(fig, use_container_width=True)
 
-with tab2:
+elif aba == 'Visão Tática':
     with st.container():
         st.markdown('### Quantidade de pedidos por semana')
-        fig = pedidos_semana(df1)
+        fig = pedidos_semana(cubo, filtros=filtros)
         st.plotly_chart(fig, use_container_width=True)
 
     with st.container():
         st.markdown('### A quantidade média de pedidos por entregador por semana')
-        fig = media_pedidos_entregador_semana(df1)
+        fig = media_pedidos_entregador_semana(agregados, filtros=filtros)
         st.plotly_chart(fig, use_container_width=True)
 
-with tab3:
+elif aba == 'Visão Geográfica':
     
-    st.markdown('### Localização central de cada tipo por tráfego')
-    mapa_central_trafego(df1)
\ No newline at end of file
+    mapa_calor = st.checkbox('Mostrar a densidade de todas as entregas (mapa de calor)')
+
+    if mapa_calor:
+        st.markdown('### Densidade das entregas')
+        html = mapa_calor_entregas(agregados['pontos'], filtros=filtros)
+    else:
+        st.markdown('### Localização central de cada tipo por tráfego')
+        html = mapa_central_trafego(agregados, filtros=filtros)
+
+    st.iframe(html, width=LARGURA, height=ALTURA + 10)
+
+#tempo e memória de cada etapa deste rerun (log, perfil e painel de depuração opcionais)
+finalizar_execucao()
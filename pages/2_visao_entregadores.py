@@ -1,108 +1,57 @@
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-import geopy.distance
 import streamlit as st
 from datetime import datetime
 from PIL import Image
-from streamlit_folium import folium_static
+from namasfood.agregados import carregar_agregados, filtrar_agregados
+from namasfood.entregadores import media_avaliacao_entregadores, media_avaliacao_por, ranking_entregadores
+from namasfood.instrumentacao import etapa, finalizar_execucao, iniciar_execucao, medir
+from namasfood.memo import chave_filtros, memoizar
+from namasfood.tabela import TabelaOrdenada, tabela_paginada
 
 st.set_page_config(page_title='Visão Entregadores', page_icon='🚚', layout='wide')
+iniciar_execucao('entregadores')
 
 # =========================================================================
 # Funções
 # =========================================================================
 
-def clean_code(df1):
-    
-    """ Essa funcão tem a responsabilidade de limpar o dataframe.
-    
-        Tipos de limpeza:
-            1. Remocao dos dados NaN
-            2. Mudanca do tipo da coluna de dados
-            3. Remocao dos espacos das variáveis de texto
-            4. Formatacao das colunas de datas
-            5. Limpeza das colunas de horário (remocao do texto da variável numérica)
-        
-        Input: Dataframe
-        Output: Dataframe
+@medir
+@memoizar
+def top_entregadores(agregados, k):
+
+    """ Entregadores mais rápidos e mais lentos de cada cidade, pelo tempo médio de entrega.
+
+        Retorna a tupla (mais rápidos, mais lentos), com até k entregadores por cidade.
     """
-    
-    #removendo dados NaN
-    df1 = df1[df['Delivery_person_Age'] != 'NaN '].copy()
-    df1 = df1[df['City'] != 'NaN '].copy()
-    df1 = df1[df['Road_traffic_density'] != 'NaN '].copy()
-    df1 = df1[df['Festival'] != 'NaN '].copy()
-    df1 = df1[df1['multiple_deliveries'] != 'NaN '].copy()
-    
-    #convertendo colunas Age e Ratings de texto para número (int e float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    
-    #convertendo coluna Order Date para data
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-    
-    #convertendo Time_Orderd e Time_Order_picked para tempo (horário)
-    df1['Time_Orderd'] = pd.to_datetime(df1['Time_Orderd']).dt.time
-    df1['Time_Order_picked'] = pd.to_datetime(df1['Time_Order_picked'], format='%H:%M:%S')
-    
-    #convertendo multiple_deliveries para texto
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    #resetando index
-    df1 = df1.reset_index(drop=True)
-    
-    #removendo os espaços em excesso das colunas
-    cols_strip = ['ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
-                'Type_of_vehicle', 'Festival', 'City']
-    
-    for col in cols_strip:
-      df1.loc[:, col] = df1.loc[:, col].str.strip()
-    
-    #removendo o texto 'conditions ' da coluna Weatherconditions
-    df1['Weatherconditions'] = df1['Weatherconditions'].str.strip('conditions ')
-    
-    #removendo o texto '(min) ' da coluna Time_taken(min)
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip('(min) ').astype(int)
-
-    return df1
-
-def top_entregadores(df1, top_asc):
-    
-    cols = ['Delivery_person_ID','City','Time_taken(min)']
-    df2 = df1[cols].groupby(['City','Delivery_person_ID']).mean().sort_values(['City','Time_taken(min)'], ascending=top_asc).reset_index()
-    df2_metro = df2[df2['City'] == 'Metropolitian'].head(10)
-    df2_urban = df2[df2['City'] == 'Urban'].head(10)
-    df2_semiurban = df2[df2['City'] == 'Semi-Urban'].head(10)
-    df2 = pd.concat([df2_metro, df2_urban, df2_semiurban]).reset_index(drop=True)
 
-    return df2
+    return ranking_entregadores(agregados, k)
+
+@medir
+@memoizar
+def avaliacao_media_entregador(agregados):
 
-def avaliacao_media_std(df1, coluna):
+    """ Avaliação média de cada entregador, pronta para a tabela paginada (ordens e busca por ID). """
+
+    df2 = media_avaliacao_entregadores(agregados)
+
+    return TabelaOrdenada(df2, busca='Delivery_person_ID')
+
+@medir
+@memoizar
+def avaliacao_media_std(agregados, coluna):
 
     """
         coluna: 'Road_traffic_densiy' ou 'Weatherconditions'
     """
                 
-    cols = [coluna,'Delivery_person_Ratings']
-    df2 = df1[cols].groupby(coluna).agg(['mean','std'])
-    df2.columns = ['delivery_mean','delivery_std']
-    df2 = df2.reset_index()
+    df2 = media_avaliacao_por(agregados, coluna)
 
     return df2
 
 # ============================ Início da estrutura lógica do código ============================
 
-#importando dataset
-df = pd.read_csv('food_delivery_dataset/train.csv')
-
-#criando cópia do dataframe
-df1 = df.copy()
-
-#aplicando função de limpeza
-df1 = clean_code(df1)
+#importando os agregados do dataset (montados uma única vez por processo, compartilhados entre as páginas)
+with etapa('carregar_agregados'):
+    agregados = carregar_agregados()
 
 # =========================================================================
 # Header no Streamlit
@@ -148,19 +97,19 @@ weather_selection = st.sidebar.multiselect(
     default=['Sunny', 'Stormy', 'Sandstorm', 'Cloudy', 'Fog', 'Windy']
 )
 
-st.sidebar.markdown('## Criado por Rodolfo Stremel')
+st.sidebar.markdown("""---""")
+
+top_k = st.sidebar.slider('Quantos entregadores por cidade no ranking?', min_value=1, max_value=50, value=10)
 
-# filtro de data
-linhas_selecionadas = df1['Order_Date'] <= date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+st.sidebar.markdown('## Criado por Rodolfo Stremel')
 
-# filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_selection)
-df1 = df1.loc[linhas_selecionadas, :]
+# filtros de data, trânsito e clima aplicados a todas as tabelas agregadas
+agregados = filtrar_agregados(agregados, date_slider, traffic_selection, weather_selection)
+resumo = agregados['resumo']
 
-# filtro de clima
-linhas_selecionadas = df1['Weatherconditions'].isin(weather_selection)
-df1 = df1.loc[linhas_selecionadas, :]
+# estado dos filtros, usado como chave do cache das agregações
+filtros = chave_filtros(agregados, date_slider=date_slider, traffic_selection=traffic_selection,
+                        weather_selection=weather_selection)
 
 # =========================================================================
 # Layout no Streamlit
@@ -168,25 +117,25 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 tab1, tab2, tab3 = st.tabs(['Visão Gerencial','_','_'])
 
-with tab1:
+with tab1, etapa('Visão Gerencial'):
     with st.container():
         st.title('Métricas gerais')
         col1, col2, col3, col4 = st.columns(4, gap='large')
 
         with col1:
-            maior_idade = df1['Delivery_person_Age'].max()
+            maior_idade = resumo['idade_max'].max()
             col1.metric(label="Maior idade de entregador:", value=maior_idade)
 
         with col2:
-            menor_idade = df1['Delivery_person_Age'].min()
+            menor_idade = resumo['idade_min'].min()
             col2.metric(label="Menor idade de entregador:", value=menor_idade)
 
         with col3:
-            melhor_cond = df1['Vehicle_condition'].max()
+            melhor_cond = resumo['condicao_max'].max()
             col3.metric(label="Melhor condição de veículo:", value=melhor_cond)
 
         with col4:
-            pior_cond = df1['Vehicle_condition'].min()
+            pior_cond = resumo['condicao_min'].min()
             col4.metric(label="Pior condição de veículo:", value=pior_cond)
 
         st.markdown("""---""")
@@ -197,18 +146,17 @@ with tab1:
 
         with col1:
             st.markdown('##### Avaliação média por entregador')
-            cols = ['Delivery_person_ID','Delivery_person_Ratings']
-            aval_media_entr = df1[cols].groupby('Delivery_person_ID').mean().reset_index()
-            st.dataframe(aval_media_entr)
+            aval_media_entr = avaliacao_media_entregador(agregados, filtros=filtros)
+            tabela_paginada(aval_media_entr, chave='avaliacao_entregador')
 
         with col2:
 
             st.markdown('##### Avaliação média por trânsito')
-            df2 = avaliacao_media_std(df1, coluna='Road_traffic_density')
+            df2 = avaliacao_media_std(agregados, coluna='Road_traffic_density', filtros=filtros)
             st.dataframe(df2)
             
             st.markdown('##### Avaliação média por clima')
-            df2 = avaliacao_media_std(df1, coluna='Weatherconditions')
+            df2 = avaliacao_media_std(agregados, coluna='Weatherconditions', filtros=filtros)
             st.dataframe(df2)
 
         st.markdown("""---""")
@@ -217,12 +165,15 @@ with tab1:
         st.title('Média de velocidade de entrega')
         col1, col2 = st.columns(2)
 
+        mais_rapidos, mais_lentos = top_entregadores(agregados, k=top_k, filtros=filtros)
+
         with col1:
             st.markdown('##### Entregadores mais rápidos por cidade')
-            df2 = top_entregadores(df1, top_asc=True)
-            st.dataframe(df2)
+            st.dataframe(mais_rapidos)
 
         with col2:
             st.markdown('##### Entregadores mais lentos por cidade')
-            df2 = top_entregadores(df1, top_asc=False)            
-            st.dataframe(df2)
\ No newline at end of file
+            st.dataframe(mais_lentos)
+
+#tempo e memória de cada etapa deste rerun (log, perfil e painel de depuração opcionais)
+finalizar_execucao()
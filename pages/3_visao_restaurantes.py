@@ -1,95 +1,27 @@
-import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-import geopy.distance
 import streamlit as st
 from datetime import datetime
 from PIL import Image
-from streamlit_folium import folium_static
+from namasfood.agregados import carregar_agregados, filtrar_agregados, media_std
+from namasfood.instrumentacao import etapa, finalizar_execucao, iniciar_execucao, medir
+from namasfood.memo import chave_filtros, memoizar
+from namasfood.metricas import metricas_restaurantes
 
 st.set_page_config(page_title='Visão Restaurante', page_icon='👨‍🍳', layout='wide')
+iniciar_execucao('restaurantes')
 
 # =========================================================================
 # Funções
 # =========================================================================
 
-def clean_code(df1):
-    
-    """ Essa funcão tem a responsabilidade de limpar o dataframe.
-    
-        Tipos de limpeza:
-            1. Remocao dos dados NaN
-            2. Mudanca do tipo da coluna de dados
-            3. Remocao dos espacos das variáveis de texto
-            4. Formatacao das colunas de datas
-            5. Limpeza das colunas de horário (remocao do texto da variável numérica)
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    
-    #removendo dados NaN
-    df1 = df1[df['Delivery_person_Age'] != 'NaN '].copy()
-    df1 = df1[df['City'] != 'NaN '].copy()
-    df1 = df1[df['Road_traffic_density'] != 'NaN '].copy()
-    df1 = df1[df['Festival'] != 'NaN '].copy()
-    df1 = df1[df1['multiple_deliveries'] != 'NaN '].copy()
-    
-    #convertendo colunas Age e Ratings de texto para número (int e float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    
-    #convertendo coluna Order Date para data
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-    
-    #convertendo Time_Orderd e Time_Order_picked para tempo (horário)
-    df1['Time_Orderd'] = pd.to_datetime(df1['Time_Orderd']).dt.time
-    df1['Time_Order_picked'] = pd.to_datetime(df1['Time_Order_picked'], format='%H:%M:%S')
-    
-    #convertendo multiple_deliveries para texto
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    #resetando index
-    df1 = df1.reset_index(drop=True)
-    
-    #removendo os espaços em excesso das colunas
-    cols_strip = ['ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
-                'Type_of_vehicle', 'Festival', 'City']
-    
-    for col in cols_strip:
-      df1.loc[:, col] = df1.loc[:, col].str.strip()
-    
-    #removendo o texto 'conditions ' da coluna Weatherconditions
-    df1['Weatherconditions'] = df1['Weatherconditions'].str.strip('conditions ')
-    
-    #removendo o texto '(min) ' da coluna Time_taken(min)
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip('(min) ').astype(int)
-
-    return df1
+@medir
+@memoizar
+def tempo_medio_std_cidade(cubo):
 
-def tempo_medio_std_festivais(df1, festival, operador):
+    #plotly só é importado quando um gráfico é montado de fato (fora do cache)
+    import plotly.graph_objects as go
 
-    """
-    festival: 'Yes' ou 'No'
-    operador: 'tempo_medio' ou 'tempo_std'
-    """
-    
-    cols = ['Festival','Time_taken(min)']
-    df_tempo_entrega = df1[cols].groupby(['Festival']).agg(['mean','std'])
-    df_tempo_entrega.columns = ['tempo_medio','tempo_std']
-    df_tempo_entrega = df_tempo_entrega.reset_index()
-    df_festivais = round(df_tempo_entrega[df_tempo_entrega['Festival'] == festival][operador], 2)
-
-    return df_festivais
-
-def tempo_medio_std_cidade(df1):
-    
-    cols = ['City','Time_taken(min)']
-    df_tempo_entrega = df1[cols].groupby('City').agg(['mean','std'])
-    df_tempo_entrega.columns = ['tempo_medio','tempo_std']
-    df_tempo_entrega = df_tempo_entrega.reset_index()
+    df_tempo_entrega = media_std(cubo, 'City')
     
     fig = go.Figure()
     fig.add_trace(go.Bar(name='Control',
@@ -100,12 +32,13 @@ def tempo_medio_std_cidade(df1):
     
     return fig
 
-def tempo_medio_std_trafego(df1):
-    
-    cols = ['City','Road_traffic_density','Time_taken(min)']
-    df_tempo_entrega = df1[cols].groupby(['City','Road_traffic_density']).agg(['mean','std'])
-    df_tempo_entrega.columns = ['tempo_medio','tempo_std']
-    df_tempo_entrega = df_tempo_entrega.reset_index()
+@medir
+@memoizar
+def tempo_medio_std_trafego(cubo):
+
+    import plotly.express as px
+
+    df_tempo_entrega = media_std(cubo, ['City','Road_traffic_density'])
 
     fig = px.sunburst(df_tempo_entrega,
               path=['City','Road_traffic_density'],
@@ -116,25 +49,19 @@ def tempo_medio_std_trafego(df1):
 
     return fig
 
-def tempo_medio_std_cidade_tipo(df1):
+@medir
+@memoizar
+def tempo_medio_std_cidade_tipo(cubo):
 
-    cols = ['City','Type_of_order','Time_taken(min)']
-    df_tempo_entrega = df1[cols].groupby(['City','Type_of_order']).agg(['mean','std'])
-    df_tempo_entrega.columns = ['tempo_medio','tempo_std']
-    df_tempo_entrega = df_tempo_entrega.reset_index()
+    df_tempo_entrega = media_std(cubo, ['City','Type_of_order'])
 
     return df_tempo_entrega
         
 # ============================ Início da estrutura lógica do código ============================
 
-#importando dataset
-df = pd.read_csv('food_delivery_dataset/train.csv')
-
-#criando cópia do dataframe
-df1 = df.copy()
-
-#aplicando função de limpeza
-df1 = clean_code(df1)
+#importando os agregados do dataset (montados uma única vez por processo, compartilhados entre as páginas)
+with etapa('carregar_agregados'):
+    agregados = carregar_agregados()
 
 # =========================================================================
 # Header no Streamlit
@@ -182,17 +109,13 @@ weather_selection = st.sidebar.multiselect(
 
 st.sidebar.markdown('## Criado por Rodolfo Stremel')
 
-# filtro de data
-linhas_selecionadas = df1['Order_Date'] <= date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+# filtros de data, trânsito e clima aplicados a todas as tabelas agregadas
+agregados = filtrar_agregados(agregados, date_slider, traffic_selection, weather_selection)
+cubo = agregados['cubo']
 
-# filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_selection)
-df1 = df1.loc[linhas_selecionadas, :]
-
-# filtro de clima
-linhas_selecionadas = df1['Weatherconditions'].isin(weather_selection)
-df1 = df1.loc[linhas_selecionadas, :]
+# estado dos filtros, usado como chave do cache das agregações
+filtros = chave_filtros(agregados, date_slider=date_slider, traffic_selection=traffic_selection,
+                        weather_selection=weather_selection)
 
 # =========================================================================
 # Layout no Streamlit
@@ -200,70 +123,62 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 tab1, tab2, tab3 = st.tabs(['Visão Gerencial','_','_'])
 
-with tab1:
+with tab1, etapa('Visão Gerencial'):
     with st.container():
         st.title('Métricas gerais')
         col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
 
+        #todas as métricas do cabeçalho saem de um único cálculo
+        metricas = metricas_restaurantes(agregados, filtros=filtros)
+
         with col1:
             st.markdown('Quantidade de entregadores')
-            qtde_entregadores = df1['Delivery_person_ID'].nunique()
-            col1.metric(label="", value=qtde_entregadores)
+            col1.metric(label="", value=metricas.entregadores)
             
         with col2:
             st.markdown('Quantidade de restaurantes')     
-            df1['Restaurant_unique'] = df1['Restaurant_latitude'] + df1['Restaurant_longitude']           
-            qtde_restaurantes = df1['Restaurant_unique'].nunique()
-            col2.metric(label="", value=qtde_restaurantes)
+            col2.metric(label="", value=metricas.restaurantes)
             
         with col3:
             st.markdown('Distância média das entregas:')
-
-            # cols = ['Restaurant_latitude','Restaurant_longitude','Delivery_location_latitude','Delivery_location_longitude']
-            # df1['distancia'] = df1.loc[:, cols].apply(lambda x: geopy.distance.geodesic(
-            #                         (x['Restaurant_latitude'], x['Restaurant_longitude']),
-            #                         (x['Delivery_location_latitude'], x['Delivery_location_longitude'])).km, axis=1)
-            # dist_media = df1['distancia'].mean()
-            # col3.metric(label="", value=dist_media)
-            col3.metric(label="", value='27')
+            col3.metric(label="", value=round(metricas.distancia_media, 2))
      
         with col4:
             st.markdown('Tempo médio em festivais')
-            df_festivais = tempo_medio_std_festivais(df1, festival='Yes', operador='tempo_medio')
-            col4.metric(label='', value=df_festivais)
+            col4.metric(label='', value=round(metricas.tempo_medio_festival, 2))
             
         with col5:
             st.markdown('Desvio padrão em festivais')
-            df_festivais = tempo_medio_std_festivais(df1, festival='Yes', operador='tempo_std')
-            col5.metric(label='', value=df_festivais)
+            col5.metric(label='', value=round(metricas.tempo_std_festival, 2))
             
         with col6:
             st.markdown('Tempo médio não festivais')
-            df_festivais = tempo_medio_std_festivais(df1, festival='No', operador='tempo_medio')
-            col6.metric(label='', value=df_festivais)
+            col6.metric(label='', value=round(metricas.tempo_medio_sem_festival, 2))
             
         with col7:
             st.markdown('Desvio padrão não festivais')
-            df_festivais = tempo_medio_std_festivais(df1, festival='No', operador='tempo_std')
-            col7.metric(label='', value=df_festivais)
+            col7.metric(label='', value=round(metricas.tempo_std_sem_festival, 2))
         st.markdown("""---""")
 
     with st.container():
         st.title('Tempo médio e desvio padrão de entrega por cidade')
-        fig = tempo_medio_std_cidade(df1)
+        fig = tempo_medio_std_cidade(cubo, filtros=filtros)
         st.plotly_chart(fig)
         st.markdown("""---""")
 
     with st.container():
         st.title('Tempo médio e desvio padrão de entrega por trânsito')
-        fig = tempo_medio_std_trafego(df1)
+        fig = tempo_medio_std_trafego(cubo, filtros=filtros)
         st.plotly_chart(fig)
         st.markdown("""---""")
 
     with st.container():
         st.title('Tempo médio e desvio padrão de entrega por cidade e tipo de pedido')
-        df_tempo_entrega = tempo_medio_std_cidade_tipo(df1)
+        df_tempo_entrega = tempo_medio_std_cidade_tipo(cubo, filtros=filtros)
         st.dataframe(df_tempo_entrega)
         st.markdown("""---""")
 
-        
\ No newline at end of file
+        
+
+#tempo e memória de cada etapa deste rerun (log, perfil e painel de depuração opcionais)
+finalizar_execucao()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+from gerar_dataset import gerar_csv
+from namasfood import dados
+
+@pytest.fixture
+def train_csv(tmp_path):
+
+    """ train.csv sintético em uma pasta temporária, com o cache do processo limpo. """
+
+    dados._cache.clear()
+    yield gerar_csv(str(tmp_path / 'train.csv'), 5_000)
+    dados._cache.clear()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from namasfood import agregados, dados, memo
+
+@pytest.fixture
+def df1(train_csv):
+    return dados.clean_code(dados.ler_csv(train_csv))
+
+@pytest.mark.parametrize('linhas_por_bloco', [700, 2_000, 10_000])
+def test_blocos_iguais_a_memoria(train_csv, df1, linhas_por_bloco):
+    esperado = agregados.montar_agregados(df1, agregados.RESOLUCAO_COORDENADAS)
+    obtido = agregados.agregar_em_blocos(train_csv, linhas_por_bloco)
+
+    for nome in agregados.TABELAS:
+        pd.testing.assert_frame_equal(obtido[nome], esperado[nome], check_exact=False, rtol=1e-9, atol=1e-9)
+
+def test_acumulador_sem_linhas_novas(df1):
+    parcial = agregados.montar_agregados(df1)['entregadores']
+    acumulador = agregados.Acumulador('entregadores')
+    acumulador.somar(parcial)
+    acumulador.somar(parcial)
+
+    tabela = acumulador.tabela()
+    assert len(tabela) == len(parcial)
+    assert (tabela['pedidos'] == 2 * parcial['pedidos']).all()
+    np.testing.assert_allclose(tabela['media_avaliacao'], parcial['media_avaliacao'])
+
+def test_pontos_em_blocos_na_grade(train_csv):
+    pontos = agregados.agregar_em_blocos(train_csv, 2_000)['pontos']
+    celulas = pontos[['latitude', 'longitude']].drop_duplicates()
+
+    assert np.allclose(celulas * agregados.RESOLUCAO_COORDENADAS,
+                       np.rint(celulas * agregados.RESOLUCAO_COORDENADAS))
+
+@pytest.mark.parametrize('coluna, valor', [('Delivery_location_latitude', 'latitude'),
+                                           ('Delivery_location_longitude', 'longitude')])
+def test_mediana_exata_em_memoria(df1, coluna, valor):
+    cols = ['City', 'Road_traffic_density']
+    pontos = agregados.montar_agregados(df1)['pontos']
+    obtida = agregados.mediana(pontos, cols, valor, 'mediana').set_index(cols)['mediana']
+    exata = df1.astype({coluna: 'float64'}).groupby(cols, observed=True)[coluna].median()
+
+    assert obtida.to_dict() == exata.to_dict()
+
+def test_mediana_em_blocos_a_meia_celula_da_exata(train_csv, df1):
+    cols = ['City', 'Road_traffic_density']
+    pontos = agregados.agregar_em_blocos(train_csv, 2_000)['pontos']
+    obtida = agregados.mediana(pontos, cols, 'latitude', 'lat').set_index(cols)['lat']
+    exata = df1.groupby(cols, observed=True)['Delivery_location_latitude'].median()
+
+    erro = (obtida - exata.astype('float64')).abs()
+    assert (erro <= 0.5 / agregados.RESOLUCAO_COORDENADAS + 1e-6).all()
+
+def test_versao_dos_agregados_em_memoria_e_a_do_instantaneo_carregado(train_csv):
+    antigos = agregados.carregar_agregados(train_csv, modo='memoria')
+    assert antigos.versao == dados._chave(train_csv)
+
+    linhas = open(train_csv, encoding='utf-8').read().splitlines(keepends=True)
+    with open(train_csv, 'a', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas[1:101])
+    novos = agregados.carregar_agregados(train_csv, modo='memoria')
+
+    assert novos.versao == dados._chave(train_csv) != antigos.versao
+    assert memo.chave_filtros(novos) != memo.chave_filtros(antigos)
+    #as páginas montam a chave depois de filtrar
+    filtrados = agregados.filtrar_agregados(novos, pd.Timestamp.max, ['Low'])
+    assert memo.chave_filtros(filtrados) == memo.chave_filtros(novos)
@@ -0,0 +1,140 @@
+import dataclasses
+import inspect
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+duckdb = pytest.importorskip('duckdb')
+
+from bench_paginas import funcoes_da_pagina
+from gerar_dataset import gerar_csv
+from namasfood import agregados, banco, dados
+from namasfood.entregadores import (media_avaliacao_entregadores, media_avaliacao_por, pedidos_por_entregador_semana,
+                                    ranking_entregadores)
+from namasfood.metricas import metricas_restaurantes
+from namasfood.tabela import TabelaOrdenada
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# valores já limpos, como nas opções dos filtros das páginas
+TRANSITOS = ['Low', 'Medium', 'High', 'Jam']
+CLIMAS = ['Sunny', 'Stormy', 'Sandstorm', 'Cloudy', 'Fog', 'Windy']
+
+# (data limite, trânsito, clima)
+FILTROS = [
+    (datetime(2022, 4, 6), TRANSITOS, CLIMAS),
+    (datetime(2022, 3, 10), ['Low', 'Jam'], ['Sunny', 'Fog']),
+]
+
+# página -> [(função, argumentos depois das tabelas, tabela de entrada ou None para os agregados filtrados)]
+PAGINAS = {
+    '1_visao_empresa.py': [('qtde_pedidos_dia', (), 'cubo'), ('pedidos_tipo_trafego', (), 'cubo'),
+                           ('pedidos_cidade_trafego', (), 'cubo'), ('pedidos_semana', (), 'cubo'),
+                           ('media_pedidos_entregador_semana', (), None), ('mapa_central_trafego', (), None),
+                           ('mapa_calor_entregas', (), 'pontos')],
+    '2_visao_entregadores.py': [('top_entregadores', (10,), None), ('avaliacao_media_entregador', (), None),
+                                ('avaliacao_media_std', ('Road_traffic_density',), None),
+                                ('avaliacao_media_std', ('Weatherconditions',), None)],
+    '3_visao_restaurantes.py': [('tempo_medio_std_cidade', (), 'cubo'), ('tempo_medio_std_trafego', (), 'cubo'),
+                                ('tempo_medio_std_cidade_tipo', (), 'cubo')],
+}
+
+@pytest.fixture(scope='module')
+def modos(tmp_path_factory):
+
+    """ Agregados do mesmo CSV nos modos memoria e banco. """
+
+    caminho = gerar_csv(str(tmp_path_factory.mktemp('banco') / 'train.csv'), 5_000)
+    memoria = agregados.montar_agregados(dados.clean_code(dados.ler_csv(caminho)))
+
+    with duckdb.connect(banco.caminho_banco(caminho)) as conexao:
+        banco.atualizar(conexao, caminho)
+    consultado = banco.Banco(duckdb.connect(banco.caminho_banco(caminho)), None)
+
+    yield memoria, consultado
+    consultado.conexao.close()
+
+def test_filtros_cobrem_os_valores_limpos_do_dataset_gerado(modos):
+    memoria, _ = modos
+    cubo = memoria['cubo']
+
+    #sem isso, um valor que a limpeza não reconhece sumiria dos dois modos sem quebrar a paridade
+    assert set(cubo['Weatherconditions'].dropna()) - {'NaN'} == set(CLIMAS)
+    assert set(cubo['Road_traffic_density'].dropna()) - {'NaN'} == set(TRANSITOS)
+
+def comparar(esperado, obtido):
+
+    """ Compara dois resultados de página, com tolerância relativa de 1e-9 nos números. """
+
+    if isinstance(esperado, pd.DataFrame):
+        pd.testing.assert_frame_equal(esperado, obtido, check_exact=False, rtol=1e-9, atol=1e-9)
+    elif isinstance(esperado, TabelaOrdenada):
+        assert esperado.busca == obtido.busca
+        comparar(esperado.df, obtido.df)
+    elif isinstance(esperado, go.Figure):
+        comparar(esperado.to_plotly_json(), obtido.to_plotly_json())
+    elif dataclasses.is_dataclass(esperado):
+        comparar(dataclasses.asdict(esperado), dataclasses.asdict(obtido))
+    elif isinstance(esperado, dict):
+        assert esperado.keys() == obtido.keys()
+        for chave in esperado:
+            comparar(esperado[chave], obtido[chave])
+    elif isinstance(esperado, (tuple, list)):
+        assert len(esperado) == len(obtido)
+        for a, b in zip(esperado, obtido):
+            comparar(a, b)
+    elif isinstance(esperado, np.ndarray) and esperado.dtype.kind in 'fiu':
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9, atol=1e-9)
+    elif isinstance(esperado, np.ndarray):
+        assert esperado.tolist() == obtido.tolist()
+    elif isinstance(esperado, float):
+        assert obtido == pytest.approx(esperado, rel=1e-9, nan_ok=True)
+    elif isinstance(esperado, str):
+        #HTML do mapa: os elementos do folium têm IDs aleatórios
+        assert re.sub('_[0-9a-f]{32}', '_id', esperado) == re.sub('_[0-9a-f]{32}', '_id', obtido)
+    else:
+        assert esperado == obtido
+
+@pytest.mark.parametrize('filtros', FILTROS)
+@pytest.mark.parametrize('pagina, nome, args, tabela',
+                         [(pagina, *funcao) for pagina, funcoes in PAGINAS.items() for funcao in funcoes])
+def test_funcoes_das_paginas_iguais_nos_dois_modos(modos, filtros, pagina, nome, args, tabela):
+    funcao = funcoes_da_pagina(os.path.join(RAIZ, 'pages', pagina))[nome]
+
+    resultados = []
+    for modo in modos:
+        filtrados = agregados.filtrar_agregados(modo, *filtros)
+        resultados.append(funcao(filtrados if tabela is None else filtrados[tabela], *args))
+
+    comparar(*resultados)
+
+@pytest.mark.parametrize('filtros', FILTROS)
+def test_metricas_iguais_nos_dois_modos(modos, filtros):
+    metricas = inspect.unwrap(metricas_restaurantes)
+
+    comparar(*(metricas(agregados.filtrar_agregados(modo, *filtros)) for modo in modos))
+
+@pytest.mark.parametrize('filtros', FILTROS + [(datetime(2022, 4, 6), [], None)])
+@pytest.mark.parametrize('funcao, args', [
+    (agregados.contar_distintos, ('restaurantes', 'Restaurant_ID')),
+    (agregados.contar_distintos, ('entregadores', 'Delivery_person_ID')),
+    (agregados.medianas_coordenadas, (['City', 'Road_traffic_density'],)),
+    (pedidos_por_entregador_semana, ()),
+    (media_avaliacao_entregadores, ()),
+    (media_avaliacao_por, ('Weatherconditions',)),
+    (ranking_entregadores, (3,)),
+])
+def test_agregacoes_finais_calculadas_no_banco(modos, filtros, funcao, args):
+    memoria, consultado = modos
+    filtrados = agregados.filtrar_agregados(consultado, *filtros)
+
+    obtido = funcao(filtrados, *args)
+
+    #o GROUP BY final roda no banco: nenhuma tabela filtrada é trazida
+    assert len(filtrados) == 0
+    comparar(funcao(agregados.filtrar_agregados(memoria, *filtros), *args), obtido)
@@ -0,0 +1,102 @@
+import io
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from namasfood import compartilhado, dados, memo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# trabalhador cuja reconstrução depois da primeira publicação demora `atraso` segundos
+TRABALHADOR = '''
+import sys, time
+from namasfood import agregados, compartilhado
+
+caminho, intervalo, atraso = sys.argv[1], float(sys.argv[2]), float(sys.argv[3])
+montar = agregados.montar_agregados
+chamadas = []
+
+def lento(df1):
+    if chamadas:
+        time.sleep(atraso)
+    chamadas.append(len(df1))
+    return montar(df1)
+
+agregados.montar_agregados = lento
+compartilhado.main([caminho, '--intervalo', str(intervalo)])
+'''
+
+def _esperar(condicao, limite=60):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'tempo esgotado'
+        time.sleep(0.05)
+
+@pytest.fixture
+def trabalhador(train_csv):
+    intervalo, atraso = 0.2, 4 * compartilhado.INTERVALOS_SEM_SINAL * 0.2
+    processo = subprocess.Popen([sys.executable, '-c', TRABALHADOR, train_csv, str(intervalo), str(atraso)],
+                                cwd=RAIZ, stdout=subprocess.DEVNULL)
+    try:
+        _esperar(lambda: compartilhado.ler_manifesto(train_csv) is not None)
+        yield processo, atraso
+    finally:
+        processo.terminate()
+        processo.wait(30)
+        compartilhado._anexados.clear()
+        compartilhado._esperas_expiradas.clear()
+
+def test_reconstrucao_demorada_serve_o_segmento_antigo(train_csv, trabalhador):
+    processo, atraso = trabalhador
+    antigos = compartilhado.anexar(train_csv)
+    assert antigos is not None
+
+    linhas = open(train_csv, encoding='utf-8').read().splitlines(keepends=True)
+    with open(train_csv, 'a', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas[1:101])
+
+    #no meio da reconstrução, bem depois do limite de silêncio
+    time.sleep(atraso / 2)
+    manifesto = compartilhado.ler_manifesto(train_csv)
+    assert compartilhado._trabalhador_ativo(manifesto)
+    assert tuple(manifesto['origem']) != dados._chave(train_csv)
+    assert compartilhado.anexar(train_csv, espera=0.2) is antigos
+    #a espera já expirou para esta versão do CSV: o rerun seguinte não espera de novo
+    inicio = time.monotonic()
+    assert compartilhado.anexar(train_csv, espera=10) is antigos
+    assert time.monotonic() - inicio < 1
+
+    _esperar(lambda: tuple(compartilhado.ler_manifesto(train_csv)['origem']) == dados._chave(train_csv))
+    novos = compartilhado.anexar(train_csv)
+    assert novos is not antigos
+    acrescentadas = dados.clean_code(dados.ler_csv(io.StringIO(''.join(linhas[:101]))))
+    assert novos['cubo']['pedidos'].sum() == antigos['cubo']['pedidos'].sum() + len(acrescentadas)
+
+def test_memo_troca_de_chave_quando_o_segmento_novo_e_publicado(train_csv, trabalhador):
+    processo, atraso = trabalhador
+    cache = memo.CacheLRU()
+
+    @memo.memoizar(cache=cache)
+    def pedidos(agregados):
+        return agregados['cubo']['pedidos'].sum()
+
+    def rerun(espera):
+        agregados = compartilhado.anexar(train_csv, espera=espera)
+        return pedidos(agregados, filtros=memo.chave_filtros(agregados, traffic_selection=['Low']))
+
+    antes = rerun(10)
+    linhas = open(train_csv, encoding='utf-8').read().splitlines(keepends=True)
+    with open(train_csv, 'a', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas[1:101])
+
+    #durante a reconstrução o segmento antigo é servido, com a chave da versão dele
+    time.sleep(atraso / 2)
+    assert rerun(0.2) == antes
+
+    _esperar(lambda: tuple(compartilhado.ler_manifesto(train_csv)['origem']) == dados._chave(train_csv))
+    acrescentadas = dados.clean_code(dados.ler_csv(io.StringIO(''.join(linhas[:101]))))
+    assert rerun(10) == antes + len(acrescentadas)
+    assert cache.estatisticas()['falhas'] == 2
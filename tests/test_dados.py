@@ -0,0 +1,72 @@
+import ast
+import os
+
+import pytest
+
+from namasfood import dados
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _reescrever(caminho, antigo, novo):
+
+    """ Troca a primeira ocorrência de `antigo` depois do meio do arquivo, sem mudar o tamanho. """
+
+    conteudo = open(caminho, 'rb').read()
+    posicao = conteudo.index(antigo, len(conteudo) // 2)
+    assert len(antigo) == len(novo)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(conteudo[:posicao] + novo + conteudo[posicao + len(antigo):])
+
+    #garante um mtime diferente mesmo em sistemas de arquivos com pouca resolução
+    stat = os.stat(caminho)
+    os.utime(caminho, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    return posicao
+
+def _clima_da_linha(caminho, posicao, df1):
+    id_pedido = open(caminho, 'rb').read()[:posicao].rsplit(b'\n', 1)[1].split(b',', 1)[0]
+    return df1.loc[df1['ID'] == id_pedido.decode().strip(), 'Weatherconditions'].tolist()
+
+def test_edicao_do_mesmo_tamanho_recarrega(train_csv):
+    dados.carregar_dados(train_csv)
+    posicao = _reescrever(train_csv, b'conditions Sunny', b'conditions Windy')
+
+    assert _clima_da_linha(train_csv, posicao, dados.carregar_dados(train_csv)) == ['Windy']
+
+def test_edicao_do_mesmo_tamanho_invalida_cache_em_disco(train_csv):
+    dados.carregar_dados(train_csv)
+    posicao = _reescrever(train_csv, b'conditions Sunny', b'conditions Windy')
+
+    #reinício do processo: só o cache colunar e a origem registrada nele
+    dados._cache.clear()
+    assert _clima_da_linha(train_csv, posicao, dados.carregar_dados(train_csv)) == ['Windy']
+
+def test_linhas_acrescentadas_sao_ingeridas(train_csv):
+    df1 = dados.carregar_dados(train_csv)
+    linhas = open(train_csv, encoding='utf-8').read().splitlines(keepends=True)
+    with open(train_csv, 'a', encoding='utf-8') as arquivo:
+        arquivo.writelines(linhas[1:101])
+
+    novo = dados.carregar_dados(train_csv)
+    dados._cache.clear()
+    completo = dados.clean_code(dados.ler_csv(train_csv))
+
+    assert len(novo) > len(df1)
+    assert novo.drop(columns='Restaurant_ID').equals(completo.drop(columns='Restaurant_ID'))
+
+def _climas_da_pagina(pagina):
+
+    """ Opções do multiselect de clima de uma página. """
+
+    arvore = ast.parse(open(os.path.join(RAIZ, 'pages', pagina), encoding='utf-8').read())
+    for no in ast.walk(arvore):
+        if (isinstance(no, ast.Call) and no.args and isinstance(no.args[0], ast.Constant)
+                and no.args[0].value == 'Qual a condição de clima?'):
+            return ast.literal_eval(no.args[1])
+
+@pytest.mark.parametrize('pagina', ['2_visao_entregadores.py', '3_visao_restaurantes.py'])
+def test_climas_iguais_as_opcoes_das_paginas(train_csv, pagina):
+    #o gerador escreve 'conditions Sandstorms', com s no final, como o dataset original
+    climas = set(dados.clean_code(dados.ler_csv(train_csv))['Weatherconditions'].dropna()) - {'NaN'}
+
+    assert 'Sandstorm' in climas
+    assert climas == set(_climas_da_pagina(pagina))
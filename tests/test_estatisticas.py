@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from namasfood.estatisticas import Estatisticas, combinar_por_grupo
+
+@pytest.fixture
+def partes():
+    rng = np.random.default_rng(0)
+    #médias altas e variância pequena: o caso em que a variância por somas perde precisão
+    return [1e6 + rng.normal(0, 1, n) for n in (1, 2, 17, 500)]
+
+def _confere(estatisticas, valores):
+    serie = pd.Series(valores, dtype='float64')
+    assert estatisticas.n == len(serie)
+    assert estatisticas.media == pytest.approx(serie.mean(), rel=1e-12)
+    assert estatisticas.desvio == pytest.approx(serie.std(), rel=1e-9)
+
+def test_de_valores_ignora_nan():
+    _confere(Estatisticas.de_valores([1.0, np.nan, 4.0, 7.0]), [1.0, 4.0, 7.0])
+
+def test_combinar(partes):
+    total = Estatisticas()
+    for parte in partes:
+        total = total + Estatisticas.de_valores(parte)
+
+    _confere(total, np.concatenate(partes))
+
+def test_subtrair(partes):
+    total = Estatisticas.de_valores(np.concatenate(partes))
+    sem_ultima = total - Estatisticas.de_valores(partes[-1])
+
+    _confere(sem_ultima, np.concatenate(partes[:-1]))
+
+def test_adicionar(partes):
+    estatisticas = Estatisticas()
+    for valor in partes[2]:
+        estatisticas.adicionar(valor)
+
+    _confere(estatisticas, partes[2])
+
+def test_combinar_por_grupo(partes):
+    grupos = np.array([0, 1, 0, 1])
+    combinadas = combinar_por_grupo(grupos, 2, *zip(*[(len(p), p.mean(), ((p - p.mean()) ** 2).sum())
+                                                      for p in partes]))
+
+    for grupo in (0, 1):
+        valores = pd.Series(np.concatenate([p for p, g in zip(partes, grupos) if g == grupo]))
+        assert combinadas.n[grupo] == len(valores)
+        assert combinadas.media[grupo] == pytest.approx(valores.mean(), rel=1e-12)
+        assert combinadas.desvio[grupo] == pytest.approx(valores.std(), rel=1e-9)
+
+def test_partes_vazias(partes):
+    vazia = Estatisticas.de_valores([])
+    assert (vazia + vazia).n == 0
+    assert np.isnan((vazia + vazia).desvio)
+
+    _confere(vazia + Estatisticas.de_valores(partes[3]), partes[3])
+    _confere(Estatisticas.de_valores(partes[3]) + vazia, partes[3])
+
+def test_subtrair_tudo():
+    restante = Estatisticas(3, 2.0, 2.0) - Estatisticas(3, 2.0, 2.0)
+    assert restante.n == 0
+    assert restante.media == 0.0 and restante.m2 == 0.0
+
+def test_um_valor_tem_desvio_nan():
+    assert np.isnan(Estatisticas.de_valores([5.0]).desvio)
+    assert np.isnan(pd.Series([5.0]).std())
+
+def test_arrays_com_grupos_vazios():
+    a = Estatisticas(np.array([0, 2]), np.array([0.0, 1.0]), np.array([0.0, 2.0]))
+    b = Estatisticas(np.array([0, 1]), np.array([0.0, 4.0]), np.array([0.0, 0.0]))
+    soma = a + b
+
+    _confere(Estatisticas(soma.n[1], soma.media[1], soma.m2[1]), [0.0, 2.0, 4.0])
+    assert soma.n[0] == 0 and soma.media[0] == 0.0
@@ -0,0 +1,74 @@
+import os
+import threading
+
+import pytest
+
+from namasfood import instrumentacao
+
+class PerfilUnico:
+
+    """ Como o cProfile do Python >= 3.12: um único perfil ligado por processo. """
+
+    ligado = None
+
+    def enable(self):
+        if PerfilUnico.ligado not in (None, self):
+            raise ValueError('Another profiling tool is already active')
+        PerfilUnico.ligado = self
+
+    def disable(self):
+        if PerfilUnico.ligado is self:
+            PerfilUnico.ligado = None
+
+    def dump_stats(self, caminho):
+        open(caminho, 'w').close()
+
+@pytest.fixture(autouse=True)
+def perfil(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentacao, 'PASTA_PERFIL', str(tmp_path))
+    monkeypatch.setattr(instrumentacao.cProfile, 'Profile', PerfilUnico)
+    monkeypatch.setattr(instrumentacao, '_depuracao_na_url', lambda: False)
+    yield
+    PerfilUnico.ligado = None
+    instrumentacao._perfilada = None
+    instrumentacao._execucao.set(None)
+
+def test_rerun_interrompido_nao_bloqueia_o_perfil():
+    interrompida = instrumentacao.iniciar_execucao('empresa')
+    assert interrompida.perfil is not None
+
+    #o script parou antes de finalizar_execucao; o próximo rerun da sessão começa
+    execucao = instrumentacao.iniciar_execucao('empresa')
+    assert execucao.perfil is not None
+
+    registro = instrumentacao.finalizar_execucao()
+    assert os.path.exists(registro['perfil'])
+    assert PerfilUnico.ligado is None
+
+def test_perfil_de_thread_encerrada_e_desligado():
+    thread = threading.Thread(target=instrumentacao.iniciar_execucao, args=('entregadores',))
+    thread.start()
+    thread.join()
+    assert PerfilUnico.ligado is not None
+
+    assert instrumentacao.iniciar_execucao('restaurantes').perfil is not None
+
+def test_perfil_de_outra_sessao_em_andamento_e_mantido():
+    iniciou, terminar = threading.Event(), threading.Event()
+
+    def sessao():
+        instrumentacao.iniciar_execucao('entregadores')
+        iniciou.set()
+        terminar.wait()
+        instrumentacao.finalizar_execucao()
+
+    thread = threading.Thread(target=sessao)
+    thread.start()
+    iniciou.wait()
+    try:
+        outra = PerfilUnico.ligado
+        assert instrumentacao.iniciar_execucao('empresa').perfil is None
+        assert PerfilUnico.ligado is outra
+    finally:
+        terminar.set()
+        thread.join()
@@ -0,0 +1,24 @@
+import pytest
+
+from namasfood import agregados, dados, mapa
+
+@pytest.mark.parametrize('resolucao', [None, agregados.RESOLUCAO_COORDENADAS])
+def test_mapa_de_calor_com_uma_linha_por_coordenada(train_csv, resolucao):
+    df1 = dados.clean_code(dados.ler_csv(train_csv))
+    pontos = agregados.montar_agregados(df1, resolucao)['pontos']
+
+    calor = mapa._pontos_calor(pontos, 'latitude', 'longitude', 'pedidos')
+
+    #nenhuma coordenada distinta é juntada a outra, e nenhum pedido se perde
+    assert len(calor) == len(pontos[['latitude', 'longitude']].drop_duplicates())
+    assert calor[:, 2].sum() == pontos['pedidos'].sum()
+
+def test_mapa_de_calor_em_blocos_quase_tao_fino_quanto_o_exato(train_csv):
+    df1 = dados.clean_code(dados.ler_csv(train_csv))
+    exato = agregados.montar_agregados(df1)['pontos']
+    blocos = agregados.agregar_em_blocos(train_csv, 2_000)['pontos']
+
+    calor = mapa._pontos_calor(blocos, 'latitude', 'longitude', 'pedidos')
+
+    #a grade do modo blocos não junta as entregas de uma cidade num borrão
+    assert len(calor) > 0.9 * len(mapa._pontos_calor(exato, 'latitude', 'longitude', 'pedidos'))
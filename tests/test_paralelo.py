@@ -0,0 +1,44 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from bench_entregadores import gerar_entregadores
+from namasfood import paralelo
+from namasfood.entregadores import avaliacao_por, avaliacao_por_entregador, extremos_entregadores
+
+@pytest.fixture
+def tabela():
+    yield gerar_entregadores(20_000, 500)
+    paralelo.encerrar()
+
+def _morrer_no_trabalhador(particao, pid_pai):
+    if os.getpid() != pid_pai:
+        os._exit(1)
+    return len(particao)
+
+def test_particoes_iguais_a_serial(tabela):
+    pd.testing.assert_frame_equal(avaliacao_por_entregador(tabela, 2), avaliacao_por_entregador(tabela, 1))
+    pd.testing.assert_frame_equal(avaliacao_por(tabela, 'Road_traffic_density', 2),
+                                  avaliacao_por(tabela, 'Road_traffic_density', 1))
+    for paralelos, seriais in zip(extremos_entregadores(tabela, 10, 2), extremos_entregadores(tabela, 10, 1)):
+        pd.testing.assert_frame_equal(paralelos, seriais)
+
+def test_pool_quebrado_cai_no_serial(tabela):
+    if paralelo.iniciar(2) is None:
+        pytest.skip('o processo de testes já tem outras threads')
+
+    assert paralelo.executar(_morrer_no_trabalhador, tabela, os.getpid(), trabalhadores=2) == [len(tabela)]
+    assert 2 not in paralelo._pools
+
+def test_sem_pool_com_outras_threads(tabela):
+    parar = threading.Event()
+    thread = threading.Thread(target=parar.wait)
+    thread.start()
+    try:
+        assert paralelo.iniciar(3) is None
+        assert paralelo.executar(len, tabela, trabalhadores=3) == [len(tabela)]
+    finally:
+        parar.set()
+        thread.join()